@@ -6,6 +6,7 @@ from typing import Optional
 from randovania.version import version
 
 CONFIGURATION_FILE_PATH: Optional[Path] = None
+GAME_DESCRIPTION_CACHE_PATH: Optional[Path] = None
 
 
 def is_frozen() -> bool:
@@ -20,6 +21,18 @@ def get_data_path() -> Path:
     return file_dir.joinpath("data")
 
 
+def get_game_description_cache_path() -> Path:
+    """
+    Where the decoded game descriptions are cached. Defaults to the user's cache directory, since the data path
+    is often not writable.
+    """
+    if GAME_DESCRIPTION_CACHE_PATH is not None:
+        return GAME_DESCRIPTION_CACHE_PATH
+
+    from randovania.interface_common import persistence
+    return persistence.local_cache_dir().joinpath("game_description_cache")
+
+
 def _get_default_configuration_path() -> Path:
     return get_data_path().joinpath("configuration.json")
 
@@ -29,6 +29,8 @@ def _create_parser():
                         const=_print_version, dest="func")
     parser.add_argument("--configuration", type=Path,
                         help="Use the given configuration path instead of the included one.")
+    parser.add_argument("--game-description-cache", type=Path,
+                        help="Cache the decoded game databases in the given directory.")
 
     return parser
 
@@ -37,6 +39,9 @@ def _run_args(parser, args):
     if args.configuration is not None:
         randovania.CONFIGURATION_FILE_PATH = args.configuration.absolute()
 
+    if args.game_description_cache is not None:
+        randovania.GAME_DESCRIPTION_CACHE_PATH = args.game_description_cache.absolute()
+
     if args.func is None:
         parser.print_help()
         raise SystemExit(1)
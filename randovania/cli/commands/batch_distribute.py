@@ -1,6 +1,10 @@
 import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import contextlib
+import json
 import math
-import multiprocessing
+import os
 import time
 import typing
 from argparse import ArgumentParser
@@ -10,14 +14,32 @@ from randovania.cli import echoes_lib
 from randovania.interface_common import sleep_inhibitor
 
 
+def _failure_reason(error: Exception) -> str:
+    source = getattr(error, "source", None)
+    if source is not None and str(source):
+        return f"{error}: {source}"
+    return str(error)
+
+
 def batch_distribute_helper(base_permalink,
                             seed_number: int,
                             timeout: int,
                             validate: bool,
                             output_dir: Path,
-                            ) -> float:
+                            with_profile: bool = False,
+                            max_expansions: typing.Optional[int] = None,
+                            ) -> dict:
+    """
+    Generates the given seed number, saving the result to output_dir.
+    When max_expansions is set, the validation is limited by it instead of the timeout.
+    :return: The index record for the seed, with how long it took, how many attempts were used
+    and why it failed, if it did. When validating, also how much work the validation did.
+    When with_profile is set, also how long each phase of the generation took.
+    """
     from randovania.generator import generator
     from randovania.layout.permalink import Permalink
+    from randovania.lib import profiling_lib
+    from randovania.resolver.resolver_stats import ResolverStats
 
     permalink = Permalink(
         seed_number=seed_number,
@@ -25,23 +47,82 @@ def batch_distribute_helper(base_permalink,
         presets=typing.cast(Permalink, base_permalink).presets,
     )
 
-    start_time = time.perf_counter()
-    description = asyncio.run(generator.generate_and_validate_description(
-        permalink=permalink, status_update=None,
-        validate_after_generation=validate, timeout=timeout,
-        attempts=0,
-    ))
-    delta_time = time.perf_counter() - start_time
+    attempts = 0
+
+    def attempt_callback(attempt_number: int):
+        nonlocal attempts
+        attempts = attempt_number
+
+    if max_expansions is not None:
+        timeout = None
+    resolver_stats = ResolverStats(max_expansions=max_expansions)
+
+    failure = None
+    with profiling_lib.profile() if with_profile else contextlib.nullcontext() as profile:
+        start_time = time.perf_counter()
+        try:
+            description = asyncio.run(generator.generate_and_validate_description(
+                permalink=permalink, status_update=None,
+                validate_after_generation=validate, timeout=timeout,
+                attempts=0, attempt_callback=attempt_callback, resolver_stats=resolver_stats,
+            ))
+        except Exception as e:
+            description = None
+            failure = _failure_reason(e)
+        delta_time = time.perf_counter() - start_time
+
+    if description is not None:
+        description.save_to_file(output_dir.joinpath("{}.{}".format(seed_number, description.file_extension())))
+
+    record = {
+        "seed": seed_number,
+        "duration": delta_time,
+        "success": failure is None,
+        "failure": failure,
+        "attempts": attempts,
+    }
+    if validate:
+        record["resolver"] = resolver_stats.as_json
+    if profile is not None:
+        record["profile"] = profile.as_json
+
+    return record
 
-    description.save_to_file(output_dir.joinpath("{}.{}".format(seed_number, description.file_extension())))
-    return delta_time
+
+def read_index(index_file: Path) -> typing.Set[int]:
+    """
+    Reads the seed numbers that already have a record in the given index file.
+    Lines that can't be decoded, like one partially written when a previous run was interrupted, are ignored.
+    :param index_file:
+    :return:
+    """
+    seeds = set()
+    if not index_file.is_file():
+        return seeds
+
+    with index_file.open("r") as index:
+        for line in index:
+            try:
+                seeds.add(int(json.loads(line)["seed"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    return seeds
+
+
+def _open_index_for_append(index_file: Path) -> typing.TextIO:
+    index = index_file.open("a+")
+    if index.tell() > 0:
+        # Don't extend an incomplete line left by an interrupted run
+        index.seek(index.tell() - 1)
+        if index.read(1) != "\n":
+            index.write("\n")
+    return index
 
 
 def batch_distribute_command_logic(args):
     from randovania.layout.permalink import Permalink
 
-    finished_count = 0
-
     timeout: int = args.timeout
     validate: bool = args.validate
 
@@ -53,27 +134,83 @@ def batch_distribute_command_logic(args):
     number_format = "[{0:" + str(num_digits) + "d}/{1}] "
     base_permalink = Permalink.from_str(args.permalink)
 
+    process_count = args.process_count or os.cpu_count() or 1
+    max_in_flight = args.max_in_flight or 2 * process_count
+
+    all_seeds = range(base_permalink.seed_number, base_permalink.seed_number + seed_count)
+    if args.index_file is not None:
+        finished_seeds = read_index(args.index_file)
+        seeds_to_generate = [seed_number for seed_number in all_seeds if seed_number not in finished_seeds]
+    else:
+        seeds_to_generate = list(all_seeds)
+    finished_count = seed_count - len(seeds_to_generate)
+
+    if finished_count:
+        print(f"Skipping {finished_count} seeds already in the index.")
+
     def report_update(msg: str):
         nonlocal finished_count
         finished_count += 1
         print(number_format.format(finished_count, seed_count) + msg)
 
-    def callback(result):
-        report_update(f"Finished seed in {result} seconds.")
+    with contextlib.ExitStack() as stack:
+        index = None
+        if args.index_file is not None:
+            index = stack.enter_context(_open_index_for_append(args.index_file))
+
+        executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=process_count))
+        stack.enter_context(sleep_inhibitor.get_inhibitor())
+
+        # Only keep a bounded number of seeds submitted, so huge runs don't queue everything at once
+        seed_iterator = iter(seeds_to_generate)
+        pending: typing.Dict[concurrent.futures.Future, int] = {}
+        broken_pool = None
+
+        while True:
+            # Once a worker died, nothing else can run in the pool
+            for seed_number in seed_iterator if broken_pool is None else ():
+                future = executor.submit(batch_distribute_helper,
+                                         base_permalink, seed_number, timeout, validate, output_dir,
+                                         args.profile, args.max_expansions)
+                pending[future] = seed_number
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in sorted(done, key=pending.get):
+                seed_number = pending.pop(future)
+                try:
+                    record = future.result()
+                except concurrent.futures.process.BrokenProcessPool as e:
+                    # Not the fault of this seed, so it's left without a record to be generated again
+                    broken_pool = e
+                    continue
+                except Exception as e:
+                    record = {
+                        "seed": seed_number,
+                        "duration": None,
+                        "success": False,
+                        "failure": _failure_reason(e),
+                        "attempts": 0,
+                    }
+
+                if record["success"]:
+                    report_update(f"Finished seed {record['seed']} in {record['duration']} seconds.")
+                else:
+                    report_update(f"Failed to generate seed {record['seed']}: {record['failure']}")
 
-    def error_callback(e):
-        report_update(f"Failed to generate seed: {e}")
+                if index is not None:
+                    index.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    index.flush()
 
-    with multiprocessing.Pool(processes=args.process_count) as pool, sleep_inhibitor.get_inhibitor():
-        for seed_number in range(base_permalink.seed_number, base_permalink.seed_number + args.seed_count):
-            pool.apply_async(
-                func=batch_distribute_helper,
-                args=(base_permalink, seed_number, timeout, validate, output_dir),
-                callback=callback,
-                error_callback=error_callback,
-            )
-        pool.close()
-        pool.join()
+        if broken_pool is not None:
+            print(f"Stopping, as a worker process terminated abruptly: {broken_pool}")
+            if index is not None:
+                print("Run again with the same index file to generate the seeds that were left.")
+            raise SystemExit(1)
 
 
 def add_batch_distribute_command(sub_parsers):
@@ -89,6 +226,25 @@ def add_batch_distribute_command(sub_parsers):
         type=int,
         default=90,
         help="How many seconds to wait before timing out a generation/validation.")
+    parser.add_argument(
+        "--max-expansions",
+        type=int,
+        help="Stop validating after expanding this many states, instead of using the timeout. "
+             "Unlike the timeout, the result doesn't depend on how fast the machine is.")
+    parser.add_argument(
+        "--index-file",
+        type=Path,
+        help="Append a record with the result of each seed to this file. "
+             "Seeds that already have a record are skipped, so an interrupted run can be resumed.")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        help="How many seeds can be submitted to the processes at once. Defaults to twice the process count.")
+    parser.add_argument(
+        "--profile",
+        default=False,
+        action="store_true",
+        help="Include the time spent in each phase of the generation in the index file.")
     echoes_lib.add_validate_argument(parser)
     parser.add_argument(
         "seed_count",
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+import tracemalloc
+import typing
+from argparse import ArgumentParser, ArgumentTypeError
+from pathlib import Path
+
+from randovania.layout.layout_description import LayoutDescription
+from randovania.resolver import resolver
+from randovania.resolver.exceptions import ExpansionBudgetExhausted
+from randovania.resolver.resolver_stats import ResolverStats
+
+
+def _resolve_description(description: LayoutDescription, stats: ResolverStats) -> str:
+    """
+    Resolves the given layout, limited by the stats' budget.
+    :return: If the layout is "possible", "impossible" or if the "budget" was reached before knowing.
+    """
+    try:
+        if description.permalink.player_count == 1:
+            final_state = asyncio.run(resolver.resolve(
+                configuration=description.permalink.presets[0].configuration,
+                patches=description.all_patches[0],
+                stats=stats,
+            ))
+        else:
+            final_state = asyncio.run(resolver.resolve_multiworld(
+                configurations={player: preset.configuration
+                                for player, preset in description.permalink.presets.items()},
+                all_patches=description.all_patches,
+                stats=stats,
+            ))
+    except ExpansionBudgetExhausted:
+        return "budget"
+
+    return "possible" if final_state is not None else "impossible"
+
+
+def benchmark_layout(layout_file: Path, max_expansions: int, repeat: int, measure_memory: bool) -> dict:
+    """
+    Resolves the given layout file repeat times.
+    :return: The outcome and how much work the resolver did, which are the same for every run,
+    the fastest of the runs and, with measure_memory, the peak memory of an extra run.
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat must be at least 1, got {repeat}")
+
+    description = LayoutDescription.from_file(layout_file)
+
+    outcome = None
+    stats = None
+    seconds = None
+    for _ in range(repeat):
+        stats = ResolverStats(max_expansions=max_expansions)
+        before = time.perf_counter()
+        outcome = _resolve_description(description, stats)
+        took = time.perf_counter() - before
+        if seconds is None or took < seconds:
+            seconds = took
+
+    peak_memory = None
+    if measure_memory:
+        # Tracing makes everything slower, so it's never part of the timing
+        tracemalloc.start()
+        try:
+            stats = ResolverStats(max_expansions=max_expansions)
+            outcome = _resolve_description(description, stats)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "outcome": outcome,
+        "states_expanded": stats.states_expanded,
+        "seconds": round(seconds, 3) if seconds is not None else None,
+        "peak_memory": peak_memory,
+    }
+
+
+def _exceeds(name: str, layout: str, value, expected, tolerance: typing.Optional[float]) -> typing.List[str]:
+    if tolerance is None or value is None or expected is None:
+        return []
+    if value > expected * (1 + tolerance):
+        return [f"{layout}: {name} went from {expected} to {value}"]
+    return []
+
+
+def compare_to_baseline(baseline: dict, results: dict,
+                        expansion_tolerance: typing.Optional[float] = 0.0,
+                        time_tolerance: typing.Optional[float] = None,
+                        memory_tolerance: typing.Optional[float] = None,
+                        ) -> typing.List[str]:
+    """
+    Compares the results of benchmark_layout for each layout with the expected ones.
+    A tolerance of None skips that comparison, as does a value missing in the baseline.
+    :return: A description of each regression found. Doing better than the baseline isn't one.
+    """
+    regressions = []
+    for layout, result in results.items():
+        expected = baseline.get(layout)
+        if expected is None:
+            regressions.append(f"{layout}: not in the baseline")
+            continue
+
+        if result["outcome"] != expected["outcome"]:
+            regressions.append(f"{layout}: outcome went from {expected['outcome']} to {result['outcome']}")
+
+        regressions.extend(_exceeds("states expanded", layout, result["states_expanded"],
+                                    expected.get("states_expanded"), expansion_tolerance))
+        regressions.extend(_exceeds("seconds", layout, result["seconds"],
+                                    expected.get("seconds"), time_tolerance))
+        regressions.extend(_exceeds("peak memory", layout, result["peak_memory"],
+                                    expected.get("peak_memory"), memory_tolerance))
+
+    return regressions
+
+
+def benchmark_resolver_command_logic(args):
+    baseline_file: Path = args.baseline
+    baseline_data = json.loads(baseline_file.read_text())
+    max_expansions = baseline_data["max_expansions"]
+    baseline = baseline_data["layouts"]
+
+    layouts = args.layout or sorted(baseline)
+    results = {}
+    for layout in layouts:
+        result = benchmark_layout(baseline_file.parent.joinpath(layout), max_expansions,
+                                  args.repeat, not args.skip_memory)
+        results[layout] = result
+        print("{}: {outcome} after expanding {states_expanded} states, in {seconds:.3f} seconds "
+              "with a peak of {peak_memory} bytes".format(layout, **result))
+
+    if args.update_baseline:
+        for layout, result in results.items():
+            baseline.setdefault(layout, {}).update({key: value for key, value in result.items() if value is not None})
+        baseline_file.write_text(json.dumps(baseline_data, indent=4, sort_keys=True) + "\n")
+        print(f"Updated {baseline_file}")
+        return
+
+    regressions = compare_to_baseline(
+        baseline, results,
+        expansion_tolerance=args.expansion_tolerance,
+        time_tolerance=args.time_tolerance,
+        memory_tolerance=args.memory_tolerance,
+    )
+    if regressions:
+        print("Found {} regressions:".format(len(regressions)))
+        for regression in regressions:
+            print(f"* {regression}")
+        raise SystemExit(1)
+
+    print("No regressions found.")
+
+
+def _positive_int(value: str) -> int:
+    result = int(value)
+    if result < 1:
+        raise ArgumentTypeError(f"must be at least 1, got {result}")
+    return result
+
+
+def add_benchmark_resolver_command(sub_parsers):
+    parser: ArgumentParser = sub_parsers.add_parser(
+        "benchmark-resolver",
+        help="Validate a corpus of layouts, comparing the results with a baseline."
+    )
+
+    parser.add_argument(
+        "baseline",
+        type=Path,
+        help="The baseline JSON file. The layouts in it are relative to its directory.")
+    parser.add_argument(
+        "--layout",
+        action="append",
+        help="Only benchmark this layout of the baseline. Can be used multiple times.")
+    parser.add_argument(
+        "--repeat",
+        type=_positive_int,
+        default=3,
+        help="Validate each layout this many times, keeping the fastest time.")
+    parser.add_argument(
+        "--skip-memory",
+        action="store_true",
+        help="Don't measure the peak memory, which needs an extra, slower, validation.")
+    parser.add_argument(
+        "--expansion-tolerance",
+        type=float,
+        default=0.0,
+        help="How many more states, as a fraction of the baseline, can be expanded before it's a regression.")
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=None,
+        help="How much slower, as a fraction of the baseline, a layout can be before it's a regression. "
+             "Time isn't compared by default, as it depends on the machine.")
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.25,
+        help="How much more memory, as a fraction of the baseline, can be used before it's a regression.")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results to the baseline instead of comparing with it.")
+    parser.set_defaults(func=benchmark_resolver_command_logic)
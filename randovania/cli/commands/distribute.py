@@ -1,4 +1,6 @@
 import asyncio
+import contextlib
+import json
 import time
 from argparse import ArgumentParser
 from pathlib import Path
@@ -40,14 +42,34 @@ def distribute_command_logic(args):
     extra_args = {}
     if args.no_retry:
         extra_args["attempts"] = 0
+    if args.filler_processes is not None:
+        extra_args["filler_processes"] = args.filler_processes
+
+    with contextlib.ExitStack() as stack:
+        if args.parallel_attempts is not None:
+            from concurrent.futures import ProcessPoolExecutor
+            extra_args["attempt_executor"] = stack.enter_context(ProcessPoolExecutor(args.parallel_attempts))
+            extra_args["parallel_attempts"] = args.parallel_attempts
+
+        if args.profile_output is not None:
+            from randovania.lib import profiling_lib
+            profile = stack.enter_context(profiling_lib.profile())
+        else:
+            profile = None
+
+        before = time.perf_counter()
+        layout_description = asyncio.run(generator.generate_and_validate_description(
+            permalink=permalink, status_update=status_update,
+            validate_after_generation=args.validate,
+            timeout=None, **extra_args))
+        after = time.perf_counter()
 
-    before = time.perf_counter()
-    layout_description = asyncio.run(generator.generate_and_validate_description(permalink=permalink, status_update=status_update,
-                                                                                 validate_after_generation=args.validate,
-                                                                                 timeout=None, **extra_args))
-    after = time.perf_counter()
     print("Took {} seconds. Hash: {}".format(after - before, layout_description.shareable_hash))
 
+    if profile is not None:
+        with args.profile_output.open("w") as profile_file:
+            json.dump(profile.as_json, profile_file, indent=4)
+
     layout_description.save_to_file(args.output_file)
 
 
@@ -61,6 +83,14 @@ def add_distribute_command(sub_parsers):
     echoes_lib.add_validate_argument(parser)
     parser.add_argument("--no-retry", default=False, action="store_true", help="Disable retries in the generation.")
     parser.add_argument("--status-update", default=False, action="store_true", help="Print the status updates.")
+    parser.add_argument("--filler-processes", type=int,
+                        help="Use this many processes to weight the filler's actions. The result is the same.")
+    parser.add_argument("--parallel-attempts", type=int,
+                        help="Run this many generation attempts at the same time, each in its own process. "
+                             "The result is the same for any amount, but differs from not using this option "
+                             "when the first attempt fails. Each attempt uses its own filler processes.")
+    parser.add_argument("--profile-output", type=Path,
+                        help="Write the time spent in each phase of the generation, as JSON, to this file.")
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--permalink", type=str, help="The permalink to use")
@@ -1,34 +1,55 @@
 import asyncio
+import concurrent.futures
 import time
 from argparse import ArgumentParser
 from pathlib import Path
 
 from randovania.cli.echoes_lib import add_debug_argument
 from randovania.layout.layout_description import LayoutDescription
-from randovania.resolver import debug, resolver
+from randovania.resolver import debug, resolver, heuristics
+from randovania.resolver.exceptions import ExpansionBudgetExhausted
+from randovania.resolver.resolver_stats import ResolverStats
 
 
 def validate_command_logic(args):
     debug.set_level(args.debug)
 
     description = LayoutDescription.from_file(args.layout_file)
-
-    if description.permalink.player_count != 1:
-        raise ValueError(f"Validator does not support layouts with more than 1 player.")
-
-    configuration = description.permalink.presets[0].configuration
-    patches = description.all_patches[0]
+    stats = ResolverStats(max_expansions=args.max_expansions)
 
     before = time.perf_counter()
-    final_state_by_resolve = asyncio.run(resolver.resolve(
-        configuration=configuration,
-        patches=patches
-    ))
+    try:
+        if description.permalink.player_count == 1:
+            if args.processes is not None:
+                with concurrent.futures.ProcessPoolExecutor(args.processes) as executor:
+                    final_state_by_resolve = asyncio.run(resolver.resolve(
+                        configuration=description.permalink.presets[0].configuration,
+                        patches=description.all_patches[0],
+                        executor=executor,
+                        stats=stats,
+                    ))
+            else:
+                final_state_by_resolve = asyncio.run(resolver.resolve(
+                    configuration=description.permalink.presets[0].configuration,
+                    patches=description.all_patches[0],
+                    heuristic=args.heuristic,
+                    stats=stats,
+                ))
+        else:
+            final_state_by_resolve = asyncio.run(resolver.resolve_multiworld(
+                configurations={player: preset.configuration
+                                for player, preset in description.permalink.presets.items()},
+                all_patches=description.all_patches,
+                stats=stats,
+            ))
+        result = "possible" if final_state_by_resolve is not None else "impossible"
+    except ExpansionBudgetExhausted:
+        result = "unknown, as the expansion budget was reached"
     after = time.perf_counter()
-    print("Took {} seconds. Game is {}.".format(
-        after - before,
-        "possible" if final_state_by_resolve is not None else "impossible")
-    )
+
+    print("Took {} seconds. Game is {}.".format(after - before, result))
+    print("Expanded {states_expanded} states, calculated {reach_calculations} reaches, backtracked {backtracks} times, "
+          "reached a depth of {max_depth} and skipped {cache_hits} known states.".format(**stats.as_json))
 
 
 def add_validate_command(sub_parsers):
@@ -42,4 +63,22 @@ def add_validate_command(sub_parsers):
         "layout_file",
         type=Path,
         help="The layout seed log file to validate.")
+    search = parser.add_mutually_exclusive_group()
+    search.add_argument(
+        "--heuristic",
+        choices=sorted(heuristics.HEURISTICS),
+        default=None,
+        help="Use a best-first search with the given heuristic, instead of a depth-first search. "
+             "Multiworld games always use a depth-first search.")
+    search.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Explore the branches of the depth-first search in parallel, using this many processes. "
+             "Multiworld games are always validated in a single process.")
+    parser.add_argument(
+        "--max-expansions",
+        type=int,
+        default=None,
+        help="Give up after expanding this many states.")
     parser.set_defaults(func=validate_command_logic)
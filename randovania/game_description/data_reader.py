@@ -8,7 +8,7 @@ from randovania.game_description.game_description import GameDescription
 from randovania.game_description.world.node import GenericNode, DockNode, TeleporterNode, PickupNode, EventNode, Node, \
     TranslatorGateNode, LogbookNode, LoreType, NodeLocation, PlayerShipNode
 from randovania.game_description.requirements import ResourceRequirement, Requirement, \
-    RequirementOr, RequirementAnd, RequirementTemplate
+    RequirementOr, RequirementAnd, RequirementTemplate, resolve_templates
 from randovania.game_description.resources.damage_resource_info import DamageReduction
 from randovania.game_description.resources.item_resource_info import ItemResourceInfo
 from randovania.game_description.resources.pickup_index import PickupIndex
@@ -341,6 +341,7 @@ def read_resource_database(game: RandovaniaGame, data: Dict) -> ResourceDatabase
     )
     db.requirement_template.update(read_requirement_templates(data["requirement_template"], db))
     db.damage_reductions.update(read_resource_reductions_dict(data["damage_reductions"], db))
+    resolve_templates(db.requirement_template.values(), db)
     return db
 
 
@@ -364,7 +365,7 @@ def decode_data_with_world_reader(data: Dict) -> Tuple[WorldReader, GameDescript
     starting_location = AreaLocation.from_json(data["starting_location"])
     initial_states = read_initial_states(data["initial_states"], resource_database)
 
-    return world_reader, GameDescription(
+    game_description = GameDescription(
         game=game,
         resource_database=resource_database,
         dock_weakness_database=dock_weakness_database,
@@ -373,6 +374,8 @@ def decode_data_with_world_reader(data: Dict) -> Tuple[WorldReader, GameDescript
         starting_location=starting_location,
         initial_states=initial_states,
     )
+    game_description.resolve_requirement_templates()
+    return world_reader, game_description
 
 
 def decode_data(data: Dict) -> GameDescription:
@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+import randovania
+from randovania.game_description.game_description import GameDescription
+from randovania.games.game import RandovaniaGame
+
+# Increase whenever a change to the game description classes makes previously pickled files unusable.
+CACHE_FORMAT_VERSION = 2
+
+
+@functools.lru_cache()
+def _code_hash(package_root: Path) -> str:
+    """
+    Hash of the modules whose classes end up in the pickled files, so development builds that don't bump the
+    version still discard caches from before a class changed. Frozen builds ship no sources, and rely on the version.
+    """
+    sha = hashlib.sha256()
+    paths = sorted(package_root.joinpath("game_description").rglob("*.py"))
+    paths.append(package_root.joinpath("games", "game.py"))
+    for path in paths:
+        try:
+            contents = path.read_bytes()
+        except OSError:
+            continue
+        sha.update(path.relative_to(package_root).as_posix().encode("utf-8"))
+        sha.update(contents)
+    return sha.hexdigest()
+
+
+def _source_hash(source_path: Path) -> str:
+    code_hash = _code_hash(Path(randovania.__file__).parent)
+    sha = hashlib.sha256()
+    sha.update(f"{CACHE_FORMAT_VERSION}:{randovania.VERSION}:{code_hash}:".encode("utf-8"))
+    sha.update(source_path.read_bytes())
+    return sha.hexdigest()
+
+
+def cache_file_for(cache_path: Path, game: RandovaniaGame, source_path: Path) -> Path:
+    return cache_path.joinpath(f"{game.value}-{_source_hash(source_path)}.pickle")
+
+
+def read_cache(cache_file: Path) -> Optional[GameDescription]:
+    try:
+        with cache_file.open("rb") as open_file:
+            result = pickle.load(open_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning("Unable to load cached game description at %s: %s", cache_file, e)
+        return None
+
+    if not isinstance(result, GameDescription):
+        logging.warning("Cached game description at %s has unexpected type %s", cache_file, type(result))
+        return None
+
+    return result
+
+
+def write_cache(cache_file: Path, game_description: GameDescription):
+    """
+    Writes the given GameDescription to cache_file, replacing any outdated cache for the same game.
+    The file is written to a temporary name first, so concurrent processes never read a partial file.
+    Failing to write is logged and otherwise ignored.
+    """
+    temp_path = None
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as open_file:
+            pickle.dump(game_description, open_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_file)
+        temp_path = None
+
+        game_prefix = cache_file.name.split("-")[0]
+        for outdated in cache_file.parent.glob(f"{game_prefix}-*.pickle"):
+            if outdated != cache_file:
+                outdated.unlink()
+
+    except OSError as e:
+        logging.warning("Unable to write game description cache at %s: %s", cache_file, e)
+
+    finally:
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def load_game_description(game: RandovaniaGame, cache_path: Optional[Path], source_path: Path,
+                          decode: Callable[[], GameDescription]) -> GameDescription:
+    """
+    Loads the GameDescription for the given game from the cache in cache_path, if one exists for the current
+    contents of source_path. Otherwise, uses decode and saves the result in the cache.
+    :param game:
+    :param cache_path: Directory with the cached files. When None, the cache is not used.
+    :param source_path: The data file the game description is decoded from.
+    :param decode: Creates the GameDescription from source_path.
+    :return:
+    """
+    if cache_path is None:
+        return decode()
+
+    cache_file = cache_file_for(cache_path, game, source_path)
+    result = read_cache(cache_file)
+    if result is None:
+        result = decode()
+        write_cache(cache_file, result)
+
+    return result
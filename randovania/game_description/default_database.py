@@ -2,8 +2,8 @@ import functools
 import json
 from pathlib import Path
 
-from randovania import get_data_path
-from randovania.game_description import data_reader
+from randovania import get_data_path, get_game_description_cache_path
+from randovania.game_description import data_reader, database_cache
 from randovania.game_description.data_reader import read_resource_database
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.item import item_database
@@ -23,11 +23,14 @@ def resource_database_for(game: RandovaniaGame) -> ResourceDatabase:
 
 @functools.lru_cache()
 def game_description_for(game: RandovaniaGame) -> GameDescription:
-    """
-
-    :rtype: object
-    """
-    return data_reader.decode_data(default_data.read_json_then_binary(game)[1])
+    result = database_cache.load_game_description(
+        game,
+        get_game_description_cache_path(),
+        default_data.data_file_path(game),
+        lambda: data_reader.decode_data(default_data.read_json_then_binary(game)[1]),
+    )
+    result.precompute_requirement_sets()
+    return result
 
 
 def _read_database_in_path(path: Path) -> item_database.ItemDatabase:
@@ -1,10 +1,11 @@
 """Classes that describes the raw data of a game world."""
 import copy
+import itertools
 import typing
 from typing import Iterator, FrozenSet, Dict, Optional, List
 
 from randovania.game_description.game_patches import GamePatches
-from randovania.game_description.requirements import SatisfiableRequirements, Requirement
+from randovania.game_description.requirements import SatisfiableRequirements, Requirement, resolve_templates
 from randovania.game_description.resources.resource_database import ResourceDatabase
 from randovania.game_description.resources.resource_info import ResourceInfo, ResourceGainTuple, CurrentResources
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
@@ -86,6 +87,37 @@ class GameDescription:
 
         self.world_list.patch_requirements(resources, damage_multiplier, self.resource_database)
         self._dangerous_resources = None
+        self.precompute_requirement_sets()
+
+    def precompute_requirement_sets(self) -> None:
+        """
+        Expands the requirements of all connections and dock weaknesses with `as_set`.
+        The results are memoised by each requirement, making later calls lookups.
+        """
+        for area in self.world_list.all_areas:
+            for connections in area.connections.values():
+                for requirement in connections.values():
+                    requirement.as_set(self.resource_database)
+
+        for list_by_type in self.dock_weakness_database:
+            for dock_weakness in typing.cast(List[DockWeakness], list_by_type):
+                dock_weakness.requirement.as_set(self.resource_database)
+
+    def resolve_requirement_templates(self) -> None:
+        """
+        Resolves the templates used by all connections, dock weaknesses and the victory condition with
+        the current resource database, so evaluating them never looks up a template by name.
+        """
+        resolve_templates(itertools.chain(
+            (requirement
+             for area in self.world_list.all_areas
+             for connections in area.connections.values()
+             for requirement in connections.values()),
+            (dock_weakness.requirement
+             for list_by_type in self.dock_weakness_database
+             for dock_weakness in typing.cast(List[DockWeakness], list_by_type)),
+            [self.victory_condition],
+        ), self.resource_database)
 
     def create_game_patches(self) -> GamePatches:
         elevator_connection: Dict[Teleporter, AreaLocation] = {
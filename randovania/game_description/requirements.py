@@ -1,15 +1,105 @@
 import dataclasses
 from functools import lru_cache
-from math import ceil
-from typing import Optional, Iterable, FrozenSet, Iterator, Tuple, List, Type, Union
+from math import ceil, inf
+from typing import Optional, Iterable, FrozenSet, Iterator, Tuple, List, Type, Union, Callable
 
 from randovania.game_description.resources.resource_database import ResourceDatabase
-from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources
+from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources, ResourceVector, \
+    resource_slot
 from randovania.game_description.resources.resource_type import ResourceType
 
 MAX_DAMAGE = 9999999
 
 
+class CompiledRequirement:
+    """
+    A flattened form of a requirement, checked against a ResourceVector instead of walking the requirement tree.
+    Satisfied when all slot checks, all of `others` and at least one of each group in `any_of` are satisfied.
+    Damage requirements and templates are kept in `others`, as these depend on the ResourceDatabase.
+    """
+    __slots__ = ("slots", "others", "any_of", "max_slot")
+
+    slots: Tuple[Tuple[int, int, bool], ...]
+    others: Tuple["Requirement", ...]
+    any_of: Tuple[Tuple["CompiledRequirement", ...], ...]
+    max_slot: int
+
+    def __init__(self,
+                 slots: Iterable[Tuple[int, int, bool]],
+                 others: Iterable["Requirement"],
+                 any_of: Iterable[Tuple["CompiledRequirement", ...]]):
+        self.slots = tuple(slots)
+        self.others = tuple(others)
+        self.any_of = tuple(any_of)
+        self.max_slot = max([slot for slot, _, _ in self.slots]
+                            + [alternative.max_slot for group in self.any_of for alternative in group],
+                            default=-1)
+
+    @classmethod
+    def all_of(cls, items: Iterable["CompiledRequirement"]) -> "CompiledRequirement":
+        slots = []
+        others = []
+        any_of = []
+        for item in items:
+            slots.extend(item.slots)
+            others.extend(item.others)
+            any_of.extend(item.any_of)
+        return cls(slots, others, any_of)
+
+    def satisfied(self, vector: ResourceVector, current_resources: CurrentResources, current_energy: int,
+                  database: ResourceDatabase) -> bool:
+        """
+        Same as Requirement.satisfied, given a ResourceVector with the same contents as current_resources.
+        :param vector: Created with `convert_resources_to_vector(current_resources)`
+        :param current_resources:
+        :param current_energy:
+        :param database:
+        :return:
+        """
+        if self.max_slot >= len(vector):
+            # Slots allocated after the vector was created belong to resources that weren't in it
+            vector.extend([0] * (self.max_slot + 1 - len(vector)))
+
+        for slot, amount, negate in self.slots:
+            if (vector[slot] >= amount) == negate:
+                return False
+
+        for requirement in self.others:
+            if not requirement.satisfied(current_resources, current_energy, database):
+                return False
+
+        for alternatives in self.any_of:
+            for alternative in alternatives:
+                if alternative.satisfied(vector, current_resources, current_energy, database):
+                    break
+            else:
+                return False
+
+        return True
+
+
+def _without_process_caches(state: dict) -> dict:
+    # Hashes of resources and the slots of compiled requirements are only valid in the process that calculated them,
+    # and the caches tied to a database would copy the whole database along
+    return {key: value for key, value in state.items()
+            if key not in ("_cached_hash", "_compiled", "_as_set_cache", "_resolved")}
+
+
+def _memoised_as_set(requirement: "Requirement", database: ResourceDatabase,
+                     calculate: Callable[[], "RequirementSet"]) -> "RequirementSet":
+    """
+    Requirements are immutable, so the expansion only changes with the database used for templates.
+    The result for the last database used is kept in the requirement.
+    """
+    cache = requirement._as_set_cache
+    if cache is not None and cache[0] is database:
+        return cache[1]
+
+    result = calculate()
+    requirement._as_set_cache = (database, result)
+    return result
+
+
 class Requirement:
     def damage(self, current_resources: CurrentResources, database: ResourceDatabase) -> int:
         raise NotImplementedError()
@@ -17,6 +107,17 @@ class Requirement:
     def satisfied(self, current_resources: CurrentResources, current_energy: int, database: ResourceDatabase) -> bool:
         raise NotImplementedError()
 
+    def threshold_and_damage(self, current_resources: CurrentResources,
+                             database: ResourceDatabase) -> Tuple[float, int]:
+        """
+        Calculates both `satisfied` and `damage` in a single pass over the requirement, for the given resources.
+        :param current_resources:
+        :param database:
+        :return: A threshold, such that `satisfied` is True exactly when the energy is above it,
+        and the same value as `damage`.
+        """
+        raise NotImplementedError()
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float,
                            database: ResourceDatabase) -> "Requirement":
         """
@@ -42,6 +143,13 @@ class Requirement:
     def as_set(self, database: ResourceDatabase) -> "RequirementSet":
         raise NotImplementedError()
 
+    def compiled(self) -> CompiledRequirement:
+        """
+        Creates a CompiledRequirement equivalent to this requirement.
+        Requirements that can't be compiled are checked as a whole with `satisfied`.
+        """
+        return CompiledRequirement((), (self,), ())
+
     @classmethod
     @lru_cache()
     def trivial(cls) -> "Requirement":
@@ -64,18 +172,17 @@ class Requirement:
 class RequirementAnd(Requirement):
     items: Tuple[Requirement, ...]
     _cached_hash = None
+    _compiled: Optional[CompiledRequirement] = None
+    _as_set_cache: Optional[Tuple[ResourceDatabase, "RequirementSet"]] = None
+
+    def __getstate__(self):
+        return _without_process_caches(self.__dict__)
 
     def __init__(self, items: Iterable[Requirement]):
         self.items = tuple(items)
 
     def damage(self, current_resources: CurrentResources, database: ResourceDatabase) -> int:
-        result = 0
-        for item in self.items:
-            if item.satisfied(current_resources, MAX_DAMAGE, database):
-                result += item.damage(current_resources, database)
-            else:
-                return MAX_DAMAGE
-        return result
+        return self.threshold_and_damage(current_resources, database)[1]
 
     def satisfied(self, current_resources: CurrentResources, current_energy: int, database: ResourceDatabase) -> bool:
         return all(
@@ -83,6 +190,19 @@ class RequirementAnd(Requirement):
             for item in self.items
         )
 
+    def threshold_and_damage(self, current_resources: CurrentResources,
+                             database: ResourceDatabase) -> Tuple[float, int]:
+        threshold = -inf
+        result = 0
+        for item in self.items:
+            item_threshold, item_damage = item.threshold_and_damage(current_resources, database)
+            threshold = max(threshold, item_threshold)
+            result += item_damage
+
+        if threshold >= MAX_DAMAGE:
+            return threshold, MAX_DAMAGE
+        return threshold, result
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float,
                            database: ResourceDatabase) -> Requirement:
         return RequirementAnd(
@@ -100,11 +220,36 @@ class RequirementAnd(Requirement):
         return RequirementAnd(new_items)
 
     def as_set(self, database: ResourceDatabase) -> "RequirementSet":
-        result = RequirementSet.trivial()
+        return _memoised_as_set(self, database, lambda: self._calculate_as_set(database))
+
+    def _calculate_as_set(self, database: ResourceDatabase) -> "RequirementSet":
+        # Items with exactly one alternative are all merged in the same list,
+        # so only items with multiple alternatives need a union.
+        common_items = []
+        multiple_alternatives = []
         for item in self.items:
-            result = result.union(item.as_set(database))
+            if isinstance(item, ResourceRequirement):
+                common_items.append(item)
+                continue
+
+            item_set = item.as_set(database)
+            if not item_set.alternatives:
+                return RequirementSet.impossible()
+            elif len(item_set.alternatives) == 1:
+                common_items.extend(next(iter(item_set.alternatives)).items)
+            else:
+                multiple_alternatives.append(item_set)
+
+        result = RequirementSet([RequirementList(common_items)])
+        for item_set in multiple_alternatives:
+            result = result.union(item_set)
         return result
 
+    def compiled(self) -> CompiledRequirement:
+        if self._compiled is None:
+            self._compiled = CompiledRequirement.all_of(item.compiled() for item in self.items)
+        return self._compiled
+
     @property
     def sorted(self) -> Tuple[Requirement]:
         return tuple(sorted(self.items))
@@ -135,19 +280,17 @@ class RequirementAnd(Requirement):
 class RequirementOr(Requirement):
     items: Tuple[Requirement, ...]
     _cached_hash = None
+    _compiled: Optional[CompiledRequirement] = None
+    _as_set_cache: Optional[Tuple[ResourceDatabase, "RequirementSet"]] = None
+
+    def __getstate__(self):
+        return _without_process_caches(self.__dict__)
 
     def __init__(self, items: Iterable[Requirement]):
         self.items = tuple(items)
 
     def damage(self, current_resources: CurrentResources, database: ResourceDatabase) -> int:
-        try:
-            return min(
-                item.damage(current_resources, database)
-                for item in self.items
-                if item.satisfied(current_resources, MAX_DAMAGE, database)
-            )
-        except ValueError:
-            return MAX_DAMAGE
+        return self.threshold_and_damage(current_resources, database)[1]
 
     def satisfied(self, current_resources: CurrentResources, current_energy: int, database: ResourceDatabase) -> bool:
         return any(
@@ -155,6 +298,17 @@ class RequirementOr(Requirement):
             for item in self.items
         )
 
+    def threshold_and_damage(self, current_resources: CurrentResources,
+                             database: ResourceDatabase) -> Tuple[float, int]:
+        threshold = inf
+        result = None
+        for item in self.items:
+            item_threshold, item_damage = item.threshold_and_damage(current_resources, database)
+            threshold = min(threshold, item_threshold)
+            if item_threshold < MAX_DAMAGE and (result is None or item_damage < result):
+                result = item_damage
+        return threshold, (result if result is not None else MAX_DAMAGE)
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float,
                            database: ResourceDatabase) -> Requirement:
         return RequirementOr(
@@ -208,11 +362,22 @@ class RequirementOr(Requirement):
         return RequirementOr(final_items)
 
     def as_set(self, database: ResourceDatabase) -> "RequirementSet":
+        return _memoised_as_set(self, database, lambda: self._calculate_as_set(database))
+
+    def _calculate_as_set(self, database: ResourceDatabase) -> "RequirementSet":
         alternatives = set()
         for item in self.items:
             alternatives |= item.as_set(database).alternatives
         return RequirementSet(alternatives)
 
+    def compiled(self) -> CompiledRequirement:
+        if self._compiled is None:
+            if len(self.items) == 1:
+                self._compiled = self.items[0].compiled()
+            else:
+                self._compiled = CompiledRequirement((), (), [tuple(item.compiled() for item in self.items)])
+        return self._compiled
+
     @property
     def sorted(self) -> Tuple[Requirement]:
         return tuple(sorted(self.items))
@@ -301,6 +466,17 @@ class ResourceRequirement(Requirement):
         else:
             return has_amount
 
+    def threshold_and_damage(self, current_resources: CurrentResources,
+                             database: ResourceDatabase) -> Tuple[float, int]:
+        if self.is_damage:
+            damage = self.damage(current_resources, database)
+            return damage, damage
+
+        if self.satisfied(current_resources, 0, database):
+            return -inf, 0
+        else:
+            return inf, 0
+
     def simplify(self) -> Requirement:
         return self
 
@@ -356,15 +532,33 @@ class ResourceRequirement(Requirement):
     def iterate_resource_requirements(self, database: ResourceDatabase):
         yield self
 
+    def compiled(self) -> CompiledRequirement:
+        if self.is_damage:
+            return super().compiled()
+        return CompiledRequirement([(resource_slot(self.resource), self.amount, self.negate)], (), ())
+
 
 class RequirementTemplate(Requirement):
     template_name: str
+    _as_set_cache: Optional[Tuple[ResourceDatabase, "RequirementSet"]] = None
+    _resolved: Optional[Tuple[ResourceDatabase, Requirement]] = None
+
+    def __getstate__(self):
+        return _without_process_caches(self.__dict__)
 
     def __init__(self, template_name: str):
         self.template_name = template_name
 
     def template_requirement(self, database: ResourceDatabase) -> Requirement:
-        return database.requirement_template[self.template_name]
+        """
+        The requirement this template stands for in the given database.
+        The requirement for the last database used is kept, so evaluating a template doesn't look it up by name.
+        """
+        resolved = self._resolved
+        if resolved is None or resolved[0] is not database:
+            resolved = (database, database.requirement_template[self.template_name])
+            self._resolved = resolved
+        return resolved[1]
 
     def damage(self, current_resources: CurrentResources, database: ResourceDatabase) -> int:
         return self.template_requirement(database).damage(current_resources, database)
@@ -372,6 +566,10 @@ class RequirementTemplate(Requirement):
     def satisfied(self, current_resources: CurrentResources, current_energy: int, database: ResourceDatabase) -> bool:
         return self.template_requirement(database).satisfied(current_resources, current_energy, database)
 
+    def threshold_and_damage(self, current_resources: CurrentResources,
+                             database: ResourceDatabase) -> Tuple[float, int]:
+        return self.template_requirement(database).threshold_and_damage(current_resources, database)
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float,
                            database: ResourceDatabase) -> Requirement:
         return self.template_requirement(database).patch_requirements(static_resources, damage_multiplier, database)
@@ -380,7 +578,7 @@ class RequirementTemplate(Requirement):
         return self
 
     def as_set(self, database: ResourceDatabase) -> "RequirementSet":
-        return self.template_requirement(database).as_set(database)
+        return _memoised_as_set(self, database, lambda: self.template_requirement(database).as_set(database))
 
     def __eq__(self, other):
         return isinstance(other, RequirementTemplate) and self.template_name == other.template_name
@@ -395,13 +593,39 @@ class RequirementTemplate(Requirement):
         yield from self.template_requirement(database).iterate_resource_requirements(database)
 
 
+def resolve_templates(requirements: Iterable[Requirement], database: ResourceDatabase) -> None:
+    """
+    Resolves ahead of time all RequirementTemplate in the given requirements, including the ones nested in
+    other templates, with the given database.
+    The templates are kept with their names, for displaying and writing them.
+    :param requirements:
+    :param database:
+    """
+    pending = list(requirements)
+    visited_names = set()
+    while pending:
+        requirement = pending.pop()
+        if isinstance(requirement, (RequirementAnd, RequirementOr)):
+            pending.extend(requirement.items)
+
+        elif isinstance(requirement, RequirementTemplate):
+            template_requirement = requirement.template_requirement(database)
+            if requirement.template_name not in visited_names:
+                visited_names.add(requirement.template_name)
+                pending.append(template_requirement)
+
+
 class RequirementList:
     items: FrozenSet[ResourceRequirement]
     _cached_hash: Optional[int] = None
+    _compiled: Optional[CompiledRequirement] = None
 
     def __deepcopy__(self, memodict):
         return self
 
+    def __getstate__(self):
+        return _without_process_caches(self.__dict__)
+
     def __init__(self, items: Iterable[ResourceRequirement]):
         self.items = frozenset(items)
 
@@ -449,6 +673,14 @@ class RequirementList:
                 return False
         return True
 
+    def compiled(self) -> CompiledRequirement:
+        """
+        Creates a CompiledRequirement that is satisfied in the same situations as this list.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledRequirement.all_of(item.compiled() for item in self.values())
+        return self._compiled
+
     def get(self, resource: ResourceInfo) -> Optional[ResourceRequirement]:
         """
         Gets an IndividualRequirement that uses the given resource
@@ -484,6 +716,11 @@ class RequirementSet:
     """
     alternatives: FrozenSet[RequirementList]
     _cached_hash: Optional[int] = None
+    _compiled: Optional[CompiledRequirement] = None
+    _dependencies: Optional[Tuple[FrozenSet[ResourceInfo], bool]] = None
+
+    def __getstate__(self):
+        return _without_process_caches(self.__dict__)
 
     def __init__(self, alternatives: Iterable[RequirementList]):
         """
@@ -552,6 +789,15 @@ class RequirementSet:
             requirement_list.satisfied(current_resources, current_energy, database)
             for requirement_list in self.alternatives)
 
+    def compiled(self) -> CompiledRequirement:
+        """
+        Creates a CompiledRequirement that is satisfied in the same situations as this set.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledRequirement((), (), [tuple(alternative.compiled()
+                                                                for alternative in self.alternatives)])
+        return self._compiled
+
     def union(self, other: "RequirementSet") -> "RequirementSet":
         """Create a new RequirementSet that is only satisfied when both are satisfied"""
         return RequirementSet(
@@ -582,6 +828,21 @@ class RequirementSet:
             for individual in alternative.values():
                 yield individual
 
+    def dependencies(self) -> Tuple[FrozenSet[ResourceInfo], bool]:
+        """
+        What `satisfied` depends on: the resources involved, and if it also depends on the energy.
+        Unless one of these changes, `satisfied` keeps giving the same result. When it depends on the energy,
+        it also depends on the resources that reduce damage, which aren't included.
+        """
+        if self._dependencies is None:
+            resources = set()
+            uses_energy = False
+            for individual in self.all_individual:
+                resources.add(individual.resource)
+                uses_energy = uses_energy or individual.is_damage
+            self._dependencies = frozenset(resources), uses_energy
+        return self._dependencies
+
     def patch_requirements(self, resources: CurrentResources, database: ResourceDatabase) -> "RequirementSet":
         return RequirementOr(
             RequirementAnd(
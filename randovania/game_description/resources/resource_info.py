@@ -1,4 +1,5 @@
-from typing import Union, Tuple, Iterator, Dict
+import threading
+from typing import Union, Tuple, Iterator, Dict, List
 
 from randovania.game_description.resources.item_resource_info import ItemResourceInfo
 from randovania.game_description.resources.logbook_asset import LogbookAsset
@@ -13,6 +14,10 @@ ResourceQuantity = Tuple[ResourceInfo, int]
 ResourceGainTuple = Tuple[ResourceQuantity, ...]
 ResourceGain = Iterator[ResourceQuantity]
 CurrentResources = Dict[ResourceInfo, int]
+ResourceVector = List[int]
+
+_resource_slots: Dict[ResourceInfo, int] = {}
+_resource_slots_lock = threading.Lock()
 
 
 def add_resource_gain_to_current_resources(resource_gain: ResourceGain,
@@ -42,3 +47,31 @@ def convert_resource_gain_to_current_resources(resource_gain: ResourceGain) -> C
     result = {}
     add_resource_gain_to_current_resources(resource_gain, result)
     return result
+
+
+def resource_slot(resource: ResourceInfo) -> int:
+    """
+    Gets the position of the given resource in a ResourceVector.
+    Slots are allocated on first use and are shared by all games.
+    :param resource:
+    :return:
+    """
+    slot = _resource_slots.get(resource)
+    if slot is None:
+        with _resource_slots_lock:
+            slot = _resource_slots.setdefault(resource, len(_resource_slots))
+    return slot
+
+
+def convert_resources_to_vector(resources: CurrentResources) -> ResourceVector:
+    """
+    Creates a ResourceVector, a list indexed by resource_slot, with a snapshot of the given CurrentResources.
+    Changes to the CurrentResources made afterwards aren't reflected in the vector.
+    :param resources:
+    :return:
+    """
+    slots = [resource_slot(resource) for resource in resources.keys()]
+    vector = [0] * len(_resource_slots)
+    for slot, quantity in zip(slots, resources.values()):
+        vector[slot] = quantity
+    return vector
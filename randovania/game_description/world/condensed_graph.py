@@ -0,0 +1,107 @@
+from collections import deque
+from typing import Dict, Tuple, Iterable
+
+from randovania.game_description.requirements import Requirement
+from randovania.game_description.world.area import Area
+from randovania.game_description.world.node import Node
+
+
+def _can_be_grouped(node: Node) -> bool:
+    # Resource nodes must be visited on their own to be collected, and might have a requirement to leave them.
+    # Nodes that heal change the energy available in the nodes after them.
+    return not node.is_resource_node and not node.heal
+
+
+class CondensedGraph:
+    """
+    Groups the nodes of each area that are connected to each other with trivial requirements, in both directions.
+    Reaching any node of a group means all nodes of that group are reachable with the same energy, so a reach
+    can visit the whole group at once instead of checking the connections inside it one at a time.
+    Connections between areas depend on the patches and are never part of a group.
+    """
+    _groups: Dict[Node, Tuple[Node, ...]]
+    _internal: Dict[Node, Tuple[Node, ...]]
+    _paths: Dict[Node, Dict[Node, Tuple[Node, ...]]]
+
+    def __init__(self, areas: Iterable[Area]):
+        self._groups = {}
+        self._internal = {}
+        self._paths = {}
+
+        trivial = Requirement.trivial()
+        for area in areas:
+            parent = {}
+
+            def find(node: Node) -> Node:
+                while parent[node] is not node:
+                    parent[node] = parent[parent[node]]
+                    node = parent[node]
+                return node
+
+            for node in area.nodes:
+                if _can_be_grouped(node):
+                    parent[node] = node
+
+            for source, connections in area.connections.items():
+                if source not in parent:
+                    continue
+                for target, requirement in connections.items():
+                    if (target in parent and requirement == trivial
+                            and area.connections.get(target, {}).get(source) == trivial):
+                        parent[find(source)] = find(target)
+
+            members_by_root: Dict[Node, list] = {}
+            for node in area.nodes:
+                if node in parent:
+                    members_by_root.setdefault(find(node), []).append(node)
+
+            for members in members_by_root.values():
+                if len(members) < 2:
+                    continue
+                group = tuple(members)
+                for node in group:
+                    self._groups[node] = group
+                    self._internal[node] = tuple(
+                        target
+                        for target, requirement in area.connections.get(node, {}).items()
+                        if target in group and requirement == trivial
+                    )
+
+    def group_of(self, node: Node) -> Tuple[Node, ...]:
+        """
+        All nodes in the same group as the given node, including itself.
+        """
+        return self._groups.get(node, (node,))
+
+    def is_internal(self, source: Node, target: Node) -> bool:
+        """
+        If going from source to target is a trivial connection inside a group.
+        These connections are implied by the group, and don't need to be checked by reaches.
+        """
+        internal = self._internal.get(source)
+        return internal is not None and target in internal
+
+    def internal_connections(self, node: Node) -> Tuple[Node, ...]:
+        """
+        All nodes in the same group that can be reached directly from the given node.
+        """
+        return self._internal.get(node, ())
+
+    def path_inside_group(self, source: Node, target: Node) -> Tuple[Node, ...]:
+        """
+        The nodes visited when going from source to target using only connections inside their group,
+        starting with source and not including target.
+        """
+        paths = self._paths.get(source)
+        if paths is None:
+            paths = {source: ()}
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                for next_node in self._internal.get(node, ()):
+                    if next_node not in paths:
+                        paths[next_node] = paths[node] + (node,)
+                        queue.append(next_node)
+            self._paths[source] = paths
+
+        return paths[target]
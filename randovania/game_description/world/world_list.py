@@ -1,6 +1,6 @@
 import copy
 import re
-from typing import List, Dict, Iterator, Tuple, Iterable
+from typing import List, Dict, Iterator, Tuple, Iterable, Optional
 
 from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.requirements import Requirement, RequirementAnd
@@ -9,6 +9,7 @@ from randovania.game_description.resources.resource_database import ResourceData
 from randovania.game_description.resources.resource_info import CurrentResources
 from randovania.game_description.world.area import Area
 from randovania.game_description.world.area_location import AreaLocation
+from randovania.game_description.world.condensed_graph import CondensedGraph
 from randovania.game_description.world.dock import DockConnection, DockLockType
 from randovania.game_description.world.node import Node, DockNode, TeleporterNode, PickupNode, PlayerShipNode
 from randovania.game_description.world.teleporter import Teleporter
@@ -23,6 +24,7 @@ class WorldList:
     _ids_to_area: Dict[AreaLocation, Area]
     _nodes: Tuple[Node, ...]
     _pickup_index_to_node: Dict[PickupIndex, PickupNode]
+    _condensed_graph: Optional[CondensedGraph] = None
 
     def __deepcopy__(self, memodict):
         return WorldList(
@@ -41,6 +43,7 @@ class WorldList:
             for node in self._nodes
             if isinstance(node, PickupNode)
         }
+        self._condensed_graph = None
 
     def _iterate_over_nodes(self) -> Iterator[Node]:
         for world in self.worlds:
@@ -73,6 +76,16 @@ class WorldList:
     def all_nodes(self) -> Tuple[Node, ...]:
         return self._nodes
 
+    @property
+    def condensed_graph(self) -> CondensedGraph:
+        """
+        The nodes of each area grouped by trivial connections. Calculated when first used, and again after
+        the connections are patched.
+        """
+        if self._condensed_graph is None:
+            self._condensed_graph = CondensedGraph(self.all_areas)
+        return self._condensed_graph
+
     @property
     def num_pickup_nodes(self) -> int:
         return sum(1 for node in self.all_nodes if isinstance(node, PickupNode))
@@ -245,6 +258,7 @@ class WorldList:
                     for target, value in connections.items():
                         connections[target] = value.patch_requirements(
                             static_resources, damage_multiplier, database).simplify()
+        self._condensed_graph = None
 
     def teleporter_to_node(self, teleporter: Teleporter) -> TeleporterNode:
         area = self.area_by_area_location(teleporter.area_location)
@@ -278,6 +292,7 @@ class WorldList:
     def add_new_node(self, area: Area, node: Node):
         self._nodes_to_area[node] = area
         self._nodes_to_world[node] = self.world_with_area(area)
+        self._condensed_graph = None
 
 
 def _calculate_nodes_to_area_world(worlds: Iterable[World]):
@@ -0,0 +1,246 @@
+import collections
+import copy
+from typing import Dict, List, Set, Tuple
+
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.requirements import Requirement, RequirementAnd, RequirementSet
+from randovania.game_description.resources.pickup_entry import PickupEntry
+from randovania.game_description.resources.resource_info import CurrentResources, \
+    add_resource_gain_to_current_resources
+from randovania.game_description.world.node import Node, PickupNode, PlayerShipNode, ResourceNode
+from randovania.generator.filler.filler_library import UnableToGenerate
+from randovania.generator.filler.runner import PlayerPool
+from randovania.resolver import bootstrap
+
+
+class RelaxedReach:
+    """
+    Everything that can be reached when all pickups of the pool are collected from the start and requirements
+    are optimistic: damage is ignored, and so are resources that must be missing.
+    Having more resources never makes something unreachable in this model, so it's an upper bound of what
+    any placement of the pickups can reach, while being cheap enough to calculate before the filler runs.
+    """
+    game: GameDescription
+    patches: GamePatches
+    resources: CurrentResources
+    nodes: Set[Node]
+    _blocked_edges: List[Tuple[Node, RequirementSet]]
+
+    def __init__(self, game: GameDescription, patches: GamePatches, resources: CurrentResources):
+        self.game = game
+        self.patches = patches
+        self.resources = resources
+        self.nodes = set()
+        self._blocked_edges = []
+
+    def copy(self) -> "RelaxedReach":
+        result = RelaxedReach(self.game, self.patches, copy.copy(self.resources))
+        result.nodes = set(self.nodes)
+        result._blocked_edges = list(self._blocked_edges)
+        return result
+
+    def _satisfied(self, requirement: RequirementSet) -> bool:
+        return any(
+            all(individual.negate or individual.is_damage
+                or self.resources.get(individual.resource, 0) >= individual.amount
+                for individual in alternative.values())
+            for alternative in requirement.alternatives
+        )
+
+    def victory_condition_satisfied(self) -> bool:
+        return self._satisfied(self.game.victory_condition.as_set(self.game.resource_database))
+
+    def _visit(self, node: Node) -> Tuple[List[Node], bool]:
+        """
+        Adds the given node to the reach, collecting it if it's a resource node.
+        :return: The nodes that can be reached from it and if any resource changed.
+        """
+        database = self.game.resource_database
+        self.nodes.add(node)
+
+        changed = False
+        if node.is_resource_node:
+            changed = self._collect(node)
+
+        requirement_to_leave = node.requirement_to_leave(self.patches, self.resources)
+        new_nodes = []
+        for target_node, requirement in self.game.world_list.potential_nodes_from(node, self.patches):
+            if target_node is None or target_node in self.nodes:
+                continue
+            if requirement_to_leave != Requirement.trivial():
+                requirement = RequirementAnd([requirement, requirement_to_leave])
+            requirement_set = requirement.as_set(database)
+            if self._satisfied(requirement_set):
+                new_nodes.append(target_node)
+            else:
+                self._blocked_edges.append((target_node, requirement_set))
+
+        return new_nodes, changed
+
+    def _collect(self, node: ResourceNode) -> bool:
+        if isinstance(node, PlayerShipNode):
+            # Which ships can be used depends on the resources, so be optimistic and allow all of them
+            gain = [(other.resource(), 1) for other in self.game.world_list.all_nodes
+                    if isinstance(other, PlayerShipNode)]
+        else:
+            gain = list(node.resource_gain_on_collect(self.patches, self.resources, self.game.world_list.all_nodes,
+                                                      self.game.resource_database))
+
+        changed = False
+        for resource, quantity in gain:
+            if isinstance(node, PlayerShipNode) and self.resources.get(resource, 0) >= quantity:
+                continue
+            add_resource_gain_to_current_resources([(resource, quantity)], self.resources)
+            changed = True
+        return changed
+
+    def expand(self, start: Node) -> None:
+        """
+        Reaches everything possible from the given node.
+        Each resource node is collected once, when reached, and edges that can't be used yet are checked again
+        only after a resource changed.
+        """
+        self._expand([start], False)
+
+    def add_pickups(self, pickups: List[PickupEntry]) -> None:
+        """
+        Gives the given pickups, then reaches everything that became possible with them.
+        """
+        for pickup in pickups:
+            add_resource_gain_to_current_resources(pickup.resource_gain(self.resources, force_lock=True),
+                                                   self.resources)
+        self._expand([], True)
+
+    def _expand(self, to_visit: List[Node], changed: bool) -> None:
+        while True:
+            while to_visit:
+                node = to_visit.pop()
+                if node in self.nodes:
+                    continue
+                new_nodes, node_changed = self._visit(node)
+                to_visit.extend(new_nodes)
+                changed = changed or node_changed
+
+            if not changed:
+                break
+            changed = False
+
+            still_blocked_edges = []
+            for target_node, requirement in self._blocked_edges:
+                if target_node in self.nodes:
+                    continue
+                if self._satisfied(requirement):
+                    to_visit.append(target_node)
+                else:
+                    still_blocked_edges.append((target_node, requirement))
+            self._blocked_edges = still_blocked_edges
+
+
+def _starting_resources(pool: PlayerPool) -> Tuple[Node, CurrentResources]:
+    configuration = pool.configuration
+    state = bootstrap.calculate_starting_state(pool.game, pool.patches, configuration.energy_per_tank,
+                                               keep_history=False)
+
+    resources = copy.copy(state.resources)
+    resources.update(bootstrap.trick_resources_for_configuration(configuration.trick_level,
+                                                                 pool.game.resource_database))
+    resources.update(bootstrap.version_resources_for_game(pool.game.resource_database))
+    resources.update(bootstrap.misc_resources_for_configuration(configuration, pool.game.resource_database))
+    return state.node, resources
+
+
+def relaxed_reach_with_pickups(pool: PlayerPool, pickups: List[PickupEntry]) -> RelaxedReach:
+    """
+    Creates a RelaxedReach for the given pool, as if all given pickups were starting items.
+    """
+    start, resources = _starting_resources(pool)
+    for pickup in pickups:
+        add_resource_gain_to_current_resources(pickup.resource_gain(resources, force_lock=True), resources)
+
+    reach = RelaxedReach(pool.game, pool.patches, resources)
+    reach.expand(start)
+    return reach
+
+
+def _free_pickup_nodes(pool: PlayerPool, reach: RelaxedReach) -> List[PickupNode]:
+    excluded = pool.configuration.available_locations.excluded_indices
+    return [
+        node for node in reach.nodes
+        if isinstance(node, PickupNode) and node.pickup_index not in pool.patches.pickup_assignment
+        and node.pickup_index not in excluded
+    ]
+
+
+def _required_names_from(base: RelaxedReach, pickups_by_name: Dict[str, List[PickupEntry]],
+                         names: List[str]) -> List[str]:
+    """
+    Which of the given names are required, when the base reach already has all pickups with any other name.
+    The pickups of each half of the names are added to a copy of the base, which is then shared by the names
+    of the other half. When that copy already satisfies the victory condition, no name of the other half is required.
+    """
+    if len(names) == 1:
+        return [] if base.victory_condition_satisfied() else names
+
+    middle = len(names) // 2
+    result = []
+    for names_to_check, names_to_add in ((names[:middle], names[middle:]), (names[middle:], names[:middle])):
+        reach = base.copy()
+        reach.add_pickups([pickup for name in names_to_add for pickup in pickups_by_name[name]])
+        if not reach.victory_condition_satisfied():
+            result.extend(_required_names_from(reach, pickups_by_name, names_to_check))
+    return result
+
+
+def _required_pickup_names(pool: PlayerPool) -> List[str]:
+    """
+    The names of the pickups that at least one copy of must be collected, as the victory condition
+    isn't satisfied in a RelaxedReach without all copies of them.
+    Instead of a new RelaxedReach for each name, the reach with only the starting items is extended and
+    shared by dividing the names in halves, so most of the work is done once.
+    """
+    start, resources = _starting_resources(pool)
+    base = RelaxedReach(pool.game, pool.patches, resources)
+    base.expand(start)
+
+    pickups_by_name = collections.defaultdict(list)
+    for pickup in pool.pickups:
+        pickups_by_name[pickup.name].append(pickup)
+
+    return sorted(_required_names_from(base, pickups_by_name, sorted(pickups_by_name)))
+
+
+def check_player_pool(pool: PlayerPool, num_players: int) -> None:
+    """
+    Checks, without running the filler, if the given pool can't be used to generate a game.
+    This is the case when even having all its pickups isn't enough for the victory condition,
+    or when there are fewer reachable locations and starting item slots than pickups that are required.
+    Only items and locations of the pool itself are considered, so other players in a multiworld don't
+    affect the victory check, but do disable the location check.
+    :raises UnableToGenerate: if a game can't be generated from the pool.
+    """
+    if pool.configuration.trick_level.minimal_logic:
+        return
+
+    player = f"Player {pool.patches.player_index + 1}: " if num_players > 1 else ""
+
+    reach = relaxed_reach_with_pickups(pool, pool.pickups)
+    if not reach.victory_condition_satisfied():
+        raise UnableToGenerate("{}Victory condition can't be satisfied even with all {} pickups of the item pool "
+                               "and every location that could be reached.".format(player, len(pool.pickups)))
+
+    if num_players > 1:
+        return
+
+    num_locations = len(_free_pickup_nodes(pool, reach))
+    max_starting_items = pool.configuration.major_items_configuration.maximum_random_starting_items
+    if num_locations + max_starting_items >= len({pickup.name for pickup in pool.pickups}):
+        # Not even one copy of every pickup could be too many, so there's no need to know which are required
+        return
+
+    required = _required_pickup_names(pool)
+    if len(required) > num_locations + max_starting_items:
+        raise UnableToGenerate(
+            "{} different pickups are required ({}), but only {} locations can be reached and at most {} random "
+            "starting items are allowed.".format(len(required), ", ".join(required), num_locations,
+                                                 max_starting_items))
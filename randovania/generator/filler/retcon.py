@@ -1,6 +1,11 @@
+import io
+import itertools
 import math
+import os
+import pickle
 import pprint
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from random import Random
 from typing import Tuple, Iterator, Set, AbstractSet, Dict, \
     Mapping, FrozenSet, Callable, List, Optional
@@ -19,6 +24,7 @@ from randovania.generator.filler.filler_library import UnableToGenerate, should_
 from randovania.generator.filler.filler_logging import debug_print_collect_event
 from randovania.generator.filler.player_state import PlayerState
 from randovania.generator.generator_reach import GeneratorReach
+from randovania.lib import profiling_lib
 from randovania.resolver import debug
 from randovania.resolver.random_lib import select_element_with_weight
 
@@ -26,6 +32,7 @@ _RESOURCES_WEIGHT_MULTIPLIER = 1
 _INDICES_WEIGHT_MULTIPLIER = 1
 _LOGBOOKS_WEIGHT_MULTIPLIER = 1
 _VICTORY_WEIGHT = 1000
+_MINIMUM_ACTIONS_PER_TASK = 4
 WeightedLocations = Dict[Tuple["PlayerState", PickupIndex], float]
 
 
@@ -91,13 +98,133 @@ def _get_next_player(rng: Random, player_states: List[PlayerState], num_indices:
             raise UnableToGenerate(f"No players with possible actions after {total_actions} total actions.")
 
 
+def _calculate_weight_for_action(reach: GeneratorReach, current_uncollected: UncollectedState,
+                                 action: Action) -> float:
+    if isinstance(action, tuple):
+        pickups = typing.cast(Tuple[PickupEntry, ...], action)
+        base_weight = _calculate_weights_for(_calculate_reach_for_progression(reach, pickups),
+                                             current_uncollected)
+
+        multiplier = sum(pickup.probability_multiplier for pickup in pickups) / len(pickups)
+        offset = sum(pickup.probability_offset for pickup in pickups)
+        return (base_weight * multiplier + offset) / len(pickups)
+
+    else:
+        return _calculate_weights_for(
+            reach_lib.advance_to_with_reach_copy(reach, reach.state.act_on_node(action)),
+            current_uncollected)
+
+
+def _calculate_weight_for_actions(reach: GeneratorReach, current_uncollected: UncollectedState,
+                                  actions: List[Action]) -> List[float]:
+    return [
+        _calculate_weight_for_action(reach, current_uncollected, action)
+        for action in actions
+    ]
+
+
+def _split_actions(actions: List[Action]) -> List[List[Action]]:
+    chunk_size = max(_MINIMUM_ACTIONS_PER_TASK, math.ceil(len(actions) / (os.cpu_count() or 1)))
+    return [actions[i:i + chunk_size] for i in range(0, len(actions), chunk_size)]
+
+
+# The games of the filler running in the parent, in a process of a WeightingPool
+_worker_games: List[GameDescription] = []
+
+
+def _initialize_worker(games: List[GameDescription]):
+    _worker_games[:] = games
+
+
+def _game_references(games: List[GameDescription]) -> Dict[int, tuple]:
+    """
+    Maps the id of the games, and of the parts of them a reach refers to, to how a worker can find them.
+    """
+    references = {}
+    for position, game in enumerate(games):
+        references[id(game)] = ("game", position)
+        references[id(game.world_list)] = ("world_list", position)
+        references[id(game.resource_database)] = ("resource_database", position)
+        for node in game.world_list.all_nodes:
+            references[id(node)] = ("node", position, node.index)
+    return references
+
+
+class _GamePickler(pickle.Pickler):
+    def __init__(self, file, references: Dict[int, tuple]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._references = references
+
+    def persistent_id(self, obj):
+        return self._references.get(id(obj))
+
+
+class _GameUnpickler(pickle.Unpickler):
+    def persistent_load(self, reference: tuple):
+        kind, position, *rest = reference
+        game = _worker_games[position]
+        if kind == "game":
+            return game
+        elif kind == "world_list":
+            return game.world_list
+        elif kind == "resource_database":
+            return game.resource_database
+        elif kind == "node":
+            return game.world_list.all_nodes[rest[0]]
+        raise pickle.UnpicklingError(f"Unknown reference: {reference}")
+
+
+def _calculate_weight_for_pickled_actions(reach_data: bytes, actions_data: bytes) -> List[float]:
+    reach, current_uncollected = _GameUnpickler(io.BytesIO(reach_data)).load()
+    actions = _GameUnpickler(io.BytesIO(actions_data)).load()
+    return _calculate_weight_for_actions(reach, current_uncollected, actions)
+
+
+class WeightingPool:
+    """
+    Processes that weight the potential actions of the filler in parallel.
+    Each process receives the games when it starts, so only the reach and the actions are sent for each step,
+    with the nodes and games they use replaced by references to the process' copy.
+    """
+    _references: Dict[int, tuple]
+    _executor: ProcessPoolExecutor
+
+    def __init__(self, games: List[GameDescription], processes: int, mp_context=None):
+        self._references = _game_references(games)
+        self._executor = ProcessPoolExecutor(processes, mp_context=mp_context,
+                                             initializer=_initialize_worker, initargs=(games,))
+
+    def __enter__(self) -> "WeightingPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._executor.shutdown()
+
+    def _dumps(self, obj) -> bytes:
+        file = io.BytesIO()
+        _GamePickler(file, self._references).dump(obj)
+        return file.getvalue()
+
+    def calculate_weights(self, reach: GeneratorReach, current_uncollected: UncollectedState,
+                          chunks: List[List[Action]]) -> Iterator[List[float]]:
+        """
+        Weights each chunk of actions in a process.
+        :return: The weights of each chunk, in the same order as the chunks.
+        """
+        return self._executor.map(_calculate_weight_for_pickled_actions,
+                                  itertools.repeat(self._dumps((reach, current_uncollected))),
+                                  [self._dumps(chunk) for chunk in chunks])
+
+
 def weighted_potential_actions(player_state: PlayerState, status_update: Callable[[str], None],
-                               num_available_indices: int) -> Dict[Action, float]:
+                               num_available_indices: int,
+                               executor: Optional[WeightingPool] = None) -> Dict[Action, float]:
     """
     Weights all potential actions based on current criteria.
     :param player_state:
     :param status_update:
     :param num_available_indices: The number of indices available for placement.
+    :param executor: If set, the actions are weighted in parallel using it. The result is the same either way.
     :return:
     """
     actions_weights: Dict[Action, float] = {}
@@ -106,28 +233,22 @@ def weighted_potential_actions(player_state: PlayerState, status_update: Callabl
     actions = player_state.potential_actions(num_available_indices)
     options_considered = 0
 
-    def update_for_option():
+    def update_for_option(count: int = 1):
         nonlocal options_considered
-        options_considered += 1
+        options_considered += count
         status_update("Checked {} of {} options.".format(options_considered, len(actions)))
 
-    for action in actions:
-        if isinstance(action, tuple):
-            pickups = typing.cast(Tuple[PickupEntry, ...], action)
-            base_weight = _calculate_weights_for(_calculate_reach_for_progression(player_state.reach, pickups),
-                                                 current_uncollected)
-
-            multiplier = sum(pickup.probability_multiplier for pickup in pickups) / len(pickups)
-            offset = sum(pickup.probability_offset for pickup in pickups)
-            weight = (base_weight * multiplier + offset) / len(pickups)
+    if executor is None:
+        for action in actions:
+            actions_weights[action] = _calculate_weight_for_action(player_state.reach, current_uncollected, action)
+            update_for_option()
 
-        else:
-            weight = _calculate_weights_for(
-                reach_lib.advance_to_with_reach_copy(player_state.reach, player_state.reach.state.act_on_node(action)),
-                current_uncollected)
-
-        actions_weights[action] = weight
-        update_for_option()
+    else:
+        chunks = _split_actions(actions)
+        all_weights = executor.calculate_weights(player_state.reach, current_uncollected, chunks)
+        for chunk, weights in zip(chunks, all_weights):
+            actions_weights.update(zip(chunk, weights))
+            update_for_option(len(chunk))
 
     if debug.debug_level() > 1:
         for action, weight in actions_weights.items():
@@ -139,12 +260,14 @@ def weighted_potential_actions(player_state: PlayerState, status_update: Callabl
 def retcon_playthrough_filler(rng: Random,
                               player_states: List[PlayerState],
                               status_update: Callable[[str], None],
+                              executor: Optional[WeightingPool] = None,
                               ) -> Tuple[Dict[PlayerState, GamePatches], Tuple[str, ...]]:
     """
     Runs the retcon logic.
     :param rng:
     :param player_states:
     :param status_update:
+    :param executor: If set, used to weight the potential actions in parallel.
     :return: A GamePatches for each player and a sequence of placed items.
     """
     debug.debug_print("{}\nRetcon filler started with major items:\n{}".format(
@@ -171,12 +294,15 @@ def retcon_playthrough_filler(rng: Random,
     actions_log = []
 
     while True:
+        iteration = profiling_lib.start_phase("filler_iteration")
         all_locations_weighted = _calculate_all_pickup_indices_weight(player_states)
         current_player = _get_next_player(rng, player_states, len(all_locations_weighted))
         if current_player is None:
+            iteration.stop()
             break
 
-        weighted_actions = weighted_potential_actions(current_player, action_report, len(all_locations_weighted))
+        weighted_actions = weighted_potential_actions(current_player, action_report, len(all_locations_weighted),
+                                                      executor)
         try:
             action = select_element_with_weight(weighted_actions, rng=rng)
         except StopIteration:
@@ -213,6 +339,7 @@ def retcon_playthrough_filler(rng: Random,
 
         current_player.reach = reach_lib.advance_reach_with_possible_unsafe_resources(current_player.reach)
         current_player.update_for_new_state()
+        iteration.stop()
 
     all_patches = {player_state: player_state.reach.state.patches for player_state in player_states}
     return all_patches, tuple(actions_log)
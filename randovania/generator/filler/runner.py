@@ -1,3 +1,4 @@
+import contextlib
 import copy
 import dataclasses
 from random import Random
@@ -19,7 +20,7 @@ from randovania.games.game import RandovaniaGame
 from randovania.generator.filler.filler_configuration import FillerConfiguration
 from randovania.generator.filler.filler_library import should_have_hint, UnableToGenerate
 from randovania.generator.filler.player_state import PlayerState
-from randovania.generator.filler.retcon import retcon_playthrough_filler
+from randovania.generator.filler.retcon import retcon_playthrough_filler, WeightingPool
 from randovania.layout.prime2.echoes_configuration import EchoesConfiguration
 from randovania.resolver import bootstrap, debug, random_lib
 
@@ -321,6 +322,7 @@ class FillerResults:
 async def run_filler(rng: Random,
                      player_pools: Dict[int, PlayerPool],
                      status_update: Callable[[str], None],
+                     processes: Optional[int] = None,
                      ) -> FillerResults:
     """
     Runs the filler logic for the given configuration and item pool.
@@ -330,6 +332,7 @@ async def run_filler(rng: Random,
     :param player_pools:
     :param rng:
     :param status_update:
+    :param processes: If set, the potential actions are weighted in parallel using this many processes.
     :return:
     """
 
@@ -345,7 +348,8 @@ async def run_filler(rng: Random,
         rng.shuffle(major_items)
         rng.shuffle(player_expansions[index])
 
-        new_game, state = bootstrap.logic_bootstrap(pool.configuration, pool.game, pool.patches)
+        # The filler never looks at how a state was reached, so there's no reason to keep all previous states alive
+        new_game, state = bootstrap.logic_bootstrap(pool.configuration, pool.game, pool.patches, keep_history=False)
 
         major_configuration = pool.configuration.major_items_configuration
         player_states.append(PlayerState(
@@ -363,7 +367,13 @@ async def run_filler(rng: Random,
         ))
 
     try:
-        filler_result, actions_log = retcon_playthrough_filler(rng, player_states, status_update=status_update)
+        with contextlib.ExitStack() as stack:
+            executor = None
+            if processes is not None:
+                executor = stack.enter_context(WeightingPool([player_state.game for player_state in player_states],
+                                                             processes))
+            filler_result, actions_log = retcon_playthrough_filler(rng, player_states, status_update=status_update,
+                                                                    executor=executor)
     except UnableToGenerate as e:
         message = "{}\n\n{}".format(
             str(e),
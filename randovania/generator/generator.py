@@ -1,6 +1,13 @@
 import asyncio
+import concurrent.futures
+import contextlib
+import dataclasses
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import Executor
 from random import Random
-from typing import Optional, Callable, List, Dict
+from typing import Optional, Callable, List, Dict, Tuple
 
 import tenacity
 
@@ -11,17 +18,20 @@ from randovania.game_description.game_description import GameDescription
 from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.resources.pickup_entry import PickupEntry
 from randovania.game_description.world.world_list import WorldList
-from randovania.generator import base_patches_factory
+from randovania.generator import base_patches_factory, feasibility
 from randovania.generator.filler.filler_library import filter_unassigned_pickup_nodes, UnableToGenerate
 from randovania.generator.filler.runner import run_filler, FillerPlayerResult, PlayerPool, FillerResults
 from randovania.generator.item_pool import pool_creator
 from randovania.layout.base.available_locations import RandomizationMode
+from randovania.lib import profiling_lib
 from randovania.layout.prime2.echoes_configuration import EchoesConfiguration
 from randovania.layout.layout_description import LayoutDescription
 from randovania.layout.permalink import Permalink
 from randovania.layout.preset import Preset
 from randovania.resolver import resolver, bootstrap
-from randovania.resolver.exceptions import GenerationFailure, InvalidConfiguration, ImpossibleForSolver
+from randovania.resolver.exceptions import GenerationFailure, InvalidConfiguration, ImpossibleForSolver, \
+    ExpansionBudgetExhausted
+from randovania.resolver.resolver_stats import ResolverStats
 
 
 def _validate_item_pool_size(item_pool: List[PickupEntry], game: GameDescription,
@@ -39,8 +49,9 @@ def create_player_pool(rng: Random, configuration: EchoesConfiguration,
     game = default_database.game_description_for(configuration.game).make_mutable_copy()
     game.resource_database = bootstrap.patch_resource_database(game.resource_database, configuration)
 
-    base_patches = base_patches_factory.create_base_patches(configuration, rng, game, num_players > 1,
-                                                            player_index=player_index)
+    with profiling_lib.phase("base_patches"):
+        base_patches = base_patches_factory.create_base_patches(configuration, rng, game, num_players > 1,
+                                                                player_index=player_index)
 
     item_pool, pickup_assignment, initial_items = pool_creator.calculate_pool_results(configuration,
                                                                                       game.resource_database)
@@ -108,25 +119,33 @@ def _assign_remaining_items(rng: Random,
 async def _create_pools_and_fill(rng: Random,
                                  presets: Dict[int, Preset],
                                  status_update: Callable[[str], None],
+                                 filler_processes: Optional[int] = None,
                                  ) -> FillerResults:
     """
     Runs the rng-dependant parts of the generation, with retries
     :param rng:
     :param presets:
     :param status_update:
+    :param filler_processes: If set, the filler weights the potential actions in parallel using this many processes.
     :return:
     """
     player_pools: Dict[int, PlayerPool] = {}
 
     for player_index, player_preset in presets.items():
         status_update(f"Creating item pool for player {player_index + 1}")
-        player_pools[player_index] = create_player_pool(rng, player_preset.configuration, player_index,
-                                                        len(presets))
+        with profiling_lib.phase("pool_creation"):
+            player_pools[player_index] = create_player_pool(rng, player_preset.configuration, player_index,
+                                                            len(presets))
 
     for player_pool in player_pools.values():
         _validate_item_pool_size(player_pool.pickups, player_pool.game, player_pool.configuration)
 
-    return await run_filler(rng, player_pools, status_update)
+    with profiling_lib.phase("feasibility_check"):
+        for player_pool in player_pools.values():
+            feasibility.check_player_pool(player_pool, len(player_pools))
+
+    with profiling_lib.phase("filler"):
+        return await run_filler(rng, player_pools, status_update, filler_processes)
 
 
 def _distribute_remaining_items(rng: Random,
@@ -166,15 +185,184 @@ def _distribute_remaining_items(rng: Random,
     # }
 
 
+def _rng_for_attempt(permalink: Permalink, attempt_number: int) -> Random:
+    """
+    The Random used by the given attempt when attempts run in parallel. Each attempt has its own stream, so the result
+    of an attempt doesn't depend on the others. The first attempt uses the same Random as when retrying sequentially.
+    """
+    if attempt_number == 1:
+        return Random(permalink.as_bytes)
+    return Random(permalink.as_bytes + attempt_number.to_bytes(4, "big"))
+
+
+# How many status updates an attempt gets between checks of if it should stop
+_STOP_CHECK_INTERVAL = 32
+
+
+class _AttemptStopped(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class _AttemptResult:
+    # The patches of each player and the action log. None if the attempt failed or was stopped.
+    result: Optional[Tuple[Dict[int, GamePatches], list]]
+    failure: Optional[UnableToGenerate]
+    # The Profile.as_json of the attempt, when profiling.
+    profile: Optional[dict]
+
+
+def _run_attempt(permalink: Permalink, attempt_number: int, stop_event,
+                 filler_processes: Optional[int] = None, profile: bool = False) -> _AttemptResult:
+    """
+    Runs a complete generation attempt, meant for a worker process.
+    :param stop_event: When set, the attempt is abandoned.
+    :param filler_processes: Passed to the filler.
+    :param profile: If the phases of the attempt should be profiled, to be merged in the caller's profile.
+    :return:
+    """
+    rng = _rng_for_attempt(permalink, attempt_number)
+    presets = {
+        i: permalink.get_preset(i)
+        for i in range(permalink.player_count)
+    }
+    updates = itertools.count(1)
+
+    def status_update(s: str):
+        if next(updates) % _STOP_CHECK_INTERVAL == 0 and stop_event.is_set():
+            raise _AttemptStopped()
+
+    with contextlib.ExitStack() as stack:
+        attempt_profile = stack.enter_context(profiling_lib.profile()) if profile else None
+        result = None
+        failure = None
+        try:
+            filler_results = asyncio.run(_create_pools_and_fill(rng, presets, status_update, filler_processes))
+            with profiling_lib.phase("distribute_remaining_items"):
+                all_patches = _distribute_remaining_items(rng, filler_results.player_results)
+            result = all_patches, filler_results.action_log
+        except _AttemptStopped:
+            pass
+        except UnableToGenerate as e:
+            failure = e
+
+    return _AttemptResult(
+        result=result,
+        failure=failure,
+        profile=attempt_profile.as_json if attempt_profile is not None else None,
+    )
+
+
+async def _run_parallel_attempts(permalink: Permalink,
+                                 attempts: int,
+                                 attempt_executor: Executor,
+                                 parallel_attempts: int,
+                                 attempt_callback: Optional[Callable[[int], None]],
+                                 filler_processes: Optional[int] = None,
+                                 ) -> Tuple[Dict[int, GamePatches], list]:
+    """
+    Runs up to parallel_attempts attempts at the same time in the given executor, starting a new one whenever one
+    fails. The lowest numbered attempt that succeeds is used, so the result doesn't depend on the timing.
+    Attempts numbered after a success are never started, and the ones already running are told to stop, which they
+    do the next time they check. Returns once every started attempt finished or stopped.
+    If there's an active profile, the profile of each attempt is merged into it.
+    """
+    current_profile = profiling_lib.current_profile()
+    last_attempt = max(attempts, 1)
+    next_attempt = 1
+    running: Dict[int, asyncio.Future] = {}
+    failures: Dict[int, UnableToGenerate] = {}
+    winner: Optional[int] = None
+    winner_result = None
+    stopped: List[asyncio.Future] = []
+
+    with multiprocessing.Manager() as manager:
+        stop_events = {}
+        submitted: List[concurrent.futures.Future] = []
+        try:
+            while True:
+                while (len(running) < parallel_attempts and next_attempt <= last_attempt
+                       and (winner is None or next_attempt < winner)):
+                    if attempt_callback is not None:
+                        attempt_callback(next_attempt)
+                    stop_events[next_attempt] = manager.Event()
+                    future = attempt_executor.submit(_run_attempt, permalink, next_attempt,
+                                                     stop_events[next_attempt], filler_processes,
+                                                     current_profile is not None)
+                    submitted.append(future)
+                    running[next_attempt] = asyncio.wrap_future(future)
+                    next_attempt += 1
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running.values(), return_when=asyncio.FIRST_COMPLETED)
+                for attempt_number in sorted(number for number, future in running.items() if future in done):
+                    attempt_result: _AttemptResult = running.pop(attempt_number).result()
+                    if current_profile is not None:
+                        current_profile.merge_json(attempt_result.profile)
+
+                    if attempt_result.failure is not None:
+                        failures[attempt_number] = attempt_result.failure
+                        continue
+
+                    if winner is None or attempt_number < winner:
+                        winner = attempt_number
+                        winner_result = attempt_result.result
+
+                if winner is not None:
+                    for attempt_number in [number for number in running if number > winner]:
+                        stop_events[attempt_number].set()
+                        stopped.append(running.pop(attempt_number))
+        finally:
+            # Attempts that already started only stop once they check their event, which needs the manager alive
+            for event in stop_events.values():
+                event.set()
+            for future in submitted:
+                future.cancel()
+            if submitted:
+                await asyncio.wait([asyncio.wrap_future(future) for future in submitted])
+
+    if current_profile is not None:
+        for future in stopped:
+            if not future.cancelled() and future.exception() is None:
+                current_profile.merge_json(future.result().profile)
+
+    if winner is None:
+        raise failures[last_attempt]
+
+    return winner_result
+
+
 async def _create_description(permalink: Permalink,
                               status_update: Callable[[str], None],
                               attempts: int,
+                              filler_processes: Optional[int] = None,
+                              attempt_callback: Optional[Callable[[int], None]] = None,
+                              attempt_executor: Optional[Executor] = None,
+                              parallel_attempts: int = 1,
                               ) -> LayoutDescription:
     """
     :param permalink:
     :param status_update:
+    :param filler_processes:
+    :param attempt_callback: Called with the attempt number before each attempt.
+    :param attempt_executor: If set, the attempts are run in it instead, with parallel_attempts of them at a time.
+    :param parallel_attempts:
     :return:
     """
+    if attempt_executor is not None:
+        status_update(f"Running up to {parallel_attempts} generation attempts in parallel")
+        all_patches, action_log = await _run_parallel_attempts(permalink, attempts, attempt_executor,
+                                                               parallel_attempts, attempt_callback,
+                                                               filler_processes)
+        return LayoutDescription(
+            permalink=permalink,
+            version=VERSION,
+            all_patches=all_patches,
+            item_order=action_log,
+        )
+
     rng = Random(permalink.as_bytes)
 
     presets = {
@@ -182,15 +370,21 @@ async def _create_description(permalink: Permalink,
         for i in range(permalink.player_count)
     }
 
+    def before_attempt(retry_state: tenacity.RetryCallState):
+        if attempt_callback is not None:
+            attempt_callback(retry_state.attempt_number)
+
     retrying = tenacity.AsyncRetrying(
         stop=tenacity.stop_after_attempt(attempts),
         retry=tenacity.retry_if_exception_type(UnableToGenerate),
+        before=before_attempt,
         reraise=True
     )
 
-    filler_results = await retrying(_create_pools_and_fill, rng, presets, status_update)
+    filler_results = await retrying(_create_pools_and_fill, rng, presets, status_update, filler_processes)
 
-    all_patches = _distribute_remaining_items(rng, filler_results.player_results)
+    with profiling_lib.phase("distribute_remaining_items"):
+        all_patches = _distribute_remaining_items(rng, filler_results.player_results)
     return LayoutDescription(
         permalink=permalink,
         version=VERSION,
@@ -204,14 +398,32 @@ async def generate_and_validate_description(permalink: Permalink,
                                             validate_after_generation: bool,
                                             timeout: Optional[int] = 600,
                                             attempts: int = 15,
+                                            filler_processes: Optional[int] = None,
+                                            attempt_callback: Optional[Callable[[int], None]] = None,
+                                            attempt_executor: Optional[Executor] = None,
+                                            parallel_attempts: int = 1,
+                                            resolver_heuristic: Optional[str] = None,
+                                            resolver_stats: Optional[ResolverStats] = None,
                                             ) -> LayoutDescription:
     """
     Creates a LayoutDescription for the given Permalink.
     :param permalink:
     :param status_update:
     :param validate_after_generation:
-    :param timeout: Abort generation after this many seconds.
+    :param timeout: Abort generation after this many seconds of validation. Multiworld games that reach it are returned
+    without being validated.
     :param attempts: Attempt this many generations.
+    :param filler_processes: If set, the filler weights its potential actions in parallel using this many processes.
+    The generated game is the same as without it.
+    :param attempt_callback: Called with the attempt number before each generation attempt.
+    :param attempt_executor: If set, up to parallel_attempts generation attempts run at the same time using this
+    executor, each with its own Random derived from the permalink. The lowest numbered attempt that succeeds is used,
+    so the generated game is the same for any parallel_attempts, but differs from the sequential retries if the first
+    attempt fails. Each attempt uses its own filler_processes.
+    :param parallel_attempts: How many generation attempts run at the same time with the attempt_executor.
+    :param resolver_heuristic: If set, validates single player games with a best-first search using this heuristic.
+    :param resolver_stats: If set, the work done by the validation is counted in it. Its max_expansions, if set,
+    limits the validation independently of the timeout.
     :return:
     """
     if status_update is None:
@@ -222,22 +434,44 @@ async def generate_and_validate_description(permalink: Permalink,
             permalink=permalink,
             status_update=status_update,
             attempts=attempts,
+            filler_processes=filler_processes,
+            attempt_callback=attempt_callback,
+            attempt_executor=attempt_executor,
+            parallel_attempts=parallel_attempts,
         )
     except UnableToGenerate as e:
         raise GenerationFailure("Could not generate a game with the given settings",
                                 permalink=permalink, source=e) from e
 
-    if validate_after_generation and permalink.player_count == 1:
-        final_state_async = resolver.resolve(
-            configuration=permalink.presets[0].configuration,
-            patches=result.all_patches[0],
-            status_update=status_update,
-        )
+    if validate_after_generation:
+        if permalink.player_count == 1:
+            final_state_async = resolver.resolve(
+                configuration=permalink.presets[0].configuration,
+                patches=result.all_patches[0],
+                status_update=status_update,
+                heuristic=resolver_heuristic,
+                stats=resolver_stats,
+            )
+        else:
+            final_state_async = resolver.resolve_multiworld(
+                configurations={player: preset.configuration for player, preset in permalink.presets.items()},
+                all_patches=result.all_patches,
+                status_update=status_update,
+                stats=resolver_stats,
+            )
         try:
-            final_state_by_resolve = await asyncio.wait_for(final_state_async, timeout)
+            with profiling_lib.phase("validation"):
+                final_state_by_resolve = await asyncio.wait_for(final_state_async, timeout)
         except asyncio.TimeoutError as e:
+            if permalink.player_count > 1:
+                # Multiworld validation is new and can still be slow, so these games are kept, as they were before
+                logging.warning("Timeout reached when validating the multiworld game. Keeping it unvalidated.")
+                return result
             raise GenerationFailure("Timeout reached when validating possibility",
                                     permalink=permalink, source=e) from e
+        except ExpansionBudgetExhausted as e:
+            raise GenerationFailure("Expansion budget reached when validating possibility",
+                                    permalink=permalink, source=e) from e
 
         if final_state_by_resolve is None:
             raise GenerationFailure("Generated game was considered impossible by the solver",
@@ -1,7 +1,5 @@
-import copy
-import itertools
-from heapq import heappush, heappop
-from typing import Dict, Iterator, Tuple, Set, Callable
+from collections import deque, defaultdict
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Tuple, Set, Callable
 
 from randovania.game_description.requirements import RequirementSet
 
@@ -28,42 +26,64 @@ class BaseGraph:
     def edges_data(self) -> Iterator[Tuple[int, int, RequirementSet]]:
         raise NotImplementedError()
 
-    def multi_source_dijkstra(self, sources: Set[int], weight: Callable[[int, int, RequirementSet], float]):
+    def multi_source_zero_one_bfs(self, sources: Set[int], is_zero_weight: Callable[[int], bool]) -> Dict[int, int]:
         raise NotImplementedError()
 
-    def strongly_connected_components(self) -> Iterator[Set[int]]:
+    def nodes_reachable_from(self, sources: Iterable[int], excluded: AbstractSet[int]) -> Set[int]:
+        raise NotImplementedError()
+
+    def nodes_reaching(self, targets: AbstractSet[int], candidates: AbstractSet[int]) -> Set[int]:
         raise NotImplementedError()
 
 
 class RandovaniaGraph(BaseGraph):
     edges: Dict[int, Dict[int, RequirementSet]]
+    _owns_edges: bool
+    _owned_sources: Set[int]
 
     @classmethod
     def new(cls):
         return cls({})
 
     def __init__(self, edges: Dict[int, Dict[int, RequirementSet]]):
-        import networkx
-        self.networkx = networkx
         self.edges = edges
+        self._owns_edges = True
+        self._owned_sources = set(edges.keys())
 
     def copy(self):
-        return RandovaniaGraph(
-            {
-                source: copy.copy(data)
-                for source, data in self.edges.items()
-            },
-        )
+        """
+        Creates a graph that shares all edge data with this one.
+        Afterwards, each graph copies the dicts it needs to modify, so neither sees the other's changes.
+        """
+        result = RandovaniaGraph(self.edges)
+        for graph in (self, result):
+            graph._owns_edges = False
+            graph._owned_sources = set()
+        return result
+
+    def _edges_to_modify(self) -> Dict[int, Dict[int, RequirementSet]]:
+        if not self._owns_edges:
+            self.edges = dict(self.edges)
+            self._owns_edges = True
+        return self.edges
+
+    def _targets_to_modify(self, source: int) -> Dict[int, RequirementSet]:
+        edges = self._edges_to_modify()
+        if source not in self._owned_sources:
+            edges[source] = dict(edges[source])
+            self._owned_sources.add(source)
+        return edges[source]
 
     def add_node(self, node: int):
         if node not in self.edges:
-            self.edges[node] = {}
+            self._edges_to_modify()[node] = {}
+            self._owned_sources.add(node)
 
     def add_edge(self, previous_node: int, next_node: int, requirement: RequirementSet):
-        self.edges[previous_node][next_node] = requirement
+        self._targets_to_modify(previous_node)[next_node] = requirement
 
     def remove_edge(self, previous: int, target: int):
-        self.edges[previous].pop(target)
+        self._targets_to_modify(previous).pop(target)
 
     def has_edge(self, previous_node: int, next_node: int) -> bool:
         return next_node in self.edges.get(previous_node, {})
@@ -76,79 +96,79 @@ class RandovaniaGraph(BaseGraph):
             for target, requirement in data.items():
                 yield source, target, requirement
 
-    def multi_source_dijkstra(self, sources: Set[int], weight: Callable[[int, int, RequirementSet], float]):
-        paths = {source: [source] for source in sources}  # dictionary of paths
+    def multi_source_zero_one_bfs(self, sources: Set[int], is_zero_weight: Callable[[int], bool]) -> Dict[int, int]:
+        """
+        Calculates the distance from the closest source to every node reachable from them, when going to a node
+        costs 0 if is_zero_weight is True for that node and 1 otherwise.
+        As there are only two weights, a deque replaces the priority queue of Dijkstra's algorithm.
+        :return: The distance of each reachable node, including the sources with distance 0.
+        """
         edges = self.edges
-
-        push = heappush
-        pop = heappop
-
-        dist = {}  # dictionary of final distances
-        seen = {}
-        # fringe is heapq with 3-tuples (distance,c,node)
-        # use the count c to avoid comparing nodes (may not be able to)
-        c = itertools.count()
-        fringe = []
+        zero_weight = {}
+        dist = {}
+        fringe = deque((0, source) for source in sources)
         for source in sources:
-            seen[source] = 0
-            push(fringe, (0, next(c), source))
+            dist[source] = 0
 
         while fringe:
-            (d, _, v) = pop(fringe)
-            if v in dist:
-                continue  # already searched this node.
-            dist[v] = d
-            for u, e in edges[v].items():
-                cost = weight(v, u, e)
-                if cost is None:
-                    continue
-                vu_dist = dist[v] + cost
-                if u in dist:
-                    u_dist = dist[u]
-                    if vu_dist < u_dist:
-                        raise ValueError("Contradictory paths found:", "negative weights?")
-                elif u not in seen or vu_dist < seen[u]:
-                    seen[u] = vu_dist
-                    push(fringe, (vu_dist, next(c), u))
-                    paths[u] = paths[v] + [u]
-
-        return dist, paths
-
-    def strongly_connected_components(self) -> Iterator[Set[int]]:
-        preorder = {}
-        lowlink = {}
-        scc_found = set()
-        scc_queue = []
-        i = 0  # Preorder counter
-        for source in self.edges.keys():
-            if source not in scc_found:
-                queue = [source]
-                while queue:
-                    v = queue[-1]
-                    if v not in preorder:
-                        i = i + 1
-                        preorder[v] = i
-                    done = True
-                    for w in self.edges[v].keys():
-                        if w not in preorder:
-                            queue.append(w)
-                            done = False
-                            break
-                    if done:
-                        lowlink[v] = preorder[v]
-                        for w in self.edges[v].keys():
-                            if w not in scc_found:
-                                if preorder[w] > preorder[v]:
-                                    lowlink[v] = min([lowlink[v], lowlink[w]])
-                                else:
-                                    lowlink[v] = min([lowlink[v], preorder[w]])
-                        queue.pop()
-                        if lowlink[v] == preorder[v]:
-                            scc = {v}
-                            while scc_queue and preorder[scc_queue[-1]] > preorder[v]:
-                                k = scc_queue.pop()
-                                scc.add(k)
-                            scc_found.update(scc)
-                            yield scc
-                        else:
-                            scc_queue.append(v)
+            d, v = fringe.popleft()
+            if d > dist[v]:
+                continue  # already found a shorter path to this node
+
+            for u in edges[v]:
+                is_zero = zero_weight.get(u)
+                if is_zero is None:
+                    is_zero = zero_weight[u] = is_zero_weight(u)
+
+                if is_zero:
+                    if d < dist.get(u, d + 1):
+                        dist[u] = d
+                        fringe.appendleft((d, u))
+                elif d + 1 < dist.get(u, d + 2):
+                    dist[u] = d + 1
+                    fringe.append((d + 1, u))
+
+        return dist
+
+    def nodes_reachable_from(self, sources: Iterable[int], excluded: AbstractSet[int]) -> Set[int]:
+        """
+        All nodes with a path from one of the sources that doesn't go through any excluded node.
+        The sources are included, unless excluded.
+        """
+        edges = self.edges
+        result = {source for source in sources if source not in excluded}
+        queue = list(result)
+
+        while queue:
+            for target in edges[queue.pop()]:
+                if target not in result and target not in excluded:
+                    result.add(target)
+                    queue.append(target)
+
+        return result
+
+    def nodes_reaching(self, targets: AbstractSet[int], candidates: AbstractSet[int]) -> Set[int]:
+        """
+        The candidates with a path to one of the targets that only goes through candidates.
+        """
+        edges = self.edges
+        predecessors: Dict[int, List[int]] = defaultdict(list)
+        result = set()
+        queue = []
+
+        for node in candidates:
+            for target in edges[node]:
+                if target in targets:
+                    if node not in result:
+                        result.add(node)
+                        queue.append(node)
+                elif target in candidates:
+                    predecessors[target].append(node)
+
+        while queue:
+            for node in predecessors.get(queue.pop(), ()):
+                if node not in result:
+                    result.add(node)
+                    queue.append(node)
+
+        return result
@@ -1,11 +1,14 @@
 import copy
-from typing import Iterator, Optional, Set, Dict, List, NamedTuple, Tuple
+from typing import Iterator, Optional, Set, Dict, List, NamedTuple, Tuple, FrozenSet
 
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.requirements import RequirementSet, Requirement, ResourceRequirement, RequirementAnd
+from randovania.game_description.resources.resource_info import ResourceVector, convert_resources_to_vector, \
+    resource_slot
 from randovania.game_description.world.node import Node, ResourceNode
 from randovania.generator import graph as graph_module
 from randovania.generator.generator_reach import GeneratorReach
+from randovania.lib import profiling_lib
 from randovania.resolver.state import State
 
 
@@ -22,6 +25,36 @@ def _extra_requirement_for_node(game: GameDescription, node: Node) -> Optional[R
     return extra_requirement
 
 
+def _connections_key(state: State) -> tuple:
+    """
+    The values that the connections between nodes depend on, besides the game itself.
+    """
+    patches = state.patches
+    return (
+        patches.elevator_connection,
+        patches.dock_connection,
+        patches.dock_weakness,
+        patches.translator_gates,
+        state.resources.get("add_self_as_requirement_to_resources"),
+    )
+
+
+def _same_connections_key(a: tuple, b: tuple) -> bool:
+    return all(x is y for x, y in zip(a, b))
+
+
+def _changed_slots(old: ResourceVector, new: ResourceVector) -> List[int]:
+    if old is new:
+        return []
+
+    result = [slot for slot, old_quantity, new_quantity in zip(range(len(new)), old, new)
+              if old_quantity != new_quantity]
+    # Vectors created after new slots were allocated are longer
+    result.extend(slot for slot in range(len(old), len(new)) if new[slot] != 0)
+    result.extend(slot for slot in range(len(new), len(old)) if old[slot] != 0)
+    return result
+
+
 class GraphPath(NamedTuple):
     previous_node: Optional[Node]
     node: Node
@@ -43,26 +76,55 @@ class OldGeneratorReach(GeneratorReach):
     _digraph: graph_module.BaseGraph
     _state: State
     _game: GameDescription
-    _reachable_paths: Optional[Dict[int, List[Node]]]
     _reachable_costs: Optional[Dict[int, int]]
     _node_reachable_cache: Dict[int, bool]
-    _unreachable_paths: Dict[Tuple[Node, Node], RequirementSet]
-    _safe_nodes: Optional[Set[int]]
-    _is_node_safe_cache: Dict[Node, bool]
+    _unreachable_paths: Dict[Tuple[int, int], RequirementSet]
+    _unreachable_path_order: Dict[Tuple[int, int], int]
+    _next_unreachable_path_order: int = 0
+    _unreachable_paths_by_slot: Dict[int, Set[Tuple[int, int]]]
+    _owned_slot_paths: Set[int]
+    _energy_dependent_paths: Set[Tuple[int, int]]
+    _safe_nodes: Optional[FrozenSet[int]]
+    _unsafe_connected_nodes: FrozenSet[int] = frozenset()
+    _new_edges: List[Tuple[int, int]]
+    _safe_nodes_outdated: bool = False
+    _removed_edges: bool = False
+    _resource_vector: Optional[ResourceVector] = None
+    _resource_vector_state: Optional[State] = None
+    _shares_dicts: bool = False
+    _potential_nodes_cache: Dict[Node, Tuple[Tuple[Node, RequirementSet], ...]]
+    _potential_nodes_key: Optional[tuple] = None
 
     def __deepcopy__(self, memodict):
+        """
+        Copies are cheap: the graph is copy-on-write, and both reaches share the caches and unreachable paths
+        until one of them advances. Until then, the cached values are valid for both.
+        """
+        profiling_lib.increment("reach_copies")
         reach = OldGeneratorReach(
             self._game,
             self._state,
             self._digraph.copy()
         )
-        reach._unreachable_paths = copy.copy(self._unreachable_paths)
-        reach._reachable_paths = self._reachable_paths
+        reach._unreachable_paths = self._unreachable_paths
+        reach._unreachable_path_order = self._unreachable_path_order
+        reach._next_unreachable_path_order = self._next_unreachable_path_order
+        reach._unreachable_paths_by_slot = self._unreachable_paths_by_slot
+        reach._energy_dependent_paths = self._energy_dependent_paths
         reach._reachable_costs = self._reachable_costs
         reach._safe_nodes = self._safe_nodes
-
-        reach._node_reachable_cache = copy.copy(self._node_reachable_cache)
-        reach._is_node_safe_cache = copy.copy(self._is_node_safe_cache)
+        reach._unsafe_connected_nodes = self._unsafe_connected_nodes
+        reach._new_edges = list(self._new_edges)
+        reach._safe_nodes_outdated = self._safe_nodes_outdated
+        reach._removed_edges = self._removed_edges
+
+        reach._node_reachable_cache = self._node_reachable_cache
+        reach._shares_dicts = self._shares_dicts = True
+        reach._resource_vector = self._resource_vector
+        reach._resource_vector_state = self._resource_vector_state
+        # Entries are only added for the same connections key, so it's fine for all copies to share it
+        reach._potential_nodes_cache = self._potential_nodes_cache
+        reach._potential_nodes_key = self._potential_nodes_key
         return reach
 
     def __init__(self,
@@ -75,9 +137,37 @@ class OldGeneratorReach(GeneratorReach):
         self._state = state
         self._digraph = graph
         self._unreachable_paths = {}
-        self._reachable_paths = None
+        self._unreachable_path_order = {}
+        self._unreachable_paths_by_slot = {}
+        self._owned_slot_paths = set()
+        self._energy_dependent_paths = set()
+        self._reachable_costs = None
+        self._safe_nodes = None
+        self._new_edges = []
         self._node_reachable_cache = {}
-        self._is_node_safe_cache = {}
+        self._potential_nodes_cache = {}
+
+    def __getstate__(self):
+        # Resource slots are only valid in the process that assigned them, so everything indexed by them is
+        # recalculated by the process that unpickles this reach
+        return {key: value for key, value in self.__dict__.items()
+                if key not in ("_resource_vector", "_resource_vector_state", "_unreachable_paths_by_slot",
+                               "_owned_slot_paths", "_potential_nodes_cache", "_potential_nodes_key")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._potential_nodes_cache = {}
+        self._unreachable_paths_by_slot = {}
+        self._owned_slot_paths = set()
+        for edge, requirement in self._unreachable_paths.items():
+            for resource in requirement.dependencies()[0]:
+                self._paths_of_slot(resource_slot(resource)).add(edge)
+
+    def _state_resource_vector(self) -> ResourceVector:
+        if self._resource_vector_state is not self._state:
+            self._resource_vector = convert_resources_to_vector(self._state.resources)
+            self._resource_vector_state = self._state
+        return self._resource_vector
 
     @classmethod
     def reach_from_state(cls,
@@ -89,14 +179,36 @@ class OldGeneratorReach(GeneratorReach):
         reach._expand_graph([GraphPath(None, initial_state.node, RequirementSet.trivial())])
         return reach
 
-    def _potential_nodes_from(self, node: Node) -> Iterator[Tuple[Node, RequirementSet]]:
+    def _potential_nodes_from(self, node: Node) -> Tuple[Tuple[Node, RequirementSet], ...]:
+        """
+        All nodes we can go from the given node, with the RequirementSet for doing so.
+        These are kept for as long as the connections stay the same, so expanding the graph is only lookups.
+        """
+        result = self._potential_nodes_cache.get(node)
+        if result is None:
+            result = tuple(self._calculate_potential_nodes_from(node))
+            self._potential_nodes_cache[node] = result
+        return result
+
+    def _refresh_potential_nodes_cache(self):
+        key = _connections_key(self._state)
+        if self._potential_nodes_key is None or not _same_connections_key(self._potential_nodes_key, key):
+            self._potential_nodes_cache = {}
+            self._potential_nodes_key = key
+
+    def _calculate_potential_nodes_from(self, node: Node) -> Iterator[Tuple[Node, RequirementSet]]:
         extra_requirement = _extra_requirement_for_node(self._game, node)
         requirement_to_leave = node.requirement_to_leave(self._state.patches, self._state.resources)
+        condensed_graph = self._game.world_list.condensed_graph
 
         for target_node, requirement in self._game.world_list.potential_nodes_from(node, self.state.patches):
             if target_node is None:
                 continue
 
+            if condensed_graph.is_internal(node, target_node):
+                # Added together with the rest of the group
+                continue
+
             if requirement_to_leave != Requirement.trivial():
                 requirement = RequirementAnd([requirement, requirement_to_leave])
 
@@ -106,8 +218,20 @@ class OldGeneratorReach(GeneratorReach):
             yield target_node, requirement.as_set(self._state.resource_database)
 
     def _expand_graph(self, paths_to_check: List[GraphPath]):
+        with profiling_lib.phase("reach_expansion"):
+            self._inner_expand_graph(paths_to_check)
+
+    def _inner_expand_graph(self, paths_to_check: List[GraphPath]):
         # print("!! _expand_graph", len(paths_to_check))
-        self._reachable_paths = None
+        self._reachable_costs = None
+        vector = self._state_resource_vector()
+        resources = self._state.resources
+        energy = self._state.energy
+        database = self._state.resource_database
+        evaluations = 0
+        self._refresh_potential_nodes_cache()
+        condensed_graph = self._game.world_list.condensed_graph
+
         while paths_to_check:
             path = paths_to_check.pop(0)
 
@@ -116,18 +240,79 @@ class OldGeneratorReach(GeneratorReach):
                 continue
 
             # print(">>> will check starting at", self.game.world_list.node_name(path.node))
+            first_visit = path.node.index not in self._digraph
             path.add_to_graph(self._digraph)
+            if path.previous_node is not None:
+                self._new_edges.append((path.previous_node.index, path.node.index))
 
-            for target_node, requirement in self._potential_nodes_from(path.node):
-                if requirement.satisfied(self._state.resources, self._state.energy, self._state.resource_database):
-                    # print("* Queue path to", self.game.world_list.node_name(target_node))
-                    paths_to_check.append(GraphPath(path.node, target_node, requirement))
-                else:
-                    # print("* Unreachable", self.game.world_list.node_name(target_node), requirement)
-                    self._unreachable_paths[path.node, target_node] = requirement
+            group = condensed_graph.group_of(path.node)
+            if first_visit and len(group) > 1:
+                # The entire group is reachable, with trivial connections between them
+                self._add_group_to_graph(group)
+            else:
+                group = (path.node,)
+
+            for source in group:
+                for target_node, requirement in self._potential_nodes_from(source):
+                    evaluations += 1
+                    if requirement.compiled().satisfied(vector, resources, energy, database):
+                        # print("* Queue path to", self.game.world_list.node_name(target_node))
+                        paths_to_check.append(GraphPath(source, target_node, requirement))
+                    else:
+                        # print("* Unreachable", self.game.world_list.node_name(target_node), requirement)
+                        self._add_unreachable_path((source.index, target_node.index), requirement)
             # print("> done")
 
-        self._safe_nodes = None
+        self._safe_nodes_outdated = True
+        profiling_lib.increment("requirement_evaluations", evaluations)
+
+    def _paths_of_slot(self, slot: int) -> Set[Tuple[int, int]]:
+        """
+        The unreachable paths that depend on the given slot. Copies share these sets until one of them changes it.
+        """
+        paths = self._unreachable_paths_by_slot.get(slot)
+        if slot not in self._owned_slot_paths:
+            paths = set(paths) if paths is not None else set()
+            self._unreachable_paths_by_slot[slot] = paths
+            self._owned_slot_paths.add(slot)
+        return paths
+
+    def _unindex_unreachable_path(self, edge: Tuple[int, int], requirement: RequirementSet):
+        resources, uses_energy = requirement.dependencies()
+        if uses_energy:
+            self._energy_dependent_paths.discard(edge)
+        for resource in resources:
+            self._paths_of_slot(resource_slot(resource)).discard(edge)
+
+    def _add_unreachable_path(self, edge: Tuple[int, int], requirement: RequirementSet):
+        old_requirement = self._unreachable_paths.get(edge)
+        if old_requirement is None:
+            # Replacing the requirement of a path keeps its place, like the dict does
+            self._unreachable_path_order[edge] = self._next_unreachable_path_order
+            self._next_unreachable_path_order += 1
+        else:
+            self._unindex_unreachable_path(edge, old_requirement)
+
+        self._unreachable_paths[edge] = requirement
+        resources, uses_energy = requirement.dependencies()
+        if uses_energy:
+            self._energy_dependent_paths.add(edge)
+        for resource in resources:
+            self._paths_of_slot(resource_slot(resource)).add(edge)
+
+    def _remove_unreachable_path(self, edge: Tuple[int, int]):
+        self._unindex_unreachable_path(edge, self._unreachable_paths.pop(edge))
+        del self._unreachable_path_order[edge]
+
+    def _add_group_to_graph(self, group: Tuple[Node, ...]):
+        condensed_graph = self._game.world_list.condensed_graph
+        trivial = RequirementSet.trivial()
+        for node in group:
+            self._digraph.add_node(node.index)
+        for node in group:
+            for target_node in condensed_graph.internal_connections(node):
+                self._digraph.add_edge(node.index, target_node.index, requirement=trivial)
+                self._new_edges.append((node.index, target_node.index))
 
     def _can_advance(self,
                      node: Node,
@@ -144,30 +329,61 @@ class OldGeneratorReach(GeneratorReach):
             return True
 
     def _calculate_safe_nodes(self):
-        if self._safe_nodes is not None:
+        """
+        The safe nodes are the strongly connected component of the graph with the state's node.
+        As long as edges are only added and the state's node stays in it, it only grows: the new safe nodes are
+        the connected nodes that weren't safe, but can now reach a safe node.
+        """
+        if self._safe_nodes is not None and not self._safe_nodes_outdated:
             return
 
-        for component in self._digraph.strongly_connected_components():
-            if self._state.node.index in component:
-                assert self._safe_nodes is None
-                self._safe_nodes = component
-
-        assert self._safe_nodes is not None
+        root = self._state.node.index
+        new_edges = self._new_edges
+        self._new_edges = []
+        self._safe_nodes_outdated = False
+
+        if self._safe_nodes is None or self._removed_edges or root not in self._safe_nodes:
+            self._removed_edges = False
+            connected = self._digraph.nodes_reachable_from((root,), frozenset())
+            connected.discard(root)
+            self._safe_nodes = frozenset()
+            self._unsafe_connected_nodes = frozenset(connected)
+            self._grow_safe_nodes({root})
+            return
 
-    def _calculate_reachable_paths(self):
-        if self._reachable_paths is not None:
+        safe_nodes = self._safe_nodes
+        unsafe_nodes = self._unsafe_connected_nodes
+        newly_connected = self._digraph.nodes_reachable_from(
+            (target for source, target in new_edges
+             if source in safe_nodes or source in unsafe_nodes),
+            safe_nodes | unsafe_nodes,
+        )
+        if newly_connected:
+            self._unsafe_connected_nodes = unsafe_nodes | newly_connected
+
+        # The last edge of a path from a new safe node to the old ones is either new, or starts at a node that just
+        # got connected. Otherwise, that node would have been safe already.
+        if (any(target in safe_nodes for _, target in new_edges)
+                or self._digraph.nodes_reaching(safe_nodes, newly_connected)):
+            self._grow_safe_nodes(set())
+
+    def _grow_safe_nodes(self, new_safe_nodes: Set[int]):
+        new_safe_nodes.update(self._digraph.nodes_reaching(self._safe_nodes | new_safe_nodes,
+                                                           self._unsafe_connected_nodes - new_safe_nodes))
+        if new_safe_nodes:
+            self._safe_nodes = self._safe_nodes | new_safe_nodes
+            self._unsafe_connected_nodes = self._unsafe_connected_nodes - new_safe_nodes
+
+    def _calculate_reachable_costs(self):
+        if self._reachable_costs is not None:
             return
 
         all_nodes = self.all_nodes
 
-        def weight(source: int, target: int, attributes):
-            if self._can_advance(all_nodes[target]):
-                return 0
-            else:
-                return 1
+        def can_advance(target: int) -> bool:
+            return self._can_advance(all_nodes[target])
 
-        self._reachable_costs, self._reachable_paths = self._digraph.multi_source_dijkstra({self.state.node.index},
-                                                                                           weight=weight)
+        self._reachable_costs = self._digraph.multi_source_zero_one_bfs({self.state.node.index}, can_advance)
 
     def is_reachable_node(self, node: Node) -> bool:
         index = node.index
@@ -176,7 +392,7 @@ class OldGeneratorReach(GeneratorReach):
         if cached_value is not None:
             return cached_value
 
-        self._calculate_reachable_paths()
+        self._calculate_reachable_costs()
 
         cost = self._reachable_costs.get(index)
         if cost is not None:
@@ -197,9 +413,9 @@ class OldGeneratorReach(GeneratorReach):
         An iterator of all nodes there's an path from the reach's starting point. Similar to is_reachable_node
         :return:
         """
-        self._calculate_reachable_paths()
+        self._calculate_reachable_costs()
         all_nodes = self.all_nodes
-        for index in self._reachable_paths.keys():
+        for index in self._reachable_costs.keys():
             yield all_nodes[index]
 
     @property
@@ -222,52 +438,66 @@ class OldGeneratorReach(GeneratorReach):
 
     @property
     def safe_nodes(self) -> Iterator[Node]:
-        for node in self.nodes:
-            if self.is_safe_node(node):
-                yield node
+        self._calculate_safe_nodes()
+        all_nodes = self.all_nodes
+        for index in sorted(self._safe_nodes):
+            yield all_nodes[index]
 
     def is_safe_node(self, node: Node) -> bool:
-        is_safe = self._is_node_safe_cache.get(node)
-        if is_safe is not None:
-            return is_safe
-
         self._calculate_safe_nodes()
-        self._is_node_safe_cache[node] = node.index in self._safe_nodes
-        return self._is_node_safe_cache[node]
+        return node.index in self._safe_nodes
 
     def advance_to(self, new_state: State,
                    is_safe: bool = False,
                    ) -> None:
-        assert new_state.previous_state == self.state
+        assert new_state.follows(self.state)
         # assert self.is_reachable_node(new_state.node)
 
+        if self._shares_dicts:
+            self._node_reachable_cache = copy.copy(self._node_reachable_cache)
+            self._unreachable_paths = copy.copy(self._unreachable_paths)
+            self._unreachable_path_order = copy.copy(self._unreachable_path_order)
+            self._energy_dependent_paths = copy.copy(self._energy_dependent_paths)
+            # The sets of paths of each slot are only copied when this reach changes them
+            self._unreachable_paths_by_slot = copy.copy(self._unreachable_paths_by_slot)
+            self._owned_slot_paths = set()
+            self._shares_dicts = False
+
         if is_safe or self.is_safe_node(new_state.node):
             for index in [index for index, flag in self._node_reachable_cache.items()
                           if not flag]:
                 del self._node_reachable_cache[index]
-
-            for node in [node for node, flag in self._is_node_safe_cache.items()
-                         if not flag]:
-                del self._is_node_safe_cache[node]
         else:
             self._node_reachable_cache = {}
-            self._is_node_safe_cache = {}
 
+        old_vector = self._state_resource_vector()
         self._state = new_state
+        vector = self._state_resource_vector()
 
         paths_to_check: List[GraphPath] = []
 
+        # Check if we can expand the corners of our graph. Paths that were unreachable stay unreachable unless
+        # something their requirement depends on changed.
+        to_check = set(self._energy_dependent_paths)
+        for slot in _changed_slots(old_vector, vector):
+            to_check.update(self._unreachable_paths_by_slot.get(slot, ()))
+
         edges_to_remove = []
-        # Check if we can expand the corners of our graph
-        # TODO: check if expensive. We filter by only nodes that depends on a new resource
-        for edge, requirement in self._unreachable_paths.items():
-            if requirement.satisfied(self._state.resources, self._state.energy, self._state.resource_database):
-                from_node, to_node = edge
-                paths_to_check.append(GraphPath(from_node, to_node, requirement))
+        evaluations = 0
+        all_nodes = self.all_nodes
+        # Paths are checked in the order they became unreachable, as the order matters for the filler
+        for edge in sorted(to_check, key=self._unreachable_path_order.__getitem__):
+            requirement = self._unreachable_paths[edge]
+            evaluations += 1
+            if requirement.compiled().satisfied(vector, self._state.resources, self._state.energy,
+                                                self._state.resource_database):
+                from_index, to_index = edge
+                paths_to_check.append(GraphPath(all_nodes[from_index], all_nodes[to_index], requirement))
                 edges_to_remove.append(edge)
 
         for edge in edges_to_remove:
-            del self._unreachable_paths[edge]
+            self._remove_unreachable_path(edge)
+        profiling_lib.increment("requirement_evaluations", evaluations)
 
         self._expand_graph(paths_to_check)
 
@@ -290,12 +520,16 @@ class OldGeneratorReach(GeneratorReach):
 
             for edge in edges_to_remove:
                 self._digraph.remove_edge(*edge)
+            if edges_to_remove:
+                self._removed_edges = True
 
         self.advance_to(new_state)
 
     def unreachable_nodes_with_requirements(self) -> Dict[Node, RequirementSet]:
         results = {}
-        for (_, node), requirement in self._unreachable_paths.items():
+        all_nodes = self.all_nodes
+        for (_, index), requirement in self._unreachable_paths.items():
+            node = all_nodes[index]
             if self.is_reachable_node(node):
                 continue
             requirements = requirement.patch_requirements(self.state.resources, self.state.resource_database)
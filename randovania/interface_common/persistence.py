@@ -10,6 +10,10 @@ def local_data_dir() -> Path:
     return Path(local_dirs.user_data_dir)
 
 
+def local_cache_dir() -> Path:
+    return Path(local_dirs.user_cache_dir)
+
+
 def roaming_data_dir() -> Path:
     return Path(roaming_dirs.user_config_dir)
 
@@ -0,0 +1,167 @@
+import contextlib
+import dataclasses
+import time
+from typing import ContextManager, Dict, Iterator, Optional, Union
+
+
+@dataclasses.dataclass()
+class PhaseTiming:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    @property
+    def as_json(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+
+class Profile:
+    """
+    Timing of each phase and how many times each counted operation happened, while this profile was active.
+    Phases can be nested, in which case the time of the inner phases is also included in the outer one.
+    Work done in other processes, such as the filler's weighting processes, is not included unless merged with
+    `merge_json`, which parallel generation attempts do. The phases of these can add up to more than the total.
+    """
+    phases: Dict[str, PhaseTiming]
+    counters: Dict[str, int]
+    total: float
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.total = 0.0
+
+    def add_timing(self, name: str, duration: float):
+        timing = self.phases.get(name)
+        if timing is None:
+            timing = self.phases[name] = PhaseTiming()
+        timing.add(duration)
+
+    def increment(self, name: str, amount: int):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge_json(self, data: dict):
+        """
+        Adds the phases and counters of a profile, as returned by `as_json`, to this one.
+        """
+        for name, timing_data in data["phases"].items():
+            timing = self.phases.get(name)
+            if timing is None:
+                timing = self.phases[name] = PhaseTiming()
+            timing.count += timing_data["count"]
+            timing.total += timing_data["total"]
+            timing.max = max(timing.max, timing_data["max"])
+
+        for name, amount in data["counters"].items():
+            self.increment(name, amount)
+
+    @property
+    def as_json(self) -> dict:
+        return {
+            "total": self.total,
+            "phases": {
+                name: timing.as_json
+                for name, timing in sorted(self.phases.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+_current_profile: Optional[Profile] = None
+
+
+def current_profile() -> Optional[Profile]:
+    return _current_profile
+
+
+@contextlib.contextmanager
+def profile() -> Iterator[Profile]:
+    """
+    Activates a new Profile, that collects all phases and counters until the context exits.
+    """
+    global _current_profile
+    previous = _current_profile
+    result = Profile()
+    _current_profile = result
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.total = time.perf_counter() - start
+        _current_profile = previous
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "start_time")
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def start(self) -> "_Phase":
+        self.start_time = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.profile.add_timing(self.name, time.perf_counter() - self.start_time)
+
+    def __enter__(self):
+        self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def start(self) -> "_NoPhase":
+        return self
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+# Used for every phase when there's no active profile, so these cost next to nothing
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str) -> ContextManager[None]:
+    """
+    Times the code inside the context as the given phase, if there's an active profile.
+    """
+    current = _current_profile
+    if current is None:
+        return _NO_PHASE
+    return _Phase(current, name)
+
+
+def start_phase(name: str) -> Union[_Phase, _NoPhase]:
+    """
+    Starts timing the given phase, if there's an active profile, until `stop` is called on the result.
+    For code that can't be moved inside a `phase` context.
+    """
+    return phase(name).start()
+
+
+def increment(name: str, amount: int = 1):
+    """
+    Increments the given counter, if there's an active profile.
+    """
+    if _current_profile is not None:
+        _current_profile.increment(name, amount)
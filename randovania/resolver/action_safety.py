@@ -0,0 +1,95 @@
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.resources.resource_info import ResourceInfo
+from randovania.game_description.world.node import Node, ResourceNode, EventNode, PickupNode
+from randovania.resolver.event_pickup import EventPickupNode
+from randovania.resolver.state import State
+
+
+def _pickup_node_for(action: ResourceNode) -> Optional[PickupNode]:
+    if isinstance(action, EventPickupNode):
+        return action.pickup_node
+    if isinstance(action, PickupNode):
+        return action
+    return None
+
+
+class ActionSafetyTable:
+    """
+    What the resolver needs to know about each resource node to decide if collecting it might be safe.
+    These only depend on the game and the patches, so each node is only looked at once.
+    """
+    game: GameDescription
+    patches: GamePatches
+    _entries: Dict[Node, Tuple[bool, FrozenSet[ResourceInfo]]]
+
+    def __init__(self, game: GameDescription, patches: GamePatches):
+        self.game = game
+        self.patches = patches
+        self._entries = {}
+
+    def _possible_gain(self, action: ResourceNode) -> Set[ResourceInfo]:
+        """
+        All resources that collecting the given candidate could ever give, which might be more than it
+        actually gives with some resources.
+        """
+        result = set()
+        if isinstance(action, EventPickupNode):
+            result.add(action.event_node.event)
+        elif isinstance(action, EventNode):
+            result.add(action.event)
+
+        pickup_node = _pickup_node_for(action)
+        if pickup_node is not None:
+            result.add(pickup_node.pickup_index)
+            target = self.patches.pickup_assignment.get(pickup_node.pickup_index)
+            if target is not None and target.player == self.patches.player_index:
+                pickup = target.pickup
+                result.update(resource for resource, _ in pickup.all_resources)
+                if pickup.resource_lock is not None:
+                    result.add(pickup.resource_lock.temporary_item)
+                    result.add(pickup.resource_lock.item_to_lock)
+
+        return result
+
+    def _entry(self, action: ResourceNode) -> Tuple[bool, FrozenSet[ResourceInfo]]:
+        entry = self._entries.get(action)
+        if entry is None:
+            if isinstance(action, EventNode):
+                candidate = True
+            else:
+                pickup_node = _pickup_node_for(action)
+                target = None
+                if pickup_node is not None:
+                    target = self.patches.pickup_assignment.get(pickup_node.pickup_index)
+                candidate = target is not None and (target.pickup.item_category.is_major_category
+                                                    or target.pickup.item_category.is_key)
+
+            if candidate:
+                dangerous = frozenset(self._possible_gain(action) & self.game.dangerous_resources)
+            else:
+                dangerous = frozenset()
+
+            entry = (candidate, dangerous)
+            self._entries[action] = entry
+
+        return entry
+
+    def should_check_if_safe(self, state: State, action: ResourceNode) -> bool:
+        """
+        If the resolver should check if collecting the given action in the given state is safe.
+        Only events and major or key pickups are, and only if they don't give a dangerous resource.
+        """
+        candidate, dangerous = self._entry(action)
+        if not candidate:
+            return False
+
+        if not dangerous:
+            return True
+
+        return not any(resource in dangerous
+                       for resource, _ in action.resource_gain_on_collect(state.patches, state.resources,
+                                                                          self.game.world_list.all_nodes,
+                                                                          state.resource_database))
@@ -5,7 +5,7 @@ from typing import Tuple
 from randovania.game_description import default_database
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.game_patches import GamePatches
-from randovania.game_description.requirements import ResourceRequirement
+from randovania.game_description.requirements import ResourceRequirement, resolve_templates
 from randovania.game_description.resources.damage_resource_info import DamageReduction
 from randovania.game_description.resources.resource_database import ResourceDatabase
 from randovania.game_description.resources.resource_info import CurrentResources, \
@@ -117,7 +117,8 @@ def _add_minimal_logic_initial_resources(resources: CurrentResources,
             resources[item] = custom_item_count.get(item.index, 1)
 
 
-def calculate_starting_state(game: GameDescription, patches: GamePatches, energy_per_tank: int) -> "State":
+def calculate_starting_state(game: GameDescription, patches: GamePatches, energy_per_tank: int,
+                             keep_history: bool = True) -> "State":
     starting_node = game.world_list.resolve_teleporter_connection(patches.starting_location)
     initial_resources = copy.copy(patches.starting_items)
 
@@ -143,6 +144,7 @@ def calculate_starting_state(game: GameDescription, patches: GamePatches, energy
             game.resource_database,
             game.world_list,
             energy_per_tank,
+            keep_history,
         )
     )
 
@@ -265,25 +267,29 @@ def patch_resource_database(db: ResourceDatabase, configuration: AnyGameConfigur
             DamageReduction(db.get_item_by_name("Light Suit"), 0.0),
         ]
 
-    return dataclasses.replace(db, damage_reductions=damage_reductions, base_damage_reduction=base_damage_reduction,
-                               requirement_template=requirement_template)
+    new_db = dataclasses.replace(db, damage_reductions=damage_reductions, base_damage_reduction=base_damage_reduction,
+                                 requirement_template=requirement_template)
+    resolve_templates(new_db.requirement_template.values(), new_db)
+    return new_db
 
 
 def logic_bootstrap(configuration: AnyGameConfiguration,
                     game: GameDescription,
                     patches: GamePatches,
+                    keep_history: bool = True,
                     ) -> Tuple[GameDescription, State]:
     """
     Core code for starting a new Logic/State.
     :param configuration:
     :param game:
     :param patches:
+    :param keep_history: If the states created from the starting state should keep a reference to the previous one.
     :return:
     """
     if not game.mutable:
         raise ValueError("Running logic_bootstrap with non-mutable game")
 
-    starting_state = calculate_starting_state(game, patches, configuration.energy_per_tank)
+    starting_state = calculate_starting_state(game, patches, configuration.energy_per_tank, keep_history)
 
     if configuration.trick_level.minimal_logic:
         _add_minimal_logic_initial_resources(starting_state.resources,
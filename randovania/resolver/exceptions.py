@@ -29,3 +29,12 @@ class ImpossibleForSolver(Exception):
 
 class InvalidConfiguration(Exception):
     pass
+
+
+class ExpansionBudgetExhausted(Exception):
+    def __init__(self, max_expansions: int):
+        super().__init__(f"Expanded the maximum of {max_expansions} states")
+        self.max_expansions = max_expansions
+
+    def __reduce__(self):
+        return ExpansionBudgetExhausted, (self.max_expansions,)
@@ -0,0 +1,34 @@
+from typing import Callable, Dict
+
+from randovania.game_description.world.node import PickupNode
+from randovania.resolver.event_pickup import EventPickupNode
+from randovania.resolver.logic import Logic
+from randovania.resolver.resolver_reach import ResolverReach
+from randovania.resolver.state import State
+
+# Lower values are explored first.
+Heuristic = Callable[[State, ResolverReach, Logic], float]
+
+
+def reachable_nodes(state: State, reach: ResolverReach, logic: Logic) -> float:
+    """
+    Prefers states with more resources, then the ones that can reach more of the game.
+    The victory condition is usually only satisfied from the last areas, so these are closer to it.
+    """
+    reachable = sum(1 for _ in reach.nodes)
+    return -len(state.resources) - reachable / (len(logic.game.world_list.all_nodes) + 1)
+
+
+def pickup_nodes(state: State, reach: ResolverReach, logic: Logic) -> float:
+    """
+    Prefers states with more resources, then the ones with more pickups that can be collected.
+    """
+    collectable = sum(1 for node in reach.collectable_resource_nodes(state)
+                      if isinstance(node, (PickupNode, EventPickupNode)))
+    return -len(state.resources) - collectable / (len(logic.game.world_list.all_nodes) + 1)
+
+
+HEURISTICS: Dict[str, Heuristic] = {
+    "reachable-nodes": reachable_nodes,
+    "pickup-nodes": pickup_nodes,
+}
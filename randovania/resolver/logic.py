@@ -1,9 +1,13 @@
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
 
 from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.resources.resource_info import ResourceInfo
 from randovania.game_description.world.node import Node
 from randovania.game_description.requirements import RequirementSet
 from randovania.layout.prime2.echoes_configuration import EchoesConfiguration
+from randovania.resolver.action_safety import ActionSafetyTable
 
 
 class Logic:
@@ -12,11 +16,57 @@ class Logic:
     game: GameDescription
     configuration: EchoesConfiguration
     additional_requirements: Dict[Node, RequirementSet]
+    nodes_by_additional_resource: Dict[ResourceInfo, Set[Node]]
+    _additional_resources: Dict[Node, Tuple[RequirementSet, Optional[FrozenSet[ResourceInfo]]]]
+    _action_safety: Optional[ActionSafetyTable] = None
 
     def __init__(self, game: GameDescription, configuration: EchoesConfiguration):
         self.game = game
         self.configuration = configuration
         self.additional_requirements = {}
+        self.nodes_by_additional_resource = defaultdict(set)
+        self._additional_resources = {}
+
+    def without_additional_requirements(self) -> "Logic":
+        """
+        A Logic for the same game and patches, that hasn't learned any additional requirements yet.
+        """
+        result = Logic(self.game, self.configuration)
+        result._action_safety = self._action_safety
+        return result
 
     def get_additional_requirements(self, node: Node) -> RequirementSet:
         return self.additional_requirements.get(node, RequirementSet.trivial())
+
+    def additional_requirements_resources(self, node: Node) -> Optional[FrozenSet[ResourceInfo]]:
+        """
+        The resources that the current additional requirements of the given node depend on,
+        or None if they also depend on the energy.
+        Every resource returned is also indexed in nodes_by_additional_resource. Nodes are never removed from it,
+        so it can have nodes whose requirements no longer depend on that resource.
+        """
+        requirements = self.get_additional_requirements(node)
+        known = self._additional_resources.get(node)
+        if known is not None and known[0] is requirements:
+            return known[1]
+
+        resources = set()
+        uses_energy = False
+        for individual in requirements.all_individual:
+            resources.add(individual.resource)
+            uses_energy = uses_energy or individual.is_damage
+
+        for resource in resources:
+            self.nodes_by_additional_resource[resource].add(node)
+
+        result = None if uses_energy else frozenset(resources)
+        self._additional_resources[node] = (requirements, result)
+        return result
+
+    def action_safety(self, patches: GamePatches) -> ActionSafetyTable:
+        """
+        The ActionSafetyTable of this game with the given patches. It's kept for as long as the same patches are used.
+        """
+        if self._action_safety is None or self._action_safety.patches is not patches:
+            self._action_safety = ActionSafetyTable(self.game, patches)
+        return self._action_safety
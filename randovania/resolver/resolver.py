@@ -1,19 +1,29 @@
 import asyncio
+import concurrent.futures
 import copy
-from typing import Optional, Tuple, Callable, FrozenSet
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor
+from typing import Optional, Tuple, Callable, FrozenSet, Dict, List, Iterator, Hashable, Iterable
 
 from randovania.game_description import default_database
+from randovania.game_description.assignment import PickupTarget
 from randovania.game_description.game_patches import GamePatches
-from randovania.game_description.world.node import PickupNode, ResourceNode, EventNode, Node
+from randovania.game_description.world.node import PickupNode, ResourceNode, Node
 from randovania.game_description.requirements import RequirementSet, RequirementList
 from randovania.game_description.resources.resource_info import ResourceInfo
 from randovania.layout.prime2.echoes_configuration import EchoesConfiguration
-from randovania.resolver import debug, event_pickup, bootstrap
+from randovania.resolver import debug, event_pickup, bootstrap, heuristics
 from randovania.resolver.bootstrap import logic_bootstrap
 from randovania.resolver.event_pickup import EventPickupNode
 from randovania.resolver.logic import Logic
 from randovania.resolver.resolver_reach import ResolverReach
+from randovania.resolver.resolver_stats import ResolverStats
 from randovania.resolver.state import State
+from randovania.resolver.transposition_table import TranspositionTable, DeadEnd, state_key, pack_resources
 
 
 def _simplify_requirement_list(self: RequirementList, state: State,
@@ -49,70 +59,61 @@ def _simplify_additional_requirement_set(requirements: RequirementSet,
                           if alternative is not None)
 
 
-def _should_check_if_action_is_safe(state: State,
-                                    action: ResourceNode,
-                                    dangerous_resources: FrozenSet[ResourceInfo],
-                                    all_nodes: Tuple[Node, ...]) -> bool:
-    """
-    Determines if we should _check_ if the given action is safe that state
-    :param state:
-    :param action:
-    :return:
-    """
-    if any(resource in dangerous_resources
-           for resource in action.resource_gain_on_collect(state.patches, state.resources, all_nodes,
-                                                           state.resource_database)):
-        return False
-
-    if isinstance(action, EventNode):
-        return True
-
-    if isinstance(action, EventPickupNode):
-        pickup_node = action.pickup_node
-    else:
-        pickup_node = action
-
-    if isinstance(pickup_node, PickupNode):
-        target = state.patches.pickup_assignment.get(pickup_node.pickup_index)
-        if target is not None and (target.pickup.item_category.is_major_category or target.pickup.item_category.is_key):
-            return True
-
-    return False
+def _calculate_reach(logic: Logic, state: State, previous_reach: Optional[ResolverReach],
+                     stats: ResolverStats) -> ResolverReach:
+    stats.reach_calculations += 1
+    return ResolverReach.calculate_reach(logic, state, previous_reach)
 
 
 async def _inner_advance_depth(state: State,
                                logic: Logic,
                                status_update: Callable[[str], None],
+                               transposition_table: TranspositionTable,
+                               stats: ResolverStats,
                                *,
+                               depth: int = 0,
                                reach: Optional[ResolverReach] = None,
+                               previous_reach: Optional[ResolverReach] = None,
                                ) -> Tuple[Optional[State], bool]:
     """
 
     :param state:
     :param logic:
     :param status_update:
+    :param transposition_table: The states that were already found to be dead ends.
+    :param stats: Where the work done is counted.
+    :param depth: How many actions were taken to reach the given state.
     :param reach: A precalculated reach for the given state
+    :param previous_reach: The reach of the state we came from, used to calculate the reach incrementally
     :return:
     """
 
     if logic.game.victory_condition.satisfied(state.resources, state.energy, state.resource_database):
         return state, True
 
+    key = state_key(state)
+    dead_end = transposition_table.get_dead_end(key, state.energy)
+    if dead_end is not None:
+        debug.log_skip_known_dead_end(state)
+        dead_end.restore_additional_requirements([logic])
+        stats.cache_hits += 1
+        return None, dead_end.has_action
+
     # Yield back to the asyncio runner, so cancel can do something
     await asyncio.sleep(0)
 
+    stats.expand(depth)
     if reach is None:
-        reach = ResolverReach.calculate_reach(logic, state)
+        reach = _calculate_reach(logic, state, previous_reach, stats)
 
     debug.log_new_advance(state, reach)
     status_update("Resolving... {} total resources".format(len(state.resources)))
 
     for action, energy in reach.possible_actions(state):
-        if _should_check_if_action_is_safe(state, action, logic.game.dangerous_resources,
-                                           logic.game.world_list.all_nodes):
+        if logic.action_safety(state.patches).should_check_if_safe(state, action):
 
             potential_state = state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy)
-            potential_reach = ResolverReach.calculate_reach(logic, potential_state)
+            potential_reach = _calculate_reach(logic, potential_state, reach, stats)
 
             # If we can go back to where we were, it's a simple safe node
             if state.node in potential_reach.nodes:
@@ -120,6 +121,9 @@ async def _inner_advance_depth(state: State,
                     state=potential_state,
                     logic=logic,
                     status_update=status_update,
+                    transposition_table=transposition_table,
+                    stats=stats,
+                    depth=depth + 1,
                     reach=potential_reach,
                 )
 
@@ -127,6 +131,8 @@ async def _inner_advance_depth(state: State,
                     debug.log_rollback(state, True, True)
 
                 # If a safe node was a dead end, we're certainly a dead end as well
+                if new_result[0] is None:
+                    transposition_table.add_dead_end(key, DeadEnd(state.energy, new_result[1], ()))
                 return new_result
 
     debug.log_checking_satisfiable_actions()
@@ -136,6 +142,10 @@ async def _inner_advance_depth(state: State,
             state=state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy),
             logic=logic,
             status_update=status_update,
+            transposition_table=transposition_table,
+            stats=stats,
+            depth=depth + 1,
+            previous_reach=reach,
         )
 
         # We got a positive result. Send it back up
@@ -145,6 +155,7 @@ async def _inner_advance_depth(state: State,
             has_action = True
 
     debug.log_rollback(state, has_action, False)
+    stats.backtracks += 1
     additional_requirements = reach.satisfiable_as_requirement_set
 
     if has_action:
@@ -157,24 +168,513 @@ async def _inner_advance_depth(state: State,
     logic.additional_requirements[state.node] = _simplify_additional_requirement_set(additional_requirements,
                                                                                      state,
                                                                                      logic.game.dangerous_resources)
+    transposition_table.add_dead_end(key, DeadEnd(state.energy, has_action,
+                                                  ((state.node, logic.additional_requirements[state.node]),)))
     return None, has_action
 
 
-async def advance_depth(state: State, logic: Logic, status_update: Callable[[str], None]) -> Optional[State]:
-    return (await _inner_advance_depth(state, logic, status_update))[0]
+async def advance_depth(state: State, logic: Logic, status_update: Callable[[str], None],
+                        transposition_table: Optional[TranspositionTable] = None,
+                        stats: Optional[ResolverStats] = None) -> Optional[State]:
+    if transposition_table is None:
+        transposition_table = TranspositionTable()
+    if stats is None:
+        stats = ResolverStats()
+    return (await _inner_advance_depth(state, logic, status_update, transposition_table, stats))[0]
+
+
+def _next_states(state: State, logic: Logic, reach: ResolverReach, stats: ResolverStats,
+                 ) -> List[Tuple[State, Optional[ResolverReach]]]:
+    """
+    The states the search can go to from the given state, with their reach when already calculated.
+    Same as the depth-first search, when there's a safe action it's the only option.
+    """
+    for action, energy in reach.possible_actions(state):
+        if logic.action_safety(state.patches).should_check_if_safe(state, action):
+            potential_state = state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy)
+            potential_reach = _calculate_reach(logic, potential_state, reach, stats)
+
+            # If we can go back to where we were, it's a simple safe node
+            if state.node in potential_reach.nodes:
+                return [(potential_state, potential_reach)]
+
+    return [
+        (state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy), None)
+        for action, energy in reach.satisfiable_actions(state, logic.game.victory_condition)
+    ]
+
+
+def _best_first_priority(state: State, heuristic_value: float) -> Tuple[float, int]:
+    # The heuristic decides the order. Between states it considers equal, the ones with more resources are
+    # deeper in the search, as every action collects at least one new resource.
+    return heuristic_value, -len(state.resources)
+
+
+async def advance_best_first(state: State, logic: Logic, status_update: Callable[[str], None],
+                             heuristic: heuristics.Heuristic,
+                             stats: Optional[ResolverStats] = None) -> Optional[State]:
+    """
+    Searches for a state that satisfies the victory condition using a priority queue, instead of following the
+    order of the nodes. The heuristic decides which state is explored first, then the states with more resources.
+    Remaining ties are broken by exploring the most recent state first.
+    New states are queued with the heuristic value using the reach of the state they came from. Their reach and
+    actual heuristic value are only calculated when they're first taken from the queue, as most states are never taken.
+    :param state:
+    :param logic:
+    :param status_update:
+    :param heuristic: Calculates the heuristic value of a state, with lower values explored first.
+    :param stats: Where the work done is counted.
+    :return:
+    """
+    if stats is None:
+        stats = ResolverStats()
+
+    victory_condition = logic.game.victory_condition
+    if victory_condition.satisfied(state.resources, state.energy, state.resource_database):
+        return state
+
+    # Keys: states already queued
+    # Value: the most energy they were queued with. The same state with less energy isn't any better.
+    queued: Dict[Hashable, int] = {state_key(state): state.energy}
+    counter = itertools.count()
+    reach = _calculate_reach(logic, state, None, stats)
+
+    # Each entry is the priority, the tiebreaker, the state, its reach if already calculated,
+    # the reach of the state it came from and how many actions were taken to reach it.
+    frontier = [(_best_first_priority(state, heuristic(state, reach, logic)), -next(counter), state, reach, None, 0)]
+
+    while frontier:
+        priority, tiebreaker, state, reach, previous_reach, depth = heapq.heappop(frontier)
+
+        if reach is None:
+            reach = _calculate_reach(logic, state, previous_reach, stats)
+            priority = _best_first_priority(state, heuristic(state, reach, logic))
+            if frontier and (priority, tiebreaker) > frontier[0][:2]:
+                # Worse than the state it came from, so another state might be better now
+                heapq.heappush(frontier, (priority, tiebreaker, state, reach, None, depth))
+                continue
+
+        # Yield back to the asyncio runner, so cancel can do something
+        await asyncio.sleep(0)
+
+        stats.expand(depth)
+
+        debug.log_new_advance(state, reach)
+        status_update("Resolving... {} total resources".format(len(state.resources)))
+
+        # Queued in reverse, so the first action is the first to be explored among ties
+        has_new_state = False
+        for new_state, new_reach in reversed(_next_states(state, logic, reach, stats)):
+            if victory_condition.satisfied(new_state.resources, new_state.energy, new_state.resource_database):
+                return new_state
+
+            key = state_key(new_state)
+            if queued.get(key, -1) >= new_state.energy:
+                stats.cache_hits += 1
+                continue
+            queued[key] = new_state.energy
+            has_new_state = True
+
+            heuristic_value = heuristic(new_state, new_reach if new_reach is not None else reach, logic)
+            heapq.heappush(frontier, (_best_first_priority(new_state, heuristic_value), -next(counter),
+                                      new_state, new_reach, reach, depth + 1))
+
+        if not has_new_state:
+            stats.backtracks += 1
+        debug.log_rollback(state, True, False)
+
+    return None
+
+
+def _pickup_target_for_other_player(state: State, action: ResourceNode) -> Optional[PickupTarget]:
+    """
+    The PickupTarget that collecting the given action delivers to another player, if any.
+    :param state:
+    :param action:
+    :return:
+    """
+    if isinstance(action, EventPickupNode):
+        pickup_node = action.pickup_node
+    else:
+        pickup_node = action
+
+    if isinstance(pickup_node, PickupNode):
+        target = state.patches.pickup_assignment.get(pickup_node.pickup_index)
+        if target is not None and target.player != state.patches.player_index:
+            return target
+
+    return None
+
+
+def _act_on_node_for_player(states: Tuple[State, ...], logics: Tuple[Logic, ...], player: int,
+                            action: ResourceNode, path: Tuple[Node, ...], energy: int) -> Tuple[State, ...]:
+    """
+    Creates the states after the given player collects action, including delivering the pickup to its owner.
+    """
+    state = states[player]
+    new_states = list(states)
+    new_states[player] = state.act_on_node(action, path=path, new_energy=energy)
+
+    victory_condition = logics[player].game.victory_condition
+    if (victory_condition.satisfied(new_states[player].resources, new_states[player].energy,
+                                    state.resource_database)
+            and not victory_condition.satisfied(state.resources, state.energy, state.resource_database)):
+        # Finishing the game usually leaves the player somewhere they can't leave, but they still
+        # have to collect the pickups of the other players.
+        new_states[player] = state.collect_resource_node(action, energy)
+
+    target = _pickup_target_for_other_player(states[player], action)
+    if target is not None:
+        new_states[target.player] = new_states[target.player].assign_pickup_resources(target.pickup)
+
+    return tuple(new_states)
+
+
+def _should_check_if_multiworld_action_is_safe(states: Tuple[State, ...], logics: Tuple[Logic, ...],
+                                               player: int, action: ResourceNode) -> bool:
+    """
+    Same as ActionSafetyTable.should_check_if_safe, but any pickup for another player is also checked, as receiving
+    a pickup is only harmful if it gives a dangerous resource.
+    """
+    state = states[player]
+    game = logics[player].game
+    if logics[player].action_safety(state.patches).should_check_if_safe(state, action):
+        return True
+
+    target = _pickup_target_for_other_player(state, action)
+    if target is None:
+        return False
+
+    if any(resource in game.dangerous_resources
+           for resource, _ in action.resource_gain_on_collect(state.patches, state.resources,
+                                                              game.world_list.all_nodes, state.resource_database)):
+        return False
+
+    target_state = states[target.player]
+    return not any(resource in logics[target.player].game.dangerous_resources
+                   for resource, _ in target.pickup.resource_gain(target_state.resources, force_lock=True))
+
+
+def _finished_players(states: Tuple[State, ...], logics: Tuple[Logic, ...]) -> List[bool]:
+    return [
+        logic.game.victory_condition.satisfied(state.resources, state.energy, state.resource_database)
+        for state, logic in zip(states, logics)
+    ]
+
+
+def _can_help_other_players(state: State, finished: List[bool]) -> bool:
+    """
+    Checks if the given state still has pickups to collect for any player that hasn't finished.
+    :param state:
+    :param finished: For each player, if they already satisfied their victory condition.
+    :return:
+    """
+    collected = set(state.collected_pickup_indices)
+    return any(
+        not finished[target.player] and index not in collected
+        for index, target in state.patches.pickup_assignment.items()
+        if target.player != state.patches.player_index
+    )
+
+
+def _reaches_for_new_states(states: Tuple[State, ...], new_states: Tuple[State, ...],
+                            reaches: Tuple[ResolverReach, ...]) -> Tuple[Optional[ResolverReach], ...]:
+    return tuple(
+        reach if new_state is state else None
+        for state, new_state, reach in zip(states, new_states, reaches)
+    )
+
+
+def _multiworld_satisfiable_actions(player: int,
+                                    states: Tuple[State, ...],
+                                    reaches: Tuple[ResolverReach, ...],
+                                    interesting_resources: List[FrozenSet[ResourceInfo]],
+                                    ) -> Iterator[Tuple[ResourceNode, int]]:
+    """
+    Like ResolverReach.satisfiable_actions, but also considers the actions that deliver a pickup with
+    resources interesting for the player that receives it.
+    """
+    state = states[player]
+    all_nodes = state.world_list.all_nodes
+
+    for action, energy in reaches[player].possible_actions(state):
+        if any(resource in interesting_resources[player]
+               for resource, _ in action.resource_gain_on_collect(state.patches, state.resources, all_nodes,
+                                                                  state.resource_database)):
+            yield action, energy
+            continue
+
+        target = _pickup_target_for_other_player(state, action)
+        if target is not None and any(
+                resource in interesting_resources[target.player]
+                for resource, _ in target.pickup.resource_gain(states[target.player].resources, force_lock=True)):
+            yield action, energy
+
+
+def _wake_delivery_target(sleeping: FrozenSet[int], state: State, action: ResourceNode) -> FrozenSet[int]:
+    """
+    The players still sleeping after the given state collects action, as a player wakes up when receiving a pickup.
+    """
+    target = _pickup_target_for_other_player(state, action)
+    if target is not None and target.player in sleeping:
+        return sleeping - {target.player}
+    return sleeping
+
+
+def _with_all_deliveries(player: int, states: Tuple[State, ...]) -> State:
+    """
+    The state of the given player after receiving every pickup the other players still have for them.
+    """
+    result = states[player]
+    for other_index, other_state in enumerate(states):
+        if other_index == player:
+            continue
+        collected = set(other_state.collected_pickup_indices)
+        for index, target in other_state.patches.pickup_assignment.items():
+            if target.player == player and index not in collected:
+                result = result.assign_pickup_resources(target.pickup)
+    return result
+
+
+def _can_never_finish(player: int, states: Tuple[State, ...], logics: Tuple[Logic, ...],
+                      reaches: Tuple[ResolverReach, ...], stats: ResolverStats) -> bool:
+    """
+    Checks if the given player, that hasn't finished, has nothing left to do even after receiving every pickup the
+    other players still have for them. Only pickups cross between games, so what the others do can't help them.
+    """
+    state, logic = states[player], logics[player]
+    victory_condition = logic.game.victory_condition
+    if any(True for _ in reaches[player].satisfiable_actions(state, victory_condition)):
+        return False
+
+    all_deliveries = _with_all_deliveries(player, states)
+    if all_deliveries is state:
+        return True
+
+    if victory_condition.satisfied(all_deliveries.resources, all_deliveries.energy, state.resource_database):
+        return False
+
+    reach = _calculate_reach(logic, all_deliveries, reaches[player], stats)
+    return not any(True for _ in reach.satisfiable_actions(all_deliveries, victory_condition))
+
+
+def _multiworld_state_key(states: Tuple[State, ...]) -> Hashable:
+    return tuple(
+        (state.node.index, state.energy, pack_resources(state.resources))
+        for state in states
+    )
+
+
+async def _inner_advance_depth_multiworld(states: Tuple[State, ...],
+                                          logics: Tuple[Logic, ...],
+                                          status_update: Callable[[str], None],
+                                          transposition_table: TranspositionTable,
+                                          stats: ResolverStats,
+                                          *,
+                                          depth: int = 0,
+                                          player: int = 0,
+                                          reaches: Optional[Tuple[Optional[ResolverReach], ...]] = None,
+                                          previous_reaches: Optional[Tuple[Optional[ResolverReach], ...]] = None,
+                                          sleeping: FrozenSet[int] = frozenset(),
+                                          ) -> Tuple[Optional[Tuple[State, ...]], bool]:
+    """
+    Same search as _inner_advance_depth, but with the states of all players of a multiworld session.
+    Any player can act, and pickups collected for another player are delivered to them immediately.
+    Actions of different players can happen in any order, unless one delivers a pickup to the other. So once every
+    action of a player was tried, that player sleeps while the other players' actions are tried: any order where
+    it acts before receiving a pickup from them was already tried.
+    :param states: The state of each player.
+    :param logics: The logic of each player.
+    :param status_update:
+    :param transposition_table: The combinations of states that were already found to be dead ends.
+    Actions of different players can usually happen in any order, so the same combination is often reached again.
+    :param stats: Where the work done is counted.
+    :param depth: How many actions were taken, by any player, to reach the given states.
+    :param player: The player that acted last, for logging.
+    :param reaches: For each player, a precalculated reach for their state or None.
+    :param previous_reaches: For each player, the reach of the state we came from or None.
+    :param sleeping: The players that can't act until they receive a pickup.
+    :return:
+    """
+    finished = _finished_players(states, logics)
+    if all(finished):
+        return states, True
+
+    # Fewer actions are tried with sleeping players, so these dead ends only apply with the same players sleeping
+    states_key = _multiworld_state_key(states)
+    key = (states_key, sleeping) if sleeping else states_key
+    dead_end = transposition_table.get_dead_end(key)
+    if dead_end is None and sleeping:
+        dead_end = transposition_table.get_dead_end(states_key)
+    if dead_end is not None:
+        debug.log_skip_known_dead_end(states[player])
+        dead_end.restore_additional_requirements(logics)
+        stats.cache_hits += 1
+        return None, dead_end.has_action
+
+    unfinished = [player_index for player_index, player_finished in enumerate(finished) if not player_finished]
+    if len(unfinished) == 1 and not any(_can_help_other_players(state, finished)
+                                        for state, player_finished in zip(states, finished) if player_finished):
+        # Only one player is left, and nobody can help them anymore. What they learn from here on only holds without
+        # the other players, so it's learned in a logic of its own.
+        last_player = unfinished[0]
+        final_state, has_action = await _inner_advance_depth(
+            state=states[last_player],
+            logic=logics[last_player].without_additional_requirements(),
+            status_update=status_update,
+            transposition_table=TranspositionTable(),
+            stats=stats,
+            depth=depth,
+        )
+        if final_state is None:
+            transposition_table.add_dead_end(states_key, DeadEnd(0, has_action, ()))
+            return None, has_action
+
+        new_states = list(states)
+        new_states[last_player] = final_state
+        return tuple(new_states), True
+
+    # Yield back to the asyncio runner, so cancel can do something
+    await asyncio.sleep(0)
+
+    stats.expand(depth)
+
+    if reaches is None:
+        reaches = (None,) * len(states)
+    if previous_reaches is None:
+        previous_reaches = (None,) * len(states)
+
+    reaches = tuple(
+        reach if reach is not None else _calculate_reach(logic, state, previous_reach, stats)
+        for state, logic, reach, previous_reach in zip(states, logics, reaches, previous_reaches)
+    )
+
+    debug.log_new_advance(states[player], reaches[player])
+    status_update("Resolving... {} total resources".format(sum(len(state.resources) for state in states)))
+
+    # Otherwise, every order of the other players' remaining actions would be tried before giving up
+    if any(not finished[player_index] and _can_never_finish(player_index, states, logics, reaches, stats)
+           for player_index in range(len(states))):
+        debug.log_rollback(states[player], False, False)
+        stats.backtracks += 1
+        transposition_table.add_dead_end(states_key, DeadEnd(0, False, ()))
+        return None, False
+
+    # Players that finished only need to act to collect pickups for the others
+    acting_players = [
+        player_index
+        for player_index, state in enumerate(states)
+        if player_index not in sleeping and (not finished[player_index] or _can_help_other_players(state, finished))
+    ]
+
+    for acting in acting_players:
+        state, logic, reach = states[acting], logics[acting], reaches[acting]
+        for action, energy in reach.possible_actions(state):
+            if _should_check_if_multiworld_action_is_safe(states, logics, acting, action):
+
+                potential_states = _act_on_node_for_player(states, logics, acting, action,
+                                                           reach.path_to_node[action], energy)
+                potential_reach = _calculate_reach(logic, potential_states[acting], reach, stats)
+
+                # If we can go back to where we were, it's a simple safe node
+                if state.node in potential_reach.nodes:
+                    potential_reaches = list(_reaches_for_new_states(states, potential_states, reaches))
+                    potential_reaches[acting] = potential_reach
+
+                    new_result = await _inner_advance_depth_multiworld(
+                        states=potential_states,
+                        logics=logics,
+                        status_update=status_update,
+                        transposition_table=transposition_table,
+                        stats=stats,
+                        depth=depth + 1,
+                        player=acting,
+                        reaches=tuple(potential_reaches),
+                        previous_reaches=reaches,
+                        sleeping=_wake_delivery_target(sleeping, state, action),
+                    )
+
+                    if not new_result[1]:
+                        debug.log_rollback(state, True, True)
+
+                    # If a safe node was a dead end, we're certainly a dead end as well
+                    if new_result[0] is None:
+                        transposition_table.add_dead_end(key, DeadEnd(0, new_result[1], ()))
+                    return new_result
+
+    debug.log_checking_satisfiable_actions()
+    interesting_resources = [
+        reach.interesting_resources(state, logic.game.victory_condition)
+        for state, logic, reach in zip(states, logics, reaches)
+    ]
+    has_action = [False] * len(states)
+
+    branch_sleeping = sleeping
+    for acting in acting_players:
+        reach = reaches[acting]
+        for action, energy in _multiworld_satisfiable_actions(acting, states, reaches, interesting_resources):
+            new_states = _act_on_node_for_player(states, logics, acting, action, reach.path_to_node[action], energy)
+            new_result = await _inner_advance_depth_multiworld(
+                states=new_states,
+                logics=logics,
+                status_update=status_update,
+                transposition_table=transposition_table,
+                stats=stats,
+                depth=depth + 1,
+                player=acting,
+                reaches=_reaches_for_new_states(states, new_states, reaches),
+                previous_reaches=reaches,
+                sleeping=_wake_delivery_target(branch_sleeping, states[acting], action),
+            )
+
+            # We got a positive result. Send it back up
+            if new_result[0] is not None:
+                return new_result
+            else:
+                has_action[acting] = True
+
+        branch_sleeping = branch_sleeping | {acting}
+
+    debug.log_rollback(states[player], any(has_action), False)
+    stats.backtracks += 1
+
+    for player_index, (state, logic, reach, player_has_action) in enumerate(zip(states, logics, reaches,
+                                                                             has_action)):
+        if player_index in sleeping:
+            # Their actions weren't tried, so there's nothing new to learn about their node
+            continue
+
+        if _pickup_target_for_other_player(state, state.node) is not None or any(
+                _pickup_target_for_other_player(state, resource_node) is not None
+                for resource_node in reach.collectable_resource_nodes(state)):
+            # Coming here might help another player, even if this player couldn't make progress
+            logic.additional_requirements[state.node] = RequirementSet.trivial()
+            continue
+
+        additional_requirements = reach.satisfiable_as_requirement_set
+
+        if player_has_action:
+            additional = set()
+            for resource_node in reach.collectable_resource_nodes(state):
+                additional |= logic.get_additional_requirements(resource_node).alternatives
+
+            additional_requirements = additional_requirements.union(RequirementSet(additional))
+
+        logic.additional_requirements[state.node] = _simplify_additional_requirement_set(
+            additional_requirements, state, logic.game.dangerous_resources)
+
+    transposition_table.add_dead_end(key, DeadEnd(0, any(has_action), tuple(
+        (state.node, logic.additional_requirements[state.node]) if player_index not in sleeping else None
+        for player_index, (state, logic) in enumerate(zip(states, logics))
+    )))
+    return None, any(has_action)
 
 
 def _quiet_print(s):
     pass
 
 
-async def resolve(configuration: EchoesConfiguration,
-                  patches: GamePatches,
-                  status_update: Optional[Callable[[str], None]] = None
-                  ) -> Optional[State]:
-    if status_update is None:
-        status_update = _quiet_print
-
+def _setup_resolver(configuration: EchoesConfiguration, patches: GamePatches) -> Tuple[State, Logic]:
     game = default_database.game_description_for(configuration.game).make_mutable_copy()
     game.resource_database = bootstrap.patch_resource_database(game.resource_database, configuration)
     event_pickup.replace_with_event_pickups(game)
@@ -182,9 +682,278 @@ async def resolve(configuration: EchoesConfiguration,
     new_game, starting_state = bootstrap.logic_bootstrap(configuration, game, patches)
     logic = Logic(new_game, configuration)
     starting_state.resources["add_self_as_requirement_to_resources"] = 1
+
+    return starting_state, logic
+
+
+# A collected node: its index, the indices of the nodes in the path to it and the energy after collecting it
+_Step = Tuple[int, Tuple[int, ...], int]
+
+# How many times a worker checks if it should stop, in number of states explored
+_STOP_CHECK_INTERVAL = 16
+
+
+class _SearchCancelled(Exception):
+    pass
+
+
+def _nodes_by_index(logic: Logic) -> Dict[int, Node]:
+    # The event pickup nodes aren't part of WorldList.all_nodes
+    return {node.index: node for area in logic.game.world_list.all_areas for node in area.nodes}
+
+
+def _steps_to(state: State) -> Tuple[_Step, ...]:
+    """
+    The steps taken since the starting state to reach the given state.
+    These can be used to create the same state in another process.
+    """
+    steps = []
+    while state.previous_state is not None:
+        steps.append((state.node.index, tuple(node.index for node in state.path_from_previous_state), state.energy))
+        state = state.previous_state
+    return tuple(reversed(steps))
+
+
+def _replay_steps(state: State, logic: Logic, steps: Iterable[_Step]) -> State:
+    nodes = _nodes_by_index(logic)
+    for node_index, path, energy in steps:
+        state = state.act_on_node(nodes[node_index], path=tuple(nodes[index] for index in path), new_energy=energy)
+    return state
+
+
+# The configuration, patches, starting state and logic of the last branch each worker explored,
+# as these are expensive to create
+_worker_resolver = threading.local()
+
+
+def _explore_branch(configuration: EchoesConfiguration,
+                    patches: GamePatches,
+                    steps: Tuple[_Step, ...],
+                    additional_requirements: Dict[int, RequirementSet],
+                    stop_event,
+                    max_expansions: Optional[int] = None,
+                    ) -> Tuple[Optional[Tuple[_Step, ...]], Dict[int, RequirementSet], ResolverStats]:
+    """
+    Runs in a worker of advance_depth_in_parallel. Searches depth-first from the state reached with the given steps.
+    :param configuration:
+    :param patches:
+    :param steps:
+    :param additional_requirements: The additional requirements already known, by node index.
+    :param stop_event: When set, the search is abandoned.
+    :param max_expansions: The expansion budget of this branch.
+    :return: The steps to a state that satisfies the victory condition, if found,
+    all additional requirements known at the end, by node index, and the work done.
+    """
+    last = getattr(_worker_resolver, "last", None)
+    if last is None or last[0] != configuration or last[1] != patches:
+        last = (configuration, patches) + _setup_resolver(configuration, patches)
+        _worker_resolver.last = last
+    starting_state, logic = last[2:]
+
+    nodes = _nodes_by_index(logic)
+    logic.additional_requirements = {
+        nodes[index]: requirements
+        for index, requirements in additional_requirements.items()
+    }
+
+    stats = ResolverStats(max_expansions=max_expansions)
+
+    def status_update(s: str):
+        if stats.states_expanded % _STOP_CHECK_INTERVAL == 0 and stop_event.is_set():
+            raise _SearchCancelled()
+
+    try:
+        final_state = asyncio.run(advance_depth(_replay_steps(starting_state, logic, steps), logic, status_update,
+                                                stats=stats))
+    except _SearchCancelled:
+        return None, {}, stats
+
+    return (
+        _steps_to(final_state) if final_state is not None else None,
+        {node.index: requirements for node, requirements in logic.additional_requirements.items()},
+        stats,
+    )
+
+
+async def advance_depth_in_parallel(configuration: EchoesConfiguration,
+                                    patches: GamePatches,
+                                    state: State,
+                                    logic: Logic,
+                                    status_update: Callable[[str], None],
+                                    executor: Executor,
+                                    stats: Optional[ResolverStats] = None,
+                                    ) -> Optional[State]:
+    """
+    Same as advance_depth, but once the search has to choose between actions, each of them is explored in the
+    executor. The first branch to finish the game is used and the others are abandoned.
+    The additional requirements found by the branches that failed are given to the branches that start after them.
+    Each branch can use the expansion budget that was left when it started, so when branches run at the same time
+    the total can go over it.
+    :param configuration: Used by the workers to create the same game.
+    :param patches: Used by the workers to create the same game.
+    :param state: The starting state, as created with the configuration and patches.
+    :param logic:
+    :param status_update:
+    :param executor:
+    :param stats: Where the work done is counted, including the work of the branches that finished.
+    :return:
+    """
+    if stats is None:
+        stats = ResolverStats()
+
+    starting_state = state
+    victory_condition = logic.game.victory_condition
+
+    # Until there's a choice to make, the search only goes one way
+    previous_reach = None
+    reach = None
+    depth = 0
+    while True:
+        if victory_condition.satisfied(state.resources, state.energy, state.resource_database):
+            return state
+
+        stats.expand(depth)
+        if reach is None:
+            reach = _calculate_reach(logic, state, previous_reach, stats)
+        debug.log_new_advance(state, reach)
+
+        next_states = _next_states(state, logic, reach, stats)
+        if len(next_states) != 1:
+            break
+        previous_reach = reach
+        state, reach = next_states[0]
+        depth += 1
+
+    if not next_states:
+        stats.backtracks += 1
+        return None
+
+    branches = [_steps_to(new_state) for new_state, _ in next_states]
+    max_in_flight = os.cpu_count() or 1
+    nodes = _nodes_by_index(logic)
+
+    with multiprocessing.Manager() as manager:
+        stop_event = manager.Event()
+        submitted: List[concurrent.futures.Future] = []
+        pending = set()
+        try:
+            while len(submitted) < len(branches) or pending:
+                while len(submitted) < len(branches) and len(pending) < max_in_flight:
+                    future = executor.submit(
+                        _explore_branch, configuration, patches, branches[len(submitted)],
+                        {node.index: requirements for node, requirements in logic.additional_requirements.items()},
+                        stop_event,
+                        stats.remaining_expansions,
+                    )
+                    submitted.append(future)
+                    pending.add(asyncio.wrap_future(future))
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    steps, additional_requirements, branch_stats = future.result()
+                    stats.merge(branch_stats, depth + 1)
+                    if steps is not None:
+                        return _replay_steps(starting_state, logic, steps)
+
+                    logic.additional_requirements.update(
+                        (nodes[index], requirements)
+                        for index, requirements in additional_requirements.items()
+                    )
+                status_update("Resolving... {} of {} branches explored".format(
+                    len(submitted) - len(pending), len(branches)))
+
+            return None
+
+        finally:
+            # Workers that already started only stop once they check the event, which needs the manager alive
+            stop_event.set()
+            for future in submitted:
+                future.cancel()
+            if submitted:
+                await asyncio.wait([asyncio.wrap_future(future) for future in submitted])
+
+
+async def resolve(configuration: EchoesConfiguration,
+                  patches: GamePatches,
+                  status_update: Optional[Callable[[str], None]] = None,
+                  heuristic: Optional[str] = None,
+                  executor: Optional[Executor] = None,
+                  stats: Optional[ResolverStats] = None,
+                  ) -> Optional[State]:
+    """
+    Checks if the game with the given configuration and patches can be finished.
+    :param configuration:
+    :param patches:
+    :param status_update:
+    :param heuristic: The name of one of the heuristics in `heuristics.HEURISTICS`. When set, uses a best-first
+    search with it, instead of a depth-first search.
+    :param executor: If set, the depth-first search explores its branches in parallel using it.
+    See `advance_depth_in_parallel`.
+    :param stats: If set, the work done is counted in it, and the search stops with ExpansionBudgetExhausted
+    once its max_expansions states were expanded.
+    :return: A state that satisfies the victory condition, or None if none was found.
+    """
+    if status_update is None:
+        status_update = _quiet_print
+
+    if heuristic is not None and heuristic not in heuristics.HEURISTICS:
+        raise ValueError("Unknown heuristic: {}. Expected one of {}".format(
+            heuristic, ", ".join(sorted(heuristics.HEURISTICS))))
+
+    if heuristic is not None and executor is not None:
+        raise ValueError("The best-first search can't use an executor")
+
+    starting_state, logic = _setup_resolver(configuration, patches)
     debug.log_resolve_start()
 
-    for name, req in new_game.resource_database.requirement_template.items():
+    for name, req in logic.game.resource_database.requirement_template.items():
         print(name, req)
 
-    return await advance_depth(starting_state, logic, status_update)
+    if heuristic is not None:
+        return await advance_best_first(starting_state, logic, status_update, heuristics.HEURISTICS[heuristic],
+                                        stats)
+    if executor is not None:
+        return await advance_depth_in_parallel(configuration, patches, starting_state, logic, status_update,
+                                               executor, stats)
+    return await advance_depth(starting_state, logic, status_update, stats=stats)
+
+
+async def resolve_multiworld(configurations: Dict[int, EchoesConfiguration],
+                             all_patches: Dict[int, GamePatches],
+                             status_update: Optional[Callable[[str], None]] = None,
+                             stats: Optional[ResolverStats] = None,
+                             ) -> Optional[Dict[int, State]]:
+    """
+    Checks if all players of a multiworld session can reach their victory condition.
+    Each player explores their own game, and pickups they collect for other players are given to that player.
+    :param configurations: The configuration of each player, by player index.
+    :param all_patches: The patches of each player, by player index.
+    :param status_update:
+    :param stats: If set, the work done is counted in it, and the search stops with ExpansionBudgetExhausted
+    once its max_expansions states were expanded.
+    :return: The final state of each player, or None if it's impossible.
+    """
+    if status_update is None:
+        status_update = _quiet_print
+    if stats is None:
+        stats = ResolverStats()
+
+    if sorted(configurations.keys()) != list(range(len(configurations))) or configurations.keys() != all_patches.keys():
+        raise ValueError("Expected configurations and patches for players 0 to {}, got {} and {}".format(
+            len(configurations) - 1, sorted(configurations.keys()), sorted(all_patches.keys())))
+
+    starting_states = []
+    logics = []
+    for player in range(len(configurations)):
+        starting_state, logic = _setup_resolver(configurations[player], all_patches[player])
+        starting_states.append(starting_state)
+        logics.append(logic)
+
+    debug.log_resolve_start()
+
+    final_states = (await _inner_advance_depth_multiworld(tuple(starting_states), tuple(logics), status_update,
+                                                          TranspositionTable(), stats))[0]
+    if final_states is None:
+        return None
+
+    return dict(enumerate(final_states))
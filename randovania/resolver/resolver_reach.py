@@ -1,17 +1,118 @@
 import math
 import typing
 from collections import defaultdict
-from typing import Dict, Set, Iterator, Tuple, FrozenSet
+from typing import Dict, Set, Iterator, Tuple, FrozenSet, Optional
 
 from randovania.game_description.game_description import calculate_interesting_resources
+from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.world.node import ResourceNode, Node
 from randovania.game_description.requirements import RequirementList, RequirementSet, SatisfiableRequirements, \
-    RequirementAnd, Requirement
+    RequirementAnd, Requirement, CompiledRequirement
+from randovania.game_description.resources.resource_database import ResourceDatabase
+from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources, \
+    convert_resources_to_vector, ResourceVector
+from randovania.lib import profiling_lib
 from randovania.resolver import debug
 from randovania.resolver.logic import Logic
 from randovania.resolver.state import State
 
 
+class _ReachEdge(typing.NamedTuple):
+    target: Node
+    requirement: Requirement
+    compiled: CompiledRequirement
+    resources: FrozenSet[ResourceInfo]
+    uses_energy: bool
+    internal: bool
+
+
+EdgeKey = Tuple[Node, int]
+
+# Keys: nodes whose additional requirements were checked
+# Value: the additional requirements that were checked, and if they're satisfied
+AdditionalSatisfied = Dict[Node, Tuple[RequirementSet, bool]]
+
+
+class _EdgeCache:
+    """
+    Data about the connections between nodes that stays valid for as long as the patches are the same.
+    It's shared between a ResolverReach and all the reaches that were calculated incrementally from it.
+    """
+    patches: GamePatches
+    edges: Dict[Node, Tuple[_ReachEdge, ...]]
+    edges_by_resource: Dict[ResourceInfo, Set[EdgeKey]]
+    alternatives: Dict[EdgeKey, FrozenSet[RequirementList]]
+
+    def __init__(self, patches: GamePatches):
+        self.patches = patches
+        self.edges = {}
+        self.edges_by_resource = defaultdict(set)
+        self.alternatives = {}
+
+    def edges_from(self, node: Node, logic: Logic, state: State) -> Tuple[_ReachEdge, ...]:
+        edges = self.edges.get(node)
+        if edges is not None:
+            return edges
+
+        database = state.resource_database
+        condensed_graph = logic.game.world_list.condensed_graph
+        requirement_to_leave = node.requirement_to_leave(state.patches, state.resources)
+
+        new_edges = []
+        for target_node, requirement in logic.game.world_list.potential_nodes_from(node, state.patches):
+            if target_node is None:
+                continue
+
+            if requirement_to_leave != Requirement.trivial():
+                requirement = RequirementAnd([requirement, requirement_to_leave])
+
+            individuals = list(requirement.iterate_resource_requirements(database))
+            resources = frozenset(individual.resource for individual in individuals)
+            for resource in resources:
+                self.edges_by_resource[resource].add((node, len(new_edges)))
+
+            new_edges.append(_ReachEdge(target_node, requirement, requirement.compiled(), resources,
+                                        any(individual.is_damage for individual in individuals),
+                                        condensed_graph.is_internal(node, target_node)))
+
+        edges = tuple(new_edges)
+        self.edges[node] = edges
+        return edges
+
+    def alternatives_for(self, key: EdgeKey, requirement: Requirement, state: State) -> FrozenSet[RequirementList]:
+        alternatives = self.alternatives.get(key)
+        if alternatives is None:
+            alternatives = requirement.as_set(state.resource_database).alternatives
+            self.alternatives[key] = alternatives
+        return alternatives
+
+
+def _additional_requirements_satisfied(logic: Logic, node: Node, satisfied_additional: AdditionalSatisfied,
+                                       vector: ResourceVector, resources: CurrentResources, energy: int,
+                                       database: ResourceDatabase) -> bool:
+    """
+    Checks the additional requirements of the given node, reusing the result of the last check when the
+    requirements are the same. Results that depend on the energy aren't remembered.
+    """
+    requirements = logic.get_additional_requirements(node)
+    known = satisfied_additional.get(node)
+    if known is not None and known[0] is requirements:
+        return known[1]
+
+    satisfied = requirements.compiled().satisfied(vector, resources, energy, database)
+    if logic.additional_requirements_resources(node) is not None:
+        satisfied_additional[node] = (requirements, satisfied)
+    return satisfied
+
+
+def _changed_resources(old_resources: CurrentResources, new_resources: CurrentResources) -> Set[ResourceInfo]:
+    return {
+        resource
+        for resource in old_resources.keys() | new_resources.keys()
+        if old_resources.get(resource, 0) != new_resources.get(resource, 0)
+    }
+
+
 class ResolverReach:
     _nodes: Tuple[Node, ...]
     _energy_at_node: Dict[Node, int]
@@ -19,6 +120,11 @@ class ResolverReach:
     _satisfiable_requirements: SatisfiableRequirements
     _safe_nodes: FrozenSet[Node]
     _logic: Logic
+    _resources: Optional[CurrentResources] = None
+    _edge_cache: Optional[_EdgeCache] = None
+    _satisfied_edges: Optional[Dict[EdgeKey, bool]] = None
+    _satisfied_additional: Optional[AdditionalSatisfied] = None
+    _vector: Optional[ResourceVector] = None
 
     @property
     def nodes(self) -> Iterator[Node]:
@@ -46,10 +152,28 @@ class ResolverReach:
     @classmethod
     def calculate_reach(cls,
                         logic: Logic,
-                        initial_state: State) -> "ResolverReach":
+                        initial_state: State,
+                        previous_reach: Optional["ResolverReach"] = None,
+                        ) -> "ResolverReach":
+        """
+        Calculates all nodes that can be reached from the state's node.
+        :param logic:
+        :param initial_state:
+        :param previous_reach: A reach calculated for an earlier state of the same resolve. When given, the results
+        of connections that don't depend on any resource that changed since are reused instead of checked again.
+        :return:
+        """
+        profiling_lib.increment("resolver_reach_calculations")
+        edge_cache, satisfied_edges, satisfied_additional = _incremental_caches(logic, initial_state, previous_reach)
 
         checked_nodes: Dict[Node, int] = {}
         database = initial_state.resource_database
+        resources = initial_state.resources
+        vector = convert_resources_to_vector(resources)
+
+        # The resources don't change while calculating a reach, so connections that take damage only need to be
+        # evaluated once, even if their source node is visited again with a different amount of energy
+        energy_edges: Dict[EdgeKey, Tuple[float, int]] = {}
 
         # Keys: nodes to check
         # Value: how much energy was available when visiting that node
@@ -63,6 +187,9 @@ class ResolverReach:
         path_to_node: Dict[Node, Tuple[Node, ...]] = {}
         path_to_node[initial_state.node] = tuple()
 
+        condensed_graph = logic.game.world_list.condensed_graph
+        additional_requirements = logic.additional_requirements
+
         while nodes_to_check:
             node = next(iter(nodes_to_check))
             energy = nodes_to_check.pop(node)
@@ -70,40 +197,67 @@ class ResolverReach:
             if node.heal:
                 energy = initial_state.maximum_energy
 
-            checked_nodes[node] = energy
-            if node != initial_state.node:
-                reach_nodes[node] = energy
+            # All nodes in the group of this node are reachable with the same energy, unless leaving one of them
+            # has additional requirements. In that case, these nodes are visited one at a time.
+            group = condensed_graph.group_of(node)
+            grouped = len(group) > 1 and not any(member in additional_requirements for member in group)
+            if not grouped:
+                group = (node,)
 
-            requirement_to_leave = node.requirement_to_leave(initial_state.patches, initial_state.resources)
+            for member in group:
+                if member is not node:
+                    if nodes_to_check.get(member, math.inf) <= energy:
+                        del nodes_to_check[member]
+                    path_to_node[member] = path_to_node[node] + condensed_graph.path_inside_group(node, member)
 
-            for target_node, requirement in logic.game.world_list.potential_nodes_from(node, initial_state.patches):
-                if target_node is None:
-                    continue
+                checked_nodes[member] = energy
+                if member != initial_state.node:
+                    reach_nodes[member] = energy
 
-                if checked_nodes.get(target_node, math.inf) <= energy or nodes_to_check.get(target_node,
-                                                                                            math.inf) <= energy:
-                    continue
+            for member in group:
+                for edge_index, edge in enumerate(edge_cache.edges_from(member, logic, initial_state)):
+                    if grouped and edge.internal:
+                        continue
 
-                if requirement_to_leave != Requirement.trivial():
-                    requirement = RequirementAnd([requirement, requirement_to_leave])
+                    target_node = edge.target
+                    requirement = edge.requirement
 
-                # Check if the normal requirements to reach that node is satisfied
-                satisfied = requirement.satisfied(initial_state.resources, energy, database)
-                if satisfied:
-                    # If it is, check if we additional requirements figured out by backtracking is satisfied
-                    satisfied = logic.get_additional_requirements(node).satisfied(initial_state.resources,
-                                                                                  energy,
-                                                                                  initial_state.resource_database)
+                    if checked_nodes.get(target_node, math.inf) <= energy or nodes_to_check.get(target_node,
+                                                                                                math.inf) <= energy:
+                        continue
 
-                if satisfied:
-                    nodes_to_check[target_node] = energy - requirement.damage(initial_state.resources, database)
-                    path_to_node[target_node] = path_to_node[node] + (node,)
+                    # Check if the normal requirements to reach that node is satisfied
+                    if edge.uses_energy:
+                        threshold_and_damage = energy_edges.get((member, edge_index))
+                        if threshold_and_damage is None:
+                            threshold_and_damage = requirement.threshold_and_damage(resources, database)
+                            energy_edges[member, edge_index] = threshold_and_damage
+                        satisfied = energy > threshold_and_damage[0]
+                    else:
+                        satisfied = satisfied_edges.get((member, edge_index))
+                        if satisfied is None:
+                            satisfied = edge.compiled.satisfied(vector, resources, energy, database)
+                            satisfied_edges[member, edge_index] = satisfied
 
-                elif target_node:
-                    # If we can't go to this node, store the reason in order to build the satisfiable requirements.
-                    # Note we ignore the 'additional requirements' here because it'll be added on the end.
-                    requirements_by_node[target_node].update(
-                        requirement.as_set(initial_state.resource_database).alternatives)
+                    if satisfied and not grouped and member in additional_requirements:
+                        # If it is, check if we additional requirements figured out by backtracking is satisfied
+                        satisfied = _additional_requirements_satisfied(logic, member, satisfied_additional,
+                                                                       vector, resources, energy, database)
+
+                    if satisfied:
+                        if edge.uses_energy:
+                            energy_after = energy - threshold_and_damage[1]
+                        else:
+                            energy_after = energy
+                        nodes_to_check[target_node] = energy_after
+                        path_to_node[target_node] = path_to_node[member] + (member,)
+
+                    elif target_node:
+                        # If we can't go to this node, store the reason in order to build the satisfiable
+                        # requirements. Note we ignore the 'additional requirements' here because it'll be added on
+                        # the end.
+                        requirements_by_node[target_node].update(
+                            edge_cache.alternatives_for((member, edge_index), requirement, initial_state))
 
         # Discard satisfiable requirements of nodes reachable by other means
         for node in set(reach_nodes.keys()).intersection(requirements_by_node.keys()):
@@ -116,31 +270,49 @@ class ResolverReach:
         else:
             satisfiable_requirements = frozenset()
 
-        return ResolverReach(reach_nodes, path_to_node,
-                             satisfiable_requirements,
-                             logic)
+        reach = ResolverReach(reach_nodes, path_to_node,
+                              satisfiable_requirements,
+                              logic)
+        reach._resources = dict(initial_state.resources)
+        reach._edge_cache = edge_cache
+        reach._satisfied_edges = satisfied_edges
+        reach._satisfied_additional = satisfied_additional
+        reach._vector = vector
+        return reach
 
     def possible_actions(self,
                          state: State) -> Iterator[Tuple[ResourceNode, int]]:
 
         for node in self.collectable_resource_nodes(state):
-            additional_requirements = self._logic.get_additional_requirements(node)
-            if additional_requirements.satisfied(state.resources, self._energy_at_node[node], state.resource_database):
+            if self._satisfied_additional is not None:
+                satisfied = _additional_requirements_satisfied(self._logic, node, self._satisfied_additional,
+                                                               self._vector, state.resources,
+                                                               self._energy_at_node[node], state.resource_database)
+            else:
+                satisfied = self._logic.get_additional_requirements(node).satisfied(
+                    state.resources, self._energy_at_node[node], state.resource_database)
+            if satisfied:
                 yield node, self._energy_at_node[node]
             else:
                 debug.log_skip_action_missing_requirement(node, self._logic.game,
                                                           self._logic.get_additional_requirements(node))
 
+    def interesting_resources(self,
+                              state: State,
+                              victory_condition: Requirement,
+                              ) -> FrozenSet[ResourceInfo]:
+        return calculate_interesting_resources(
+            self._satisfiable_requirements.union(victory_condition.as_set(state.resource_database).alternatives),
+            state.resources,
+            state.energy,
+            state.resource_database)
+
     def satisfiable_actions(self,
                             state: State,
                             victory_condition: Requirement,
                             ) -> Iterator[Tuple[ResourceNode, int]]:
 
-        interesting_resources = calculate_interesting_resources(
-            self._satisfiable_requirements.union(victory_condition.as_set(state.resource_database).alternatives),
-            state.resources,
-            state.energy,
-            state.resource_database)
+        interesting_resources = self.interesting_resources(state, victory_condition)
 
         # print(" > satisfiable actions, with {} interesting resources".format(len(interesting_resources)))
         for action, energy in self.possible_actions(state):
@@ -160,3 +332,37 @@ class ResolverReach:
             if node.can_collect(state.patches, state.resources, self._logic.game.world_list.all_nodes,
                                 state.resource_database):
                 yield node
+
+
+def _incremental_caches(logic: Logic,
+                        state: State,
+                        previous_reach: Optional[ResolverReach],
+                        ) -> Tuple[_EdgeCache, Dict[EdgeKey, bool], AdditionalSatisfied]:
+    """
+    Creates the caches used by ResolverReach.calculate_reach, reusing the ones from previous_reach when possible.
+    Only the connections and additional requirements that mention a resource that changed are discarded.
+    :param logic:
+    :param state:
+    :param previous_reach:
+    :return:
+    """
+    if (previous_reach is None or previous_reach._edge_cache is None or previous_reach._logic is not logic
+            or previous_reach._edge_cache.patches is not state.patches):
+        return _EdgeCache(state.patches), {}, {}
+
+    edge_cache = previous_reach._edge_cache
+    changed = _changed_resources(previous_reach._resources, state.resources)
+
+    # Non-resource keys (like add_self_as_requirement_to_resources) changes how the connections themselves are built
+    if any(isinstance(resource, str) for resource in changed):
+        return _EdgeCache(state.patches), {}, {}
+
+    satisfied_edges = dict(previous_reach._satisfied_edges)
+    satisfied_additional = dict(previous_reach._satisfied_additional)
+    for resource in changed:
+        for key in edge_cache.edges_by_resource.get(resource, ()):
+            satisfied_edges.pop(key, None)
+        for node in logic.nodes_by_additional_resource.get(resource, ()):
+            satisfied_additional.pop(node, None)
+
+    return edge_cache, satisfied_edges, satisfied_additional
@@ -0,0 +1,55 @@
+import dataclasses
+from typing import Optional
+
+from randovania.resolver.exceptions import ExpansionBudgetExhausted
+
+
+@dataclasses.dataclass()
+class ResolverStats:
+    """
+    How much work a resolve did so far. Unlike how long it took, these don't depend on the machine,
+    so they can be compared between runs and the budget stops the search at the same point everywhere.
+    """
+    max_expansions: Optional[int] = None
+    states_expanded: int = 0
+    reach_calculations: int = 0
+    backtracks: int = 0
+    max_depth: int = 0
+    cache_hits: int = 0
+
+    def expand(self, depth: int):
+        """
+        Records that a state with the given amount of actions before it is being expanded.
+        Raises ExpansionBudgetExhausted if max_expansions states were already expanded.
+        """
+        if self.max_expansions is not None and self.states_expanded >= self.max_expansions:
+            raise ExpansionBudgetExhausted(self.max_expansions)
+        self.states_expanded += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    @property
+    def remaining_expansions(self) -> Optional[int]:
+        if self.max_expansions is None:
+            return None
+        return max(self.max_expansions - self.states_expanded, 0)
+
+    def merge(self, other: "ResolverStats", depth_offset: int = 0):
+        """
+        Adds the work of a search that continued from a state with depth_offset actions before it.
+        """
+        self.states_expanded += other.states_expanded
+        self.reach_calculations += other.reach_calculations
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth + depth_offset)
+        self.cache_hits += other.cache_hits
+
+    @property
+    def as_json(self) -> dict:
+        return {
+            "states_expanded": self.states_expanded,
+            "reach_calculations": self.reach_calculations,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "cache_hits": self.cache_hits,
+        }
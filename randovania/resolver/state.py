@@ -1,6 +1,6 @@
 import copy
 import dataclasses
-from typing import Optional, Tuple, Iterator
+from typing import Optional, Tuple, Iterator, Union
 
 from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.world.node import ResourceNode, Node
@@ -25,11 +25,34 @@ class StateGameData:
     resource_database: ResourceDatabase
     world_list: WorldList
     energy_per_tank: int
+    # When False, states don't keep a reference to the state they came from, so these can be freed
+    keep_history: bool = True
+
+
+class _CollectedNode:
+    """
+    A link of a persistent list of the collected nodes, so a new state doesn't copy the nodes of the previous one.
+    """
+    __slots__ = ("node", "previous")
+
+    def __init__(self, node: ResourceNode, previous: Optional["_CollectedNode"]):
+        self.node = node
+        self.previous = previous
+
+
+def _link_nodes(nodes: Tuple[ResourceNode, ...]) -> Optional[_CollectedNode]:
+    link = None
+    for node in nodes:
+        link = _CollectedNode(node, link)
+    return link
 
 
 class State:
+    __slots__ = ("resources", "_collected_nodes", "energy", "node", "patches", "previous_state",
+                 "path_from_previous_state", "game_data")
+
     resources: CurrentResources
-    collected_resource_nodes: Tuple[ResourceNode, ...]
+    _collected_nodes: Optional[_CollectedNode]
     energy: int
     node: Node
     patches: GamePatches
@@ -47,7 +70,7 @@ class State:
 
     def __init__(self,
                  resources: CurrentResources,
-                 collected_resource_nodes: Tuple[ResourceNode, ...],
+                 collected_resource_nodes: Union[Tuple[ResourceNode, ...], Optional[_CollectedNode]],
                  energy: int,
                  node: Node,
                  patches: GamePatches,
@@ -55,7 +78,9 @@ class State:
                  game_data: StateGameData):
 
         self.resources = resources
-        self.collected_resource_nodes = collected_resource_nodes
+        if isinstance(collected_resource_nodes, tuple):
+            collected_resource_nodes = _link_nodes(collected_resource_nodes)
+        self._collected_nodes = collected_resource_nodes
         self.node = node
         self.patches = patches
         self.path_from_previous_state = ()
@@ -65,12 +90,40 @@ class State:
         # We place this last because we need resource_database set
         self.energy = min(energy, self.maximum_energy)
 
+    @property
+    def collected_resource_nodes(self) -> Tuple[ResourceNode, ...]:
+        nodes = []
+        link = self._collected_nodes
+        while link is not None:
+            nodes.append(link.node)
+            link = link.previous
+        return tuple(reversed(nodes))
+
+    @property
+    def _history(self) -> Optional["State"]:
+        """
+        What new states created from this one should use as their previous_state.
+        """
+        return self if self.game_data.keep_history else None
+
+    def follows(self, state: "State") -> bool:
+        """
+        If this state was created from the given one. Also works when the history isn't kept, as a new state
+        either has the same collected nodes as the one it came from, or one more.
+        """
+        if self.previous_state is not None:
+            return self.previous_state is state
+
+        link = self._collected_nodes
+        return self.game_data is state.game_data and (
+                link is state._collected_nodes or (link is not None and link.previous is state._collected_nodes))
+
     def has_resource(self, resource: ResourceInfo) -> bool:
         return self.resources.get(resource, 0) > 0
 
     def copy(self) -> "State":
         return State(copy.copy(self.resources),
-                     self.collected_resource_nodes,
+                     self._collected_nodes,
                      self.energy,
                      self.node,
                      self.patches,
@@ -90,12 +143,12 @@ class State:
                 yield resource
 
     def take_damage(self, damage: int) -> "State":
-        return State(self.resources, self.collected_resource_nodes, self.energy - damage, self.node, self.patches, self,
-                     self.game_data)
+        return State(self.resources, self._collected_nodes, self.energy - damage, self.node, self.patches,
+                     self._history, self.game_data)
 
     def heal(self) -> "State":
-        return State(self.resources, self.collected_resource_nodes, self.maximum_energy, self.node, self.patches, self,
-                     self.game_data)
+        return State(self.resources, self._collected_nodes, self.maximum_energy, self.node, self.patches,
+                     self._history, self.game_data)
 
     def _energy_for(self, resources: CurrentResources) -> int:
         num_tanks = resources.get(self.game_data.resource_database.energy_tank, 0)
@@ -128,8 +181,8 @@ class State:
         if _energy_tank_difference(new_resources, self.resources, self.resource_database) > 0:
             energy = self._energy_for(new_resources)
 
-        return State(new_resources, self.collected_resource_nodes + (node,), energy, self.node, self.patches, self,
-                     self.game_data)
+        return State(new_resources, _CollectedNode(node, self._collected_nodes), energy, self.node, self.patches,
+                     self._history, self.game_data)
 
     def act_on_node(self, node: ResourceNode, path: Tuple[Node, ...] = (), new_energy: Optional[int] = None) -> "State":
         if new_energy is None:
@@ -153,11 +206,11 @@ class State:
 
         return State(
             new_resources,
-            self.collected_resource_nodes,
+            self._collected_nodes,
             energy,
             self.node,
             self.patches,
-            self,
+            self._history,
             self.game_data,
         )
 
@@ -177,11 +230,11 @@ class State:
 
         return State(
             new_resources,
-            self.collected_resource_nodes,
+            self._collected_nodes,
             self.energy + tank_delta * self.game_data.energy_per_tank,
             self.node,
             new_patches,
-            self,
+            self._history,
             self.game_data,
         )
 
@@ -206,7 +259,7 @@ def state_with_pickup(state: State,
     :return:
     """
     new_state = state.copy()
-    new_state.previous_state = state
+    new_state.previous_state = state._history
     add_pickup_to_state(new_state, pickup)
     if new_state.maximum_energy > state.maximum_energy:
         new_state.energy = new_state.maximum_energy
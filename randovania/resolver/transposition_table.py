@@ -0,0 +1,94 @@
+import array
+import dataclasses
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple, Sequence
+
+from randovania.game_description.requirements import RequirementSet
+from randovania.game_description.resources.resource_info import CurrentResources, resource_slot
+from randovania.game_description.world.node import Node
+from randovania.lib import profiling_lib
+from randovania.resolver.logic import Logic
+from randovania.resolver.state import State
+
+DEFAULT_MAX_SIZE = 50_000
+
+
+def pack_resources(resources: CurrentResources) -> bytes:
+    """
+    A canonical and compact representation of the given resources, that doesn't depend on the order they were
+    added in. Only valid in the process that created it, as it uses the resource slots.
+    """
+    values = array.array("q")
+    for slot, quantity in sorted((resource_slot(resource), quantity)
+                                 for resource, quantity in resources.items()
+                                 if quantity != 0):
+        values.append(slot)
+        values.append(quantity)
+    return values.tobytes()
+
+
+def state_key(state: State) -> Hashable:
+    return state.node.index, pack_resources(state.resources)
+
+
+@dataclasses.dataclass(frozen=True)
+class DeadEnd:
+    energy: int
+    has_action: bool
+    # For each logic, the node and the additional requirements it got. None for the logics that didn't get any.
+    additional_requirements: Tuple[Optional[Tuple[Node, RequirementSet]], ...]
+
+    def restore_additional_requirements(self, logics: Sequence[Logic]):
+        """
+        Sets the additional requirements that were found when this dead end was explored, as exploring it again
+        would have done.
+        """
+        for logic, entry in zip(logics, self.additional_requirements):
+            if entry is not None:
+                node, requirements = entry
+                logic.additional_requirements[node] = requirements
+
+
+class TranspositionTable:
+    """
+    Remembers the configurations that the resolver already found to be dead ends, as the same configuration is
+    often reached again after taking the same actions in a different order.
+    A dead end with some energy is also a dead end with any lower energy.
+    Wins aren't remembered, as the search ends with the first win.
+    Once full, the least recently used configuration is forgotten.
+    """
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: "OrderedDict[Hashable, DeadEnd]"
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_dead_end(self, key: Hashable, energy: int = 0) -> Optional[DeadEnd]:
+        entry = self._entries.get(key)
+        if entry is not None and energy <= entry.energy:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            profiling_lib.increment("resolver_transposition_hits")
+            return entry
+
+        self.misses += 1
+        profiling_lib.increment("resolver_transposition_misses")
+        return None
+
+    def add_dead_end(self, key: Hashable, entry: DeadEnd):
+        # Only called after get_dead_end missed, so the new entry always has more energy than the one it replaces
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
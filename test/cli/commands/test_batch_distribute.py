@@ -1,15 +1,27 @@
+import concurrent.futures
+import concurrent.futures.process
+import json
+
+import pytest
 from mock import MagicMock, AsyncMock
 
 from randovania.cli.commands import batch_distribute
 from randovania.layout.permalink import Permalink
+from randovania.resolver.exceptions import GenerationFailure
 
 
 def test_batch_distribute_helper(mocker):
     # Setup
     description = MagicMock()
+
+    async def generate(**kwargs):
+        kwargs["attempt_callback"](1)
+        kwargs["attempt_callback"](2)
+        return description
+
     mock_generate_description: AsyncMock = mocker.patch(
         "randovania.generator.generator.generate_and_validate_description",
-        new_callable=AsyncMock, return_value=description)
+        new_callable=AsyncMock, side_effect=generate)
     mock_perf_counter = mocker.patch("time.perf_counter", autospec=False)  # TODO: pytest-qt bug
 
     base_permalink = MagicMock()
@@ -28,13 +40,190 @@ def test_batch_distribute_helper(mocker):
     mock_perf_counter.side_effect = [1000, 5000]
 
     # Run
-    delta_time = batch_distribute.batch_distribute_helper(base_permalink, seed_number, timeout, validate, output_dir)
+    record = batch_distribute.batch_distribute_helper(base_permalink, seed_number, timeout, validate, output_dir)
 
     # Assert
     mock_generate_description.assert_awaited_once_with(permalink=expected_permalink, status_update=None,
                                                        validate_after_generation=validate, timeout=timeout,
-                                                       attempts=0)
+                                                       attempts=0, attempt_callback=mocker.ANY,
+                                                       resolver_stats=mocker.ANY)
 
-    assert delta_time == 4000
+    assert record == {"seed": seed_number, "duration": 4000, "success": True, "failure": None, "attempts": 2,
+                      "resolver": mocker.ANY}
     output_dir.joinpath.assert_called_once_with("{}.rdvgame".format(seed_number))
     description.save_to_file.assert_called_once_with(output_dir.joinpath.return_value)
+
+
+def test_batch_distribute_helper_failure(mocker):
+    # Setup
+    async def generate(**kwargs):
+        kwargs["attempt_callback"](1)
+        raise GenerationFailure("Generated game was considered impossible by the solver",
+                                permalink=MagicMock(), source=Exception("Missing Varia"))
+
+    mocker.patch("randovania.generator.generator.generate_and_validate_description",
+                 new_callable=AsyncMock, side_effect=generate)
+    mocker.patch("time.perf_counter", autospec=False, side_effect=[10, 15])
+    output_dir = MagicMock()
+
+    # Run
+    record = batch_distribute.batch_distribute_helper(MagicMock(), 20, 67, True, output_dir)
+
+    # Assert
+    assert record == {
+        "seed": 20,
+        "duration": 5,
+        "success": False,
+        "failure": "Generated game was considered impossible by the solver: Missing Varia",
+        "attempts": 1,
+        "resolver": {
+            "states_expanded": 0,
+            "reach_calculations": 0,
+            "backtracks": 0,
+            "max_depth": 0,
+            "cache_hits": 0,
+        },
+    }
+    output_dir.joinpath.assert_not_called()
+
+
+def test_read_index(tmp_path):
+    index_file = tmp_path.joinpath("index.jsonl")
+    index_file.write_text('{"seed":10,"success":true}\n{"seed":12,"success":false}\n{"seed":1')
+
+    assert batch_distribute.read_index(index_file) == {10, 12}
+    assert batch_distribute.read_index(tmp_path.joinpath("missing.jsonl")) == set()
+
+
+@pytest.mark.parametrize("with_index", [False, True])
+def test_batch_distribute_command_logic(mocker, tmp_path, with_index):
+    # Setup
+    base_permalink = MagicMock()
+    base_permalink.seed_number = 100
+    mocker.patch("randovania.layout.permalink.Permalink.from_str", return_value=base_permalink)
+    mocker.patch("concurrent.futures.ProcessPoolExecutor", new=concurrent.futures.ThreadPoolExecutor)
+    mocker.patch("randovania.interface_common.sleep_inhibitor.get_inhibitor")
+
+    def helper(permalink, seed_number, timeout, validate, output_dir, with_profile, max_expansions):
+        return {"seed": seed_number, "duration": 1.5, "success": seed_number != 103,
+                "failure": "Failed" if seed_number == 103 else None, "attempts": 1}
+
+    mock_helper = mocker.patch("randovania.cli.commands.batch_distribute.batch_distribute_helper",
+                               side_effect=helper)
+
+    index_file = tmp_path.joinpath("index.jsonl")
+    # The previous run was interrupted while writing a record
+    index_file.write_text('{"seed":101,"duration":1,"success":true,"failure":null,"attempts":1}\n{"seed":10')
+
+    args = MagicMock()
+    args.seed_count = 5
+    args.process_count = 2
+    args.max_in_flight = 2
+    args.output_dir = tmp_path.joinpath("output")
+    args.index_file = index_file if with_index else None
+    args.profile = False
+    args.max_expansions = None
+
+    # Run
+    batch_distribute.batch_distribute_command_logic(args)
+
+    # Assert
+    generated = sorted(call.args[1] for call in mock_helper.call_args_list)
+    if with_index:
+        assert generated == [100, 102, 103, 104]
+        lines = index_file.read_text().splitlines()
+        assert lines[1] == '{"seed":10'
+        records = sorted((json.loads(line) for line in lines[2:]), key=lambda r: r["seed"])
+        assert [(r["seed"], r["success"]) for r in records] == [(100, True), (102, True), (103, False), (104, True)]
+        assert batch_distribute.read_index(index_file) == {100, 101, 102, 103, 104}
+    else:
+        assert generated == [100, 101, 102, 103, 104]
+
+
+@pytest.mark.parametrize("broken_pool", [False, True])
+def test_batch_distribute_command_logic_worker_error(mocker, tmp_path, broken_pool):
+    # Setup
+    base_permalink = MagicMock()
+    base_permalink.seed_number = 100
+    mocker.patch("randovania.layout.permalink.Permalink.from_str", return_value=base_permalink)
+    mocker.patch("concurrent.futures.ProcessPoolExecutor", new=concurrent.futures.ThreadPoolExecutor)
+    mocker.patch("randovania.interface_common.sleep_inhibitor.get_inhibitor")
+    error = concurrent.futures.process.BrokenProcessPool("A process died") if broken_pool else ValueError("Boom")
+
+    def helper(permalink, seed_number, timeout, validate, output_dir, with_profile, max_expansions):
+        if seed_number == 101:
+            raise error
+        return {"seed": seed_number, "duration": 1.5, "success": True, "failure": None, "attempts": 1}
+
+    mocker.patch("randovania.cli.commands.batch_distribute.batch_distribute_helper", side_effect=helper)
+
+    index_file = tmp_path.joinpath("index.jsonl")
+    args = MagicMock()
+    args.seed_count = 3
+    args.process_count = 1
+    args.max_in_flight = 1
+    args.output_dir = tmp_path.joinpath("output")
+    args.index_file = index_file
+    args.profile = False
+    args.max_expansions = None
+
+    # Run
+    if broken_pool:
+        with pytest.raises(SystemExit):
+            batch_distribute.batch_distribute_command_logic(args)
+    else:
+        batch_distribute.batch_distribute_command_logic(args)
+
+    # Assert
+    records = [json.loads(line) for line in index_file.read_text().splitlines()]
+    if broken_pool:
+        assert [r["seed"] for r in records] == [100]
+    else:
+        assert [(r["seed"], r["success"], r["failure"]) for r in records] == [
+            (100, True, None), (101, False, "Boom"), (102, True, None),
+        ]
+
+
+def test_batch_distribute_helper_with_profile(mocker):
+    # Setup
+    async def generate(**kwargs):
+        from randovania.lib import profiling_lib
+        profiling_lib.increment("reach_copies", 3)
+        return MagicMock()
+
+    mocker.patch("randovania.generator.generator.generate_and_validate_description",
+                 new_callable=AsyncMock, side_effect=generate)
+
+    # Run
+    record = batch_distribute.batch_distribute_helper(MagicMock(), 20, 67, True, MagicMock(), True)
+
+    # Assert
+    assert record["success"]
+    assert record["profile"]["counters"] == {"reach_copies": 3}
+
+
+def test_batch_distribute_helper_max_expansions(mocker):
+    # Setup
+    async def generate(**kwargs):
+        kwargs["resolver_stats"].expand(0)
+        kwargs["resolver_stats"].expand(1)
+        return MagicMock()
+
+    mock_generate_description: AsyncMock = mocker.patch(
+        "randovania.generator.generator.generate_and_validate_description",
+        new_callable=AsyncMock, side_effect=generate)
+
+    # Run
+    record = batch_distribute.batch_distribute_helper(MagicMock(), 20, 67, True, MagicMock(), max_expansions=500)
+
+    # Assert
+    kwargs = mock_generate_description.call_args.kwargs
+    assert kwargs["timeout"] is None
+    assert kwargs["resolver_stats"].max_expansions == 500
+    assert record["resolver"] == {
+        "states_expanded": 2,
+        "reach_calculations": 0,
+        "backtracks": 0,
+        "max_depth": 1,
+        "cache_hits": 0,
+    }
@@ -0,0 +1,87 @@
+import argparse
+import json
+
+import pytest
+
+from randovania.cli.commands import benchmark_resolver
+
+
+def _result(outcome="possible", states_expanded=100, seconds=2.0, peak_memory=1000):
+    return {
+        "outcome": outcome,
+        "states_expanded": states_expanded,
+        "seconds": seconds,
+        "peak_memory": peak_memory,
+    }
+
+
+@pytest.mark.parametrize(["result", "expected"], [
+    (_result(), []),
+    (_result(states_expanded=50, seconds=1.0, peak_memory=500), []),
+    (_result(outcome="impossible"), ["a.rdvgame: outcome went from possible to impossible"]),
+    (_result(states_expanded=101), ["a.rdvgame: states expanded went from 100 to 101"]),
+    (_result(seconds=2.9), []),
+    (_result(seconds=3.1), ["a.rdvgame: seconds went from 2.0 to 3.1"]),
+    (_result(peak_memory=2000), []),
+])
+def test_compare_to_baseline(result, expected):
+    # Setup
+    baseline = {"a.rdvgame": _result()}
+
+    # Run
+    regressions = benchmark_resolver.compare_to_baseline(baseline, {"a.rdvgame": result},
+                                                         expansion_tolerance=0.0, time_tolerance=0.5)
+
+    # Assert
+    assert regressions == expected
+
+
+def test_compare_to_baseline_missing():
+    # Setup
+    baseline = {"a.rdvgame": {"outcome": "possible"}}
+    results = {"a.rdvgame": _result(), "b.rdvgame": _result()}
+
+    # Run
+    regressions = benchmark_resolver.compare_to_baseline(baseline, results, memory_tolerance=0.0)
+
+    # Assert
+    assert regressions == ["b.rdvgame: not in the baseline"]
+
+
+@pytest.mark.parametrize(["repeat", "valid"], [("0", False), ("-2", False), ("1", True)])
+def test_repeat_must_be_positive(repeat, valid):
+    # Setup
+    parser = argparse.ArgumentParser()
+    benchmark_resolver.add_benchmark_resolver_command(parser.add_subparsers())
+
+    # Run
+    if valid:
+        args = parser.parse_args(["benchmark-resolver", "baseline.json", "--repeat", repeat])
+        assert args.repeat == int(repeat)
+    else:
+        with pytest.raises(SystemExit):
+            parser.parse_args(["benchmark-resolver", "baseline.json", "--repeat", repeat])
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.parametrize("layout", [
+    # corruption_slow_impossible.rdvgame is left for the benchmark-resolver command, as it takes too long
+    "corruption_impossible.rdvgame",
+    "../log_files/corruption_seed_a.rdvgame",
+    "../log_files/prime1-vanilla.rdvgame",
+    "../log_files/prime1_and_2_multi.rdvgame",
+    "../log_files/seed_a.rdvgame",
+    "prime1_impossible.rdvgame",
+])
+def test_corpus_matches_baseline(test_files_dir, layout: str):
+    # Setup
+    baseline_file = test_files_dir.joinpath("resolver_benchmark", "baseline.json")
+    baseline_data = json.loads(baseline_file.read_text())
+
+    # Run
+    result = benchmark_resolver.benchmark_layout(baseline_file.parent.joinpath(layout),
+                                                 baseline_data["max_expansions"],
+                                                 repeat=1, measure_memory=False)
+
+    # Assert
+    assert benchmark_resolver.compare_to_baseline(baseline_data["layouts"], {layout: result}) == []
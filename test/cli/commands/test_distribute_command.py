@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from mock import MagicMock, ANY, AsyncMock
 
@@ -10,11 +11,16 @@ from randovania.layout.permalink import Permalink
 
 @pytest.mark.parametrize("preset_name", [None, "Starter Preset"])
 @pytest.mark.parametrize("no_retry", [False, True])
-def test_distribute_command_logic(no_retry: bool, preset_name: str, mocker, preset_manager):
+@pytest.mark.parametrize("filler_processes", [None, 2])
+@pytest.mark.parametrize("parallel_attempts", [None, 3])
+@pytest.mark.parametrize("with_profile", [False, True])
+def test_distribute_command_logic(no_retry: bool, preset_name: str, filler_processes, parallel_attempts,
+                                  with_profile, mocker, preset_manager, tmp_path):
     # Setup
     mock_generate: AsyncMock = mocker.patch("randovania.generator.generator.generate_and_validate_description",
                                             new_callable=AsyncMock)
     mock_from_str: MagicMock = mocker.patch("randovania.layout.permalink.Permalink.from_str", autospec=True)
+    mock_executor: MagicMock = mocker.patch("concurrent.futures.ProcessPoolExecutor")
 
     args = MagicMock()
     args.output_file = Path("asdfasdf/qwerqwerqwer/zxcvzxcv.json")
@@ -22,9 +28,17 @@ def test_distribute_command_logic(no_retry: bool, preset_name: str, mocker, pres
     args.game = RandovaniaGame.PRIME2.value
     args.preset_name = preset_name
     args.seed_number = 0
+    args.filler_processes = filler_processes
+    args.parallel_attempts = parallel_attempts
+    args.profile_output = tmp_path.joinpath("profile.json") if with_profile else None
     extra_args = {}
     if no_retry:
         extra_args["attempts"] = 0
+    if filler_processes is not None:
+        extra_args["filler_processes"] = filler_processes
+    if parallel_attempts is not None:
+        extra_args["attempt_executor"] = mock_executor.return_value.__enter__.return_value
+        extra_args["parallel_attempts"] = parallel_attempts
 
     if preset_name is None:
         permalink = mock_from_str.return_value
@@ -52,3 +66,11 @@ def test_distribute_command_logic(no_retry: bool, preset_name: str, mocker, pres
 
     save_file_mock: MagicMock = mock_generate.return_value.save_to_file
     save_file_mock.assert_called_once_with(args.output_file)
+    if with_profile:
+        assert set(json.loads(args.profile_output.read_text()).keys()) == {"total", "phases", "counters"}
+
+    if parallel_attempts is not None:
+        mock_executor.assert_called_once_with(parallel_attempts)
+        mock_executor.return_value.__exit__.assert_called_once()
+    else:
+        mock_executor.assert_not_called()
@@ -0,0 +1,93 @@
+import json
+from unittest.mock import MagicMock
+
+from randovania.game_description import data_reader, data_writer, database_cache
+from randovania.games.game import RandovaniaGame
+
+
+def _decoder(source_path):
+    def decode():
+        with source_path.open("r") as data_file:
+            return data_reader.decode_data(json.load(data_file))
+
+    return MagicMock(side_effect=decode)
+
+
+def test_load_game_description_round_trip(test_files_dir, tmp_path):
+    # Setup
+    source_path = test_files_dir.joinpath("prime_data_as_json.json")
+    decode = _decoder(source_path)
+
+    # Run
+    first = database_cache.load_game_description(RandovaniaGame.PRIME2, tmp_path, source_path, decode)
+    second = database_cache.load_game_description(RandovaniaGame.PRIME2, tmp_path, source_path, decode)
+
+    # Assert
+    decode.assert_called_once_with()
+    assert first is not second
+    assert data_writer.write_game_description(second) == data_writer.write_game_description(first)
+    assert [f.name for f in tmp_path.iterdir()] == [
+        database_cache.cache_file_for(tmp_path, RandovaniaGame.PRIME2, source_path).name
+    ]
+
+
+def test_load_game_description_corrupted_cache(test_files_dir, tmp_path):
+    # Setup
+    source_path = test_files_dir.joinpath("prime_data_as_json.json")
+    database_cache.cache_file_for(tmp_path, RandovaniaGame.PRIME2, source_path).write_bytes(b"not a pickle")
+    decode = _decoder(source_path)
+
+    # Run
+    database_cache.load_game_description(RandovaniaGame.PRIME2, tmp_path, source_path, decode)
+    database_cache.load_game_description(RandovaniaGame.PRIME2, tmp_path, source_path, decode)
+
+    # Assert
+    decode.assert_called_once_with()
+
+
+def test_load_game_description_source_changed(test_files_dir, tmp_path):
+    # Setup
+    source_path = tmp_path.joinpath("source.json")
+    cache_path = tmp_path.joinpath("cache")
+    source_path.write_bytes(test_files_dir.joinpath("prime_data_as_json.json").read_bytes())
+    decode = _decoder(source_path)
+
+    database_cache.load_game_description(RandovaniaGame.PRIME2, cache_path, source_path, decode)
+    old_cache = database_cache.cache_file_for(cache_path, RandovaniaGame.PRIME2, source_path)
+
+    # Run
+    source_path.write_text(source_path.read_text() + "\n")
+    database_cache.load_game_description(RandovaniaGame.PRIME2, cache_path, source_path, decode)
+
+    # Assert
+    assert decode.call_count == 2
+    new_cache = database_cache.cache_file_for(cache_path, RandovaniaGame.PRIME2, source_path)
+    assert new_cache != old_cache
+    assert list(cache_path.iterdir()) == [new_cache]
+
+
+def test_code_hash_changes_with_pickled_code(tmp_path):
+    # Setup
+    tmp_path.joinpath("game_description").mkdir()
+    tmp_path.joinpath("games").mkdir()
+    code_path = tmp_path.joinpath("game_description", "node.py")
+    code_path.write_text("class Node: pass\n")
+    tmp_path.joinpath("games", "game.py").write_text("class RandovaniaGame: pass\n")
+    old_hash = database_cache._code_hash.__wrapped__(tmp_path)
+
+    # Run
+    code_path.write_text("class Node:\n    index = 0\n")
+    new_hash = database_cache._code_hash.__wrapped__(tmp_path)
+
+    # Assert
+    assert new_hash != old_hash
+    assert database_cache._code_hash.__wrapped__(tmp_path) == new_hash
+
+
+def test_load_game_description_without_cache_path(test_files_dir):
+    decode = MagicMock()
+
+    result = database_cache.load_game_description(RandovaniaGame.PRIME2, None,
+                                                  test_files_dir.joinpath("prime_data_as_json.json"), decode)
+
+    assert result is decode.return_value
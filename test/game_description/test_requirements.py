@@ -1,14 +1,17 @@
+import dataclasses
+import pickle
 from typing import Tuple
 from unittest.mock import MagicMock
 
 import pytest
 
-from randovania.game_description import data_reader
+from randovania.game_description import data_reader, data_writer
 from randovania.game_description.requirements import ResourceRequirement, RequirementList, RequirementSet, \
-    RequirementAnd, RequirementOr, Requirement, MAX_DAMAGE, RequirementTemplate
+    RequirementAnd, RequirementOr, Requirement, MAX_DAMAGE, RequirementTemplate, resolve_templates
 from randovania.game_description.resources import search
 from randovania.game_description.resources.item_resource_info import ItemResourceInfo
 from randovania.game_description.resources.resource_database import ResourceDatabase
+from randovania.game_description.resources.resource_info import convert_resources_to_vector
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
 from randovania.games.game import RandovaniaGame
@@ -431,6 +434,160 @@ def test_requirement_template_nested(database):
     assert hash(use_a) != hash(use_b)
 
 
+@pytest.mark.parametrize("resources", [
+    {},
+    {"A": 1},
+    {"B": 1},
+    {"A": 1, "C": 1},
+    {"A": 1, "B": 1, "C": 1},
+])
+def test_compiled_requirement_satisfied(resources, database):
+    # Setup
+    current_resources = {_make_req(name)[0]: quantity for name, quantity in resources.items()}
+    requirement = RequirementOr([
+        RequirementAnd([_req("A"), ResourceRequirement(_make_req("C")[0], 1, True)]),
+        RequirementAnd([_req("B"), RequirementOr([_req("A"), _req("C")])]),
+        Requirement.impossible(),
+    ])
+
+    # Run
+    vector = convert_resources_to_vector(current_resources)
+
+    # Assert
+    assert requirement.compiled().satisfied(vector, current_resources, 99, database) == requirement.satisfied(
+        current_resources, 99, database)
+    as_set = requirement.as_set(database)
+    assert as_set.compiled().satisfied(vector, current_resources, 99, database) == as_set.satisfied(
+        current_resources, 99, database)
+
+
+def test_compiled_requirement_new_slot_after_vector(database):
+    # Setup
+    vector = convert_resources_to_vector({})
+    requirement = ResourceRequirement(SimpleResourceInfo(1234, "Unused", "Unused", ResourceType.MISC), 1, True)
+
+    # Run
+    result = requirement.compiled().satisfied(vector, {}, 99, database)
+
+    # Assert
+    assert result
+
+
+def test_pickle_drops_process_caches(database):
+    # Setup
+    item = database.item[0]
+    requirement = RequirementAnd([
+        RequirementOr([ResourceRequirement(item, 1, False), Requirement.trivial()]),
+    ])
+    requirement_set = requirement.as_set(database)
+    hash(requirement)
+    requirement.compiled()
+    requirement_set.compiled()
+
+    # Run
+    new_requirement = pickle.loads(pickle.dumps(requirement))
+    new_set = pickle.loads(pickle.dumps(requirement_set))
+
+    # Assert
+    assert new_requirement == requirement
+    assert new_set == requirement_set
+    assert new_requirement._cached_hash is None
+    assert new_requirement._compiled is None
+    assert new_requirement._as_set_cache is None
+    assert new_set._cached_hash is None
+    assert new_set._compiled is None
+
+
+def test_resolve_templates(database):
+    # Setup
+    looked_up = []
+
+    class Templates(dict):
+        def __getitem__(self, item):
+            looked_up.append(item)
+            return super().__getitem__(item)
+
+    item_a, item_b, item_c = database.item
+    database = dataclasses.replace(database, requirement_template=Templates({
+        "Template A": RequirementAnd([ResourceRequirement(item_a, 1, False), RequirementTemplate("Template B")]),
+        "Template B": ResourceRequirement(item_b, 1, False),
+    }))
+    requirement = RequirementOr([RequirementTemplate("Template A"), ResourceRequirement(item_c, 1, False)])
+    resources = {item_a: 1, item_b: 1}
+
+    # Run
+    resolve_templates([requirement], database)
+    lookups_when_resolving = sorted(looked_up)
+    looked_up.clear()
+
+    # Assert
+    assert lookups_when_resolving == ["Template A", "Template B"]
+    assert requirement.satisfied(resources, 99, database)
+    assert not requirement.satisfied({}, 99, database)
+    assert looked_up == []
+    assert data_writer.write_requirement(requirement) == {
+        "type": "or",
+        "data": [
+            {"type": "template", "data": "Template A"},
+            {"type": "resource", "data": {"type": 0, "index": 2, "amount": 1, "negate": False}},
+        ],
+    }
+
+
+def test_resolved_template_with_other_database(database):
+    # Setup
+    template = RequirementTemplate("Template")
+    first = dataclasses.replace(database, requirement_template={"Template": Requirement.trivial()})
+    second = dataclasses.replace(database, requirement_template={"Template": Requirement.impossible()})
+    resolve_templates([template], first)
+
+    # Run
+    new_template = pickle.loads(pickle.dumps(template))
+
+    # Assert
+    assert template.satisfied({}, 99, first)
+    assert not template.satisfied({}, 99, second)
+    assert new_template._resolved is None
+
+
+def test_as_set_memoised_per_database(database):
+    # Setup
+    database.requirement_template["Use A"] = _req("A")
+    requirement = RequirementAnd([RequirementTemplate("Use A"), RequirementOr([_req("B"), _req("C")])])
+    other_database = dataclasses.replace(database, requirement_template={"Use A": _req("C")})
+
+    # Run
+    first = requirement.as_set(database)
+    second = requirement.as_set(database)
+    other = requirement.as_set(other_database)
+
+    # Assert
+    assert first is second
+    assert other == RequirementSet([RequirementList([_req("C"), _req("B")]), RequirementList([_req("C")])])
+    assert requirement.as_set(database) == first
+
+
+@pytest.mark.parametrize("requirement", [
+    RequirementAnd([_req("A"), _req("B"), RequirementOr([_req("A"), _req("C")])]),
+    RequirementAnd([RequirementAnd([_req("A")]), RequirementOr([_req("B"), _req("C")]),
+                    RequirementOr([_req("A"), _req("B")])]),
+    RequirementAnd([_req("A"), RequirementOr([])]),
+    RequirementAnd([RequirementAnd([]), RequirementOr([Requirement.trivial(), _req("C")])]),
+    RequirementAnd([]),
+])
+def test_requirement_and_as_set_same_as_union(requirement, database):
+    # Setup
+    expected = RequirementSet.trivial()
+    for item in requirement.items:
+        expected = expected.union(item.as_set(database))
+
+    # Run
+    result = requirement.as_set(database)
+
+    # Assert
+    assert result == expected
+
+
 def _json_req(amount: int, index: int = 1, resource_type: int = 3):
     return {"type": "resource", "data": {"type": resource_type, "index": index, "amount": amount, "negate": False}}
 
@@ -473,6 +630,58 @@ def test_requirement_damage(damage, items, requirement, echoes_resource_database
     assert req.damage(resources, echoes_resource_database) == damage
 
 
+def _damage_req(amount: int, index: int = 0):
+    return ResourceRequirement(SimpleResourceInfo(index, "Damage", "Damage", ResourceType.DAMAGE), amount, False)
+
+
+@pytest.mark.parametrize("requirement", [
+    _damage_req(50),
+    RequirementAnd([_damage_req(50), _damage_req(30)]),
+    RequirementOr([_damage_req(50), _damage_req(30)]),
+    RequirementOr([_damage_req(50), _req("A")]),
+    RequirementOr([_damage_req(16), RequirementAnd([_damage_req(10), _damage_req(10)])]),
+    RequirementAnd([_damage_req(100), RequirementOr([_damage_req(50), _req("A")])]),
+    RequirementAnd([_damage_req(20), _req("B")]),
+    RequirementAnd([_damage_req(20), RequirementTemplate("Damage Template")]),
+    Requirement.trivial(),
+    Requirement.impossible(),
+])
+@pytest.mark.parametrize("has_a", [False, True])
+def test_threshold_and_damage_same_as_satisfied_and_damage(requirement, has_a, database):
+    # Setup
+    database = dataclasses.replace(database, requirement_template={
+        "Damage Template": RequirementOr([_damage_req(40, 1), _req("A")]),
+    })
+    resources = {_make_req("A")[0]: 1} if has_a else {}
+
+    # Run
+    threshold, damage = requirement.threshold_and_damage(resources, database)
+
+    # Assert
+    assert damage == requirement.damage(resources, database)
+    for energy in range(0, 200, 5):
+        assert (energy > threshold) == requirement.satisfied(resources, energy, database)
+
+
+@pytest.mark.parametrize(["requirement", "expected"], [
+    (Requirement.trivial(), ((), False)),
+    (Requirement.impossible(), ((), False)),
+    (RequirementOr([_req("A"), RequirementAnd([_req("A"), _req("B")])]), (("A",), False)),
+    (RequirementOr([_req("A"), _req("B")]), (("A", "B"), False)),
+    (RequirementAnd([_damage_req(20), _req("B")]), (("B", "Damage"), True)),
+])
+def test_requirement_set_dependencies(requirement, expected, database):
+    # Setup
+    requirement_set = requirement.as_set(database)
+
+    # Run
+    resources, uses_energy = requirement_set.dependencies()
+
+    # Assert
+    assert (tuple(sorted(resource.long_name for resource in resources)), uses_energy) == expected
+    assert requirement_set.dependencies() is requirement_set.dependencies()
+
+
 def test_simple_echoes_damage(echoes_resource_database):
     db = echoes_resource_database
     req = ResourceRequirement(
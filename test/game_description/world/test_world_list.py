@@ -1,9 +1,11 @@
-from randovania.game_description.requirements import ResourceRequirement, RequirementAnd
+from unittest.mock import MagicMock
+
+from randovania.game_description.requirements import ResourceRequirement, RequirementAnd, Requirement
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
 from randovania.game_description.world.area import Area
 from randovania.game_description.world.dock import DockConnection, DockWeakness, DockLockType, DockType
-from randovania.game_description.world.node import DockNode
+from randovania.game_description.world.node import DockNode, GenericNode, EventNode
 from randovania.game_description.world.world import World
 from randovania.game_description.world.world_list import WorldList
 
@@ -35,3 +37,53 @@ def test_connections_from_dock_blast_shield(empty_patches):
     assert result_2 == [
         (node_1, req_2),
     ]
+
+
+def test_condensed_graph():
+    # Setup
+    event = SimpleResourceInfo(1, "Ev1", "Ev1", ResourceType.EVENT)
+    nodes = [GenericNode(f"Node {i}", i == 4, None, i) for i in range(5)]
+    event_node = EventNode("Event", False, None, 5, event)
+    trivial = Requirement.trivial()
+    area = Area("Area", False, 0x20, 0, True, nodes + [event_node], {
+        nodes[0]: {nodes[1]: trivial},
+        nodes[1]: {nodes[0]: trivial, nodes[2]: trivial, event_node: trivial},
+        nodes[2]: {nodes[1]: trivial, nodes[3]: trivial, nodes[4]: trivial},
+        nodes[3]: {nodes[2]: ResourceRequirement(event, 1, False)},
+        nodes[4]: {nodes[2]: trivial},
+        event_node: {nodes[1]: trivial},
+    })
+    world_list = WorldList([World("World", None, 0x10, [area])])
+
+    # Run
+    condensed = world_list.condensed_graph
+
+    # Assert
+    assert condensed.group_of(nodes[2]) == (nodes[0], nodes[1], nodes[2])
+    assert condensed.group_of(nodes[3]) == (nodes[3],)
+    assert condensed.group_of(nodes[4]) == (nodes[4],)
+    assert condensed.group_of(event_node) == (event_node,)
+    assert condensed.is_internal(nodes[1], nodes[2])
+    assert not condensed.is_internal(nodes[1], event_node)
+    assert not condensed.is_internal(nodes[2], nodes[3])
+    assert condensed.path_inside_group(nodes[0], nodes[2]) == (nodes[0], nodes[1])
+    assert condensed.path_inside_group(nodes[2], nodes[2]) == ()
+    assert world_list.condensed_graph is condensed
+
+
+def test_condensed_graph_after_patch_requirements():
+    # Setup
+    trick = SimpleResourceInfo(2, "Trick", "Trick", ResourceType.TRICK)
+    nodes = [GenericNode(f"Node {i}", False, None, i) for i in range(2)]
+    area = Area("Area", False, 0x20, 0, True, nodes, {
+        nodes[0]: {nodes[1]: ResourceRequirement(trick, 1, False)},
+        nodes[1]: {nodes[0]: Requirement.trivial()},
+    })
+    world_list = WorldList([World("World", None, 0x10, [area])])
+    assert world_list.condensed_graph.group_of(nodes[0]) == (nodes[0],)
+
+    # Run
+    world_list.patch_requirements({trick: 1}, 1.0, MagicMock())
+
+    # Assert
+    assert world_list.condensed_graph.group_of(nodes[0]) == (nodes[0], nodes[1])
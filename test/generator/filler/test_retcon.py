@@ -0,0 +1,45 @@
+import multiprocessing
+from random import Random
+from unittest.mock import MagicMock
+
+import pytest
+
+from randovania.games.game import RandovaniaGame
+from randovania.generator.filler import retcon, runner
+from randovania.generator.filler.filler_configuration import FillerConfiguration
+from randovania.generator.filler.player_state import PlayerState
+from randovania.generator.generator import create_player_pool
+from randovania.resolver import bootstrap
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_weighted_potential_actions_with_executor(preset_manager, start_method):
+    # Setup
+    configuration = preset_manager.default_preset_for_game(RandovaniaGame.PRIME1).get_preset().configuration
+    pool = create_player_pool(Random(5000), configuration, 0, 1)
+    new_game, state = bootstrap.logic_bootstrap(configuration, pool.game, pool.patches)
+    player_state = PlayerState(
+        index=0,
+        game=new_game,
+        initial_state=state,
+        pickups_left=runner._split_expansions(pool.pickups)[0],
+        configuration=FillerConfiguration(
+            randomization_mode=configuration.available_locations.randomization_mode,
+            minimum_random_starting_items=0,
+            maximum_random_starting_items=0,
+            indices_to_exclude=frozenset(),
+            multi_pickup_placement=False,
+        ),
+    )
+    player_state.update_for_new_state()
+    status_update = MagicMock()
+
+    # Run
+    serial = retcon.weighted_potential_actions(player_state, status_update, 100)
+    with retcon.WeightingPool([new_game], 2, multiprocessing.get_context(start_method)) as executor:
+        parallel = retcon.weighted_potential_actions(player_state, status_update, 100, executor)
+
+    # Assert
+    assert len(serial) > retcon._MINIMUM_ACTIONS_PER_TASK
+    assert list(parallel.items()) == list(serial.items())
+    status_update.assert_called_with(f"Checked {len(serial)} of {len(serial)} options.")
@@ -0,0 +1,91 @@
+import dataclasses
+from random import Random
+
+import pytest
+
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.games.game import RandovaniaGame
+from randovania.generator import feasibility, generator
+from randovania.generator.filler.filler_library import UnableToGenerate
+from randovania.generator.filler.runner import PlayerPool
+
+
+@pytest.fixture(name="prime1_pool")
+def _prime1_pool(preset_manager) -> PlayerPool:
+    preset = preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset()
+    return generator.create_player_pool(Random(1000), preset.configuration, 0, 1)
+
+
+def _without_pickup(pool: PlayerPool, name: str) -> PlayerPool:
+    return dataclasses.replace(pool, pickups=[pickup for pickup in pool.pickups if pickup.name != name])
+
+
+def test_check_player_pool_feasible(prime1_pool):
+    # Run
+    feasibility.check_player_pool(prime1_pool, 1)
+
+
+def test_check_player_pool_missing_victory_item(prime1_pool):
+    # Setup
+    pool = _without_pickup(prime1_pool, "Artifact of Truth")
+
+    # Run
+    with pytest.raises(UnableToGenerate, match="Victory condition can't be satisfied"):
+        feasibility.check_player_pool(pool, 1)
+
+
+@pytest.mark.parametrize("num_players", [1, 2])
+def test_check_player_pool_missing_movement_item(prime1_pool, num_players):
+    # Setup
+    pool = _without_pickup(prime1_pool, "Morph Ball")
+
+    # Run
+    if num_players == 1:
+        with pytest.raises(UnableToGenerate, match="20 different pickups are required"):
+            feasibility.check_player_pool(pool, num_players)
+    else:
+        # The other player might have the locations these need
+        feasibility.check_player_pool(pool, num_players)
+
+
+def test_check_player_pool_too_many_excluded(prime1_pool):
+    # Setup
+    configuration = prime1_pool.configuration
+    pool = dataclasses.replace(prime1_pool, configuration=dataclasses.replace(
+        configuration,
+        available_locations=dataclasses.replace(
+            configuration.available_locations,
+            excluded_indices=frozenset(PickupIndex(i) for i in range(10, 100)),
+        ),
+    ))
+
+    # Run
+    with pytest.raises(UnableToGenerate, match="only 10 locations can be reached"):
+        feasibility.check_player_pool(pool, 1)
+
+
+def test_relaxed_reach_grows_with_pickups(prime1_pool):
+    # Run
+    without_morph = feasibility.relaxed_reach_with_pickups(prime1_pool,
+                                                           _without_pickup(prime1_pool, "Morph Ball").pickups)
+    complete = feasibility.relaxed_reach_with_pickups(prime1_pool, prime1_pool.pickups)
+
+    # Assert
+    assert without_morph.nodes < complete.nodes
+    assert complete.victory_condition_satisfied()
+
+
+def test_required_pickup_names_same_as_each_name(prime1_pool):
+    # Setup
+    expected = [
+        name for name in sorted({pickup.name for pickup in prime1_pool.pickups})
+        if not feasibility.relaxed_reach_with_pickups(
+            prime1_pool, _without_pickup(prime1_pool, name).pickups).victory_condition_satisfied()
+    ]
+
+    # Run
+    required = feasibility._required_pickup_names(prime1_pool)
+
+    # Assert
+    assert required
+    assert required == expected
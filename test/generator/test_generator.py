@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
 from typing import Callable, Union
 
 import pytest
@@ -5,9 +8,13 @@ from mock import MagicMock, patch, call, AsyncMock
 
 import randovania
 from randovania.generator import generator
+from randovania.generator.filler.filler_library import UnableToGenerate
 from randovania.layout.layout_description import LayoutDescription
+from randovania.lib import profiling_lib
+from randovania.resolver.exceptions import GenerationFailure
 
 
+@patch("randovania.generator.feasibility.check_player_pool", autospec=True)
 @patch("randovania.generator.generator._validate_item_pool_size", autospec=True)
 @patch("randovania.generator.generator.create_player_pool", autospec=True)
 @patch("randovania.generator.generator._distribute_remaining_items", autospec=True)
@@ -17,6 +24,7 @@ async def test_create_patches(mock_random: MagicMock,
                               mock_distribute_remaining_items: MagicMock,
                               mock_create_player_pool: MagicMock,
                               mock_validate_item_pool_size: MagicMock,
+                              mock_check_player_pool: MagicMock,
                               mocker,
                               ):
     # Setup
@@ -48,7 +56,12 @@ async def test_create_patches(mock_random: MagicMock,
         call(player_pools[i].pickups, player_pools[i].game, player_pools[i].configuration)
         for i in range(num_players)
     ])
-    mock_run_filler.assert_awaited_once_with(rng, {i: player_pools[i] for i in range(num_players)}, status_update)
+    mock_check_player_pool.assert_has_calls([
+        call(player_pools[i], num_players)
+        for i in range(num_players)
+    ])
+    mock_run_filler.assert_awaited_once_with(rng, {i: player_pools[i] for i in range(num_players)}, status_update,
+                                             None)
     mock_distribute_remaining_items.assert_called_once_with(rng, filler_result.player_results)
 
     assert result == LayoutDescription(
@@ -57,3 +70,156 @@ async def test_create_patches(mock_random: MagicMock,
         all_patches=mock_distribute_remaining_items.return_value,
         item_order=filler_result.action_log,
     )
+
+
+def test_rng_for_attempt():
+    permalink = MagicMock()
+    permalink.as_bytes = b"permalink"
+
+    first = [generator._rng_for_attempt(permalink, 1).random() for _ in range(2)]
+    second = generator._rng_for_attempt(permalink, 2).random()
+
+    assert first[0] == Random(b"permalink").random()
+    assert first[0] == first[1]
+    assert second != first[0]
+    assert second == generator._rng_for_attempt(permalink, 2).random()
+
+
+@pytest.mark.parametrize(["failing", "parallel_attempts", "expected"], [
+    (set(), 1, 1),
+    ({1, 2}, 1, 3),
+    ({1, 2}, 3, 3),
+    ({1, 3}, 4, 2),
+    ({2, 3, 4, 5}, 2, 1),
+])
+@pytest.mark.asyncio
+async def test_run_parallel_attempts(failing, parallel_attempts, expected, mocker):
+    # Setup
+    def run_attempt(permalink, attempt_number, stop_event, filler_processes, profile):
+        if attempt_number in failing:
+            return generator._AttemptResult(None, UnableToGenerate(f"attempt {attempt_number}"), None)
+        return generator._AttemptResult(({0: permalink}, [attempt_number]), None, None)
+
+    mocker.patch("randovania.generator.generator._run_attempt", side_effect=run_attempt)
+    permalink = MagicMock()
+    callback = MagicMock()
+
+    # Run
+    with ThreadPoolExecutor(parallel_attempts) as executor:
+        result = await generator._run_parallel_attempts(permalink, 5, executor, parallel_attempts, callback)
+
+    # Assert
+    assert result == ({0: permalink}, [expected])
+    started = [c.args[0] for c in callback.call_args_list]
+    assert started == list(range(1, len(started) + 1))
+    assert expected in started
+
+
+@pytest.mark.asyncio
+async def test_run_parallel_attempts_all_fail(mocker):
+    # Setup
+    def run_attempt(permalink, attempt_number, stop_event, filler_processes, profile):
+        return generator._AttemptResult(None, UnableToGenerate(f"attempt {attempt_number}"), None)
+
+    mocker.patch("randovania.generator.generator._run_attempt", side_effect=run_attempt)
+
+    # Run
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(UnableToGenerate, match="attempt 3"):
+            await generator._run_parallel_attempts(MagicMock(), 3, executor, 2, None)
+
+
+@pytest.mark.asyncio
+async def test_run_parallel_attempts_stops_later_attempts(mocker):
+    # Setup
+    stopped = []
+
+    def run_attempt(permalink, attempt_number, stop_event, filler_processes, profile):
+        if attempt_number == 1:
+            return generator._AttemptResult(({0: permalink}, [attempt_number]), None, None)
+        if stop_event.wait(10):
+            stopped.append(attempt_number)
+        return generator._AttemptResult(None, None, None)
+
+    mocker.patch("randovania.generator.generator._run_attempt", side_effect=run_attempt)
+    permalink = MagicMock()
+
+    # Run
+    with ThreadPoolExecutor(2) as executor:
+        result = await generator._run_parallel_attempts(permalink, 5, executor, 2, None)
+
+    # Assert
+    assert result == ({0: permalink}, [1])
+    assert stopped == [2]
+
+
+@pytest.mark.asyncio
+async def test_run_parallel_attempts_merges_profiles(mocker):
+    # Setup
+    def run_attempt(permalink, attempt_number, stop_event, filler_processes, profile):
+        assert filler_processes == 3
+        assert profile
+        with profiling_lib.profile() as attempt_profile:
+            with profiling_lib.phase("filler"):
+                pass
+            profiling_lib.increment("attempt", attempt_number)
+        if attempt_number == 1:
+            return generator._AttemptResult(None, UnableToGenerate("attempt 1"), attempt_profile.as_json)
+        return generator._AttemptResult(({0: permalink}, [attempt_number]), None, attempt_profile.as_json)
+
+    mocker.patch("randovania.generator.generator._run_attempt", side_effect=run_attempt)
+
+    # Run
+    with profiling_lib.profile() as profile:
+        with ThreadPoolExecutor(1) as executor:
+            result = await generator._run_parallel_attempts(MagicMock(), 5, executor, 1, None, 3)
+
+    # Assert
+    assert result[1] == [2]
+    assert profile.phases["filler"].count == 2
+    assert profile.counters == {"attempt": 3}
+
+
+def test_run_attempt_profile(mocker):
+    # Setup
+    filler_results = MagicMock()
+    create_pools_and_fill = mocker.patch("randovania.generator.generator._create_pools_and_fill",
+                                         new_callable=AsyncMock, return_value=filler_results)
+    distribute = mocker.patch("randovania.generator.generator._distribute_remaining_items")
+    mocker.patch("randovania.generator.generator._rng_for_attempt")
+    permalink = MagicMock()
+    permalink.player_count = 1
+
+    # Run
+    result = generator._run_attempt(permalink, 1, MagicMock(), 2, True)
+
+    # Assert
+    assert create_pools_and_fill.call_args.args[3] == 2
+    assert result.result == (distribute.return_value, filler_results.action_log)
+    assert result.failure is None
+    assert result.profile["phases"]["distribute_remaining_items"]["count"] == 1
+    assert profiling_lib.current_profile() is None
+
+
+@pytest.mark.parametrize("player_count", [1, 2])
+@pytest.mark.asyncio
+async def test_generate_and_validate_description_timeout(player_count, mocker):
+    # Setup
+    async def slow_resolve(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    description = MagicMock()
+    mocker.patch("randovania.generator.generator._create_description", new_callable=AsyncMock,
+                 return_value=description)
+    mocker.patch("randovania.resolver.resolver.resolve", side_effect=slow_resolve)
+    mocker.patch("randovania.resolver.resolver.resolve_multiworld", side_effect=slow_resolve)
+    permalink = MagicMock()
+    permalink.player_count = player_count
+
+    # Run
+    if player_count == 1:
+        with pytest.raises(GenerationFailure, match="Timeout reached"):
+            await generator.generate_and_validate_description(permalink, None, True, timeout=0)
+    else:
+        result = await generator.generate_and_validate_description(permalink, None, True, timeout=0)
+        assert result is description
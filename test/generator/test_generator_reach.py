@@ -1,3 +1,4 @@
+import copy
 import dataclasses
 from random import Random
 from typing import Tuple, List
@@ -8,7 +9,7 @@ from randovania.game_description import default_database
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.requirements import Requirement
 from randovania.game_description.resources.pickup_index import PickupIndex
-from randovania.game_description.resources.resource_info import add_resources_into_another
+from randovania.game_description.resources.resource_info import add_resources_into_another, resource_slot
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.search import find_resource_info_with_long_name
 from randovania.game_description.resources.translator_gate import TranslatorGate
@@ -260,3 +261,98 @@ def test_reach_size_from_start_echoes(small_echoes_game_description, default_lay
         "Torvus Bog/Great Bridge/Door to Path of Roots",
     )
     assert len(list(reach.safe_nodes)) == 20
+
+
+def test_copied_reach_does_not_change_original(preset_manager):
+    # Setup
+    preset = preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset()
+    game, state, _ = run_bootstrap(preset)
+    pickups = pool_creator.calculate_pool_results(preset.configuration, game.resource_database).pickups
+    reach = reach_with_all_safe_resources(game, state)
+
+    def reach_data(r: OldGeneratorReach):
+        return (r.state, set(r.nodes), set(r.safe_nodes), dict(r._unreachable_paths),
+                sorted((source, target) for source, target, _ in r._digraph.edges_data()))
+
+    original_data = reach_data(reach)
+
+    # Run
+    reach_copy = copy.deepcopy(reach)
+    reach_copy.advance_to(reach_copy.state.assign_pickups_resources(pickups))
+    for action in get_collectable_resource_nodes_of_reach(reach_copy):
+        reach_copy.act_on(action)
+
+    # Assert
+    assert reach_data(reach_copy) != original_data
+    assert reach_data(reach) == original_data
+
+
+def test_unreachable_paths_index_of_copies(preset_manager):
+    # Setup
+    preset = preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset()
+    game, state, _ = run_bootstrap(preset)
+    pickups = pool_creator.calculate_pool_results(preset.configuration, game.resource_database).pickups
+    reach = reach_with_all_safe_resources(game, state)
+
+    def index_data(r: OldGeneratorReach):
+        return {slot: set(paths) for slot, paths in r._unreachable_paths_by_slot.items() if paths}
+
+    def expected_index_data(r: OldGeneratorReach):
+        result = {}
+        for edge, requirement in r._unreachable_paths.items():
+            for resource in requirement.dependencies()[0]:
+                result.setdefault(resource_slot(resource), set()).add(edge)
+        return result
+
+    original_data = index_data(reach)
+
+    # Run
+    reach_copy = copy.deepcopy(reach)
+    reach_copy.advance_to(reach_copy.state.assign_pickups_resources(pickups[:len(pickups) // 2]))
+
+    # Assert
+    assert index_data(reach) == original_data == expected_index_data(reach)
+    assert index_data(reach_copy) == expected_index_data(reach_copy)
+    assert not set(reach._unreachable_paths).issubset(reach_copy._unreachable_paths)
+
+
+def test_advance_to_same_as_new_reach(preset_manager):
+    # Setup
+    preset = preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset()
+    game, state, _ = run_bootstrap(preset)
+    pickups = pool_creator.calculate_pool_results(preset.configuration, game.resource_database).pickups
+    reach = reach_with_all_safe_resources(game, state)
+    new_state = reach.state.assign_pickups_resources(pickups[:len(pickups) // 2])
+
+    # Run
+    reach.advance_to(new_state)
+    new_reach = OldGeneratorReach.reach_from_state(game, new_state)
+
+    # Assert
+    assert set(reach.nodes) == set(new_reach.nodes)
+    assert set(reach.safe_nodes) == set(new_reach.safe_nodes)
+
+
+def test_safe_nodes_same_as_recalculated(preset_manager):
+    # Setup
+    preset = preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset()
+    game, state, _ = run_bootstrap(preset)
+    pickups = pool_creator.calculate_pool_results(preset.configuration, game.resource_database).pickups
+    reach = reach_with_all_safe_resources(game, state)
+    reach.advance_to(reach.state.assign_pickups_resources(pickups[:len(pickups) // 2]))
+
+    def recalculated_safe_nodes(r: OldGeneratorReach):
+        root = r.state.node.index
+        connected = r._digraph.nodes_reachable_from([root], frozenset())
+        return {node for node in connected if root in r._digraph.nodes_reachable_from([node], frozenset())}
+
+    # Run
+    results = []
+    for action in get_collectable_resource_nodes_of_reach(reach):
+        reach.act_on(action)
+        results.append(({node.index for node in reach.safe_nodes}, recalculated_safe_nodes(reach)))
+
+    # Assert
+    assert results
+    for safe_nodes, expected in results:
+        assert safe_nodes == expected
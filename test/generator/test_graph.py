@@ -0,0 +1,55 @@
+from randovania.game_description.requirements import RequirementSet
+from randovania.generator.graph import RandovaniaGraph
+
+
+def test_copy_is_independent():
+    # Setup
+    graph = RandovaniaGraph.new()
+    for node in range(3):
+        graph.add_node(node)
+    graph.add_edge(0, 1, RequirementSet.trivial())
+    graph.add_edge(1, 2, RequirementSet.trivial())
+
+    # Run
+    graph_copy = graph.copy()
+    graph_copy.add_node(3)
+    graph_copy.add_edge(2, 3, RequirementSet.trivial())
+    graph_copy.remove_edge(0, 1)
+    graph.add_edge(1, 0, RequirementSet.trivial())
+
+    # Assert
+    assert 3 not in graph
+    assert sorted((source, target) for source, target, _ in graph.edges_data()) == [(0, 1), (1, 0), (1, 2)]
+    assert sorted((source, target) for source, target, _ in graph_copy.edges_data()) == [(1, 2), (2, 3)]
+
+
+def test_multi_source_zero_one_bfs():
+    # Setup
+    graph = RandovaniaGraph.new()
+    for node in range(6):
+        graph.add_node(node)
+    for source, target in [(0, 1), (1, 2), (0, 3), (3, 2), (2, 4), (4, 0)]:
+        graph.add_edge(source, target, RequirementSet.trivial())
+
+    # Run
+    distances = graph.multi_source_zero_one_bfs({0}, lambda node: node != 1)
+
+    # Assert
+    assert distances == {0: 0, 1: 1, 2: 0, 3: 0, 4: 0}
+
+
+def test_nodes_reachable_from_and_reaching():
+    # Setup
+    graph = RandovaniaGraph.new()
+    for node in range(6):
+        graph.add_node(node)
+    for source, target in [(0, 1), (1, 0), (1, 2), (2, 3), (3, 1), (3, 4), (5, 0)]:
+        graph.add_edge(source, target, RequirementSet.trivial())
+
+    # Run
+    reachable = graph.nodes_reachable_from([0], {2})
+    reaching = graph.nodes_reaching({0}, {1, 2, 3, 4})
+
+    # Assert
+    assert reachable == {0, 1}
+    assert reaching == {1, 2, 3}
@@ -0,0 +1,70 @@
+from randovania.lib import profiling_lib
+
+
+def test_phase_and_increment_without_profile():
+    with profiling_lib.phase("something"):
+        profiling_lib.increment("counter")
+
+    assert profiling_lib.current_profile() is None
+    assert profiling_lib.phase("something") is profiling_lib.phase("other")
+    profiling_lib.start_phase("something").stop()
+
+
+def test_profile(mocker):
+    mocker.patch("time.perf_counter", autospec=False, side_effect=[0, 1, 2, 4, 5, 6, 9, 10])
+
+    # Run
+    with profiling_lib.profile() as profile:
+        assert profiling_lib.current_profile() is profile
+        with profiling_lib.phase("outer"):
+            with profiling_lib.phase("inner"):
+                profiling_lib.increment("counter")
+            profiling_lib.increment("counter", 5)
+        with profiling_lib.phase("inner"):
+            pass
+
+    # Assert
+    assert profiling_lib.current_profile() is None
+    assert profile.as_json == {
+        "total": 10,
+        "phases": {
+            "inner": {"count": 2, "total": 5, "max": 3},
+            "outer": {"count": 1, "total": 4, "max": 4},
+        },
+        "counters": {"counter": 6},
+    }
+
+
+def test_start_phase(mocker):
+    mocker.patch("time.perf_counter", autospec=False, side_effect=[0, 1, 3, 4])
+
+    # Run
+    with profiling_lib.profile() as profile:
+        timer = profiling_lib.start_phase("explicit")
+        timer.stop()
+
+    # Assert
+    assert profile.as_json["phases"] == {"explicit": {"count": 1, "total": 2, "max": 2}}
+
+
+def test_merge_json():
+    profile = profiling_lib.Profile()
+    profile.add_timing("both", 3)
+    profile.increment("counter", 2)
+    other = profiling_lib.Profile()
+    other.add_timing("both", 5)
+    other.add_timing("other", 1)
+    other.increment("counter", 3)
+
+    # Run
+    profile.merge_json(other.as_json)
+
+    # Assert
+    assert profile.as_json == {
+        "total": 0.0,
+        "phases": {
+            "both": {"count": 2, "total": 8, "max": 5},
+            "other": {"count": 1, "total": 1, "max": 1},
+        },
+        "counters": {"counter": 5},
+    }
@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from randovania.game_description.resources.item_resource_info import ItemResourceInfo
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.game_description.resources.resource_type import ResourceType
+from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
+from randovania.game_description.world.node import EventNode, PickupNode
+from randovania.resolver.action_safety import ActionSafetyTable
+
+
+@pytest.fixture(name="safety_setup")
+def _safety_setup():
+    safe_event = SimpleResourceInfo(0, "Safe", "Safe", ResourceType.EVENT)
+    dangerous_event = SimpleResourceInfo(1, "Dangerous", "Dangerous", ResourceType.EVENT)
+    item = ItemResourceInfo(2, "Item", "Item", 1, None)
+    temporary = ItemResourceInfo(3, "Temporary", "Temporary", 1, None)
+
+    game = MagicMock()
+    game.dangerous_resources = frozenset([dangerous_event, temporary])
+    patches = MagicMock()
+    patches.player_index = 0
+    patches.pickup_assignment = {}
+    table = ActionSafetyTable(game, patches)
+
+    return table, patches, safe_event, dangerous_event, item, temporary
+
+
+def _pickup_target(item, major: bool, resource_lock=None):
+    target = MagicMock()
+    target.player = 0
+    target.pickup.item_category.is_major_category = major
+    target.pickup.item_category.is_key = False
+    target.pickup.all_resources = [(item, 1)]
+    target.pickup.resource_lock = resource_lock
+    target.pickup.resource_gain.return_value = [(item, 1)]
+    return target
+
+
+def test_events(safety_setup):
+    table, patches, safe_event, dangerous_event, item, temporary = safety_setup
+    state = MagicMock()
+
+    assert table.should_check_if_safe(state, EventNode("Safe", False, None, 0, safe_event))
+    assert not table.should_check_if_safe(state, EventNode("Dangerous", False, None, 1, dangerous_event))
+
+
+def test_pickups(safety_setup):
+    table, patches, safe_event, dangerous_event, item, temporary = safety_setup
+    state = MagicMock()
+    state.patches = patches
+    state.resources = {}
+
+    major_node = PickupNode("Major", False, None, 2, PickupIndex(0), True)
+    minor_node = PickupNode("Minor", False, None, 3, PickupIndex(1), False)
+    locked_node = PickupNode("Locked", False, None, 4, PickupIndex(2), True)
+    empty_node = PickupNode("Empty", False, None, 5, PickupIndex(3), True)
+
+    locked_target = _pickup_target(item, True, MagicMock(temporary_item=temporary, item_to_lock=item))
+    patches.pickup_assignment = {
+        PickupIndex(0): _pickup_target(item, True),
+        PickupIndex(1): _pickup_target(item, False),
+        PickupIndex(2): locked_target,
+    }
+
+    # Run
+    major = table.should_check_if_safe(state, major_node)
+    minor = table.should_check_if_safe(state, minor_node)
+    empty = table.should_check_if_safe(state, empty_node)
+
+    # Only gives the temporary item when it's locked
+    unlocked = table.should_check_if_safe(state, locked_node)
+    locked_target.pickup.resource_gain.return_value = [(temporary, 1)]
+    locked = table.should_check_if_safe(state, locked_node)
+
+    # Assert
+    assert (major, minor, empty) == (True, False, False)
+    assert (unlocked, locked) == (True, False)
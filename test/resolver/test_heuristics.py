@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from randovania.game_description.world.node import PickupNode, GenericNode
+from randovania.resolver import heuristics
+from randovania.resolver.event_pickup import EventPickupNode
+
+
+def _logic_with_nodes(count: int):
+    logic = MagicMock()
+    logic.game.world_list.all_nodes = [MagicMock()] * count
+    return logic
+
+
+def test_reachable_nodes():
+    state = MagicMock()
+    state.resources = {"a": 1, "b": 1}
+    reach = MagicMock()
+    reach.nodes = iter([MagicMock(), MagicMock(), MagicMock()])
+
+    assert heuristics.reachable_nodes(state, reach, _logic_with_nodes(5)) == -2.5
+
+
+def test_pickup_nodes():
+    state = MagicMock()
+    state.resources = {"a": 1}
+    reach = MagicMock()
+    reach.collectable_resource_nodes.return_value = [
+        MagicMock(spec=PickupNode),
+        MagicMock(spec=EventPickupNode),
+        MagicMock(spec=GenericNode),
+    ]
+
+    assert heuristics.pickup_nodes(state, reach, _logic_with_nodes(3)) == -1.5
+    reach.collectable_resource_nodes.assert_called_once_with(state)
+
+
+def test_resources_first():
+    # Any amount of reachable nodes is worth less than one resource
+    few_resources = MagicMock()
+    few_resources.resources = {"a": 1}
+    many_resources = MagicMock()
+    many_resources.resources = {"a": 1, "b": 1}
+
+    big_reach = MagicMock()
+    big_reach.nodes = [MagicMock()] * 10
+    small_reach = MagicMock()
+    small_reach.nodes = []
+    logic = _logic_with_nodes(10)
+
+    assert (heuristics.reachable_nodes(many_resources, small_reach, logic)
+            < heuristics.reachable_nodes(few_resources, big_reach, logic))
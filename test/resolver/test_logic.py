@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+from randovania.game_description.requirements import RequirementSet, RequirementList, ResourceRequirement
+from randovania.game_description.resources.item_resource_info import ItemResourceInfo
+from randovania.game_description.resources.resource_type import ResourceType
+from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
+from randovania.resolver.logic import Logic
+
+
+def test_additional_requirements_resources():
+    # Setup
+    logic = Logic(MagicMock(), MagicMock())
+    item_a = ItemResourceInfo(1, "A", "A", 50, None)
+    item_b = ItemResourceInfo(2, "B", "B", 50, None)
+    damage = SimpleResourceInfo(3, "Damage", "Damage", ResourceType.DAMAGE)
+    node_a, node_b, node_c = MagicMock(), MagicMock(), MagicMock()
+
+    logic.additional_requirements[node_a] = RequirementSet([
+        RequirementList([ResourceRequirement(item_a, 1, False)]),
+        RequirementList([ResourceRequirement(item_b, 1, False)]),
+    ])
+    logic.additional_requirements[node_b] = RequirementSet([
+        RequirementList([ResourceRequirement(item_b, 1, False), ResourceRequirement(damage, 10, False)]),
+    ])
+
+    # Run
+    resources_a = logic.additional_requirements_resources(node_a)
+    resources_b = logic.additional_requirements_resources(node_b)
+    resources_c = logic.additional_requirements_resources(node_c)
+
+    logic.additional_requirements[node_a] = RequirementSet([
+        RequirementList([ResourceRequirement(item_b, 2, False)]),
+    ])
+    new_resources_a = logic.additional_requirements_resources(node_a)
+
+    # Assert
+    assert resources_a == frozenset([item_a, item_b])
+    assert resources_b is None
+    assert resources_c == frozenset()
+    assert new_resources_a == frozenset([item_b])
+    assert logic.nodes_by_additional_resource == {
+        item_a: {node_a},
+        item_b: {node_a, node_b},
+        damage: {node_b},
+    }
@@ -1,13 +1,25 @@
+import concurrent.futures
+from random import Random
+from unittest.mock import MagicMock
+
 import pytest
 
+from randovania.game_description.requirements import RequirementSet
+from randovania.games.game import RandovaniaGame
+from randovania.generator import generator
 from randovania.layout.layout_description import LayoutDescription
 from randovania.resolver import resolver, debug
+from randovania.resolver.exceptions import ExpansionBudgetExhausted
+from randovania.resolver.logic import Logic
+from randovania.resolver.resolver_stats import ResolverStats
+from randovania.resolver.transposition_table import state_key
 
 
 @pytest.mark.skip_resolver_tests
+@pytest.mark.parametrize("heuristic", [None, "reachable-nodes", "pickup-nodes"])
 @pytest.mark.parametrize("seed_name", ["seed_a.rdvgame", "corruption_seed_a.rdvgame"])
 @pytest.mark.asyncio
-async def test_resolver_with_log_file(test_files_dir, seed_name: str):
+async def test_resolver_with_log_file(test_files_dir, seed_name: str, heuristic):
     # Setup
     debug.set_level(2)
 
@@ -17,7 +29,186 @@ async def test_resolver_with_log_file(test_files_dir, seed_name: str):
 
     # Run
     final_state_by_resolve = await resolver.resolve(configuration=configuration,
-                                                    patches=patches)
+                                                    patches=patches,
+                                                    heuristic=heuristic)
 
     # Assert
     assert final_state_by_resolve is not None
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.asyncio
+async def test_resolver_in_parallel_with_log_file(test_files_dir):
+    # Setup
+    debug.set_level(0)
+
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "corruption_seed_a.rdvgame"))
+    configuration = description.permalink.presets[0].configuration
+    patches = description.all_patches[0]
+
+    # Run
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        final_state_by_resolve = await resolver.resolve(configuration=configuration,
+                                                        patches=patches,
+                                                        executor=executor)
+
+    # Assert
+    assert final_state_by_resolve is not None
+    assert resolver._steps_to(final_state_by_resolve)
+
+
+@pytest.mark.asyncio
+async def test_advance_depth_in_parallel_shares_additional_requirements(mocker):
+    # Setup
+    mocker.patch("os.cpu_count", return_value=1)
+    mocker.patch("randovania.resolver.resolver_reach.ResolverReach.calculate_reach")
+    node = MagicMock(index=5)
+    mocker.patch("randovania.resolver.resolver._nodes_by_index", return_value={5: node})
+    mocker.patch("randovania.resolver.resolver._next_states",
+                 return_value=[("dead end", None), ("victory", None), ("unexplored", None)])
+    mocker.patch("randovania.resolver.resolver._steps_to", side_effect=lambda state: (state,))
+    mock_replay = mocker.patch("randovania.resolver.resolver._replay_steps")
+
+    requirements = RequirementSet.impossible()
+    explored = []
+
+    def explore_branch(configuration, patches, steps, additional_requirements, stop_event, max_expansions):
+        explored.append((steps, additional_requirements, max_expansions))
+        if steps == ("dead end",):
+            return None, {5: requirements}, ResolverStats(states_expanded=7, max_depth=3)
+        return ("victory", "final"), {}, ResolverStats(states_expanded=2, max_depth=1)
+
+    mocker.patch("randovania.resolver.resolver._explore_branch", side_effect=explore_branch)
+
+    state = MagicMock()
+    logic = Logic(MagicMock(), MagicMock())
+    logic.game.victory_condition.satisfied.return_value = False
+    stats = ResolverStats(max_expansions=20)
+
+    # Run
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        result = await resolver.advance_depth_in_parallel(MagicMock(), MagicMock(), state, logic, MagicMock(),
+                                                          executor, stats)
+
+    # Assert
+    assert result is mock_replay.return_value
+    mock_replay.assert_called_once_with(state, logic, ("victory", "final"))
+    assert explored == [(("dead end",), {}, 19), (("victory",), {5: requirements}, 12)]
+    assert logic.additional_requirements == {node: requirements}
+    assert (stats.states_expanded, stats.max_depth) == (10, 4)
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.parametrize("heuristic", [None, "pickup-nodes"])
+@pytest.mark.asyncio
+async def test_resolver_stats_with_log_file(test_files_dir, heuristic):
+    # Setup
+    debug.set_level(0)
+
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "corruption_seed_a.rdvgame"))
+    configuration = description.permalink.presets[0].configuration
+    patches = description.all_patches[0]
+    stats = ResolverStats()
+
+    # Run
+    final_state_by_resolve = await resolver.resolve(configuration=configuration, patches=patches,
+                                                    heuristic=heuristic, stats=stats)
+    budget = ResolverStats(max_expansions=stats.states_expanded // 2)
+    with pytest.raises(ExpansionBudgetExhausted):
+        await resolver.resolve(configuration=configuration, patches=patches, heuristic=heuristic, stats=budget)
+
+    # Assert
+    assert final_state_by_resolve is not None
+    assert stats.states_expanded > 0
+    assert stats.reach_calculations >= stats.states_expanded
+    assert 0 < stats.max_depth <= stats.states_expanded
+    assert budget.states_expanded == stats.states_expanded // 2
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.asyncio
+async def test_heuristic_decides_expansion_order(test_files_dir, mocker):
+    # Setup
+    debug.set_level(0)
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "corruption_seed_a.rdvgame"))
+    configuration = description.permalink.presets[0].configuration
+    patches = description.all_patches[0]
+    log_new_advance = mocker.patch("randovania.resolver.debug.log_new_advance")
+
+    async def expansion_order(heuristic: str):
+        log_new_advance.reset_mock()
+        await resolver.resolve(configuration=configuration, patches=patches, heuristic=heuristic)
+        return [state_key(call.args[0]) for call in log_new_advance.call_args_list]
+
+    # Run
+    reachable_order = await expansion_order("reachable-nodes")
+    pickup_order = await expansion_order("pickup-nodes")
+
+    # Assert
+    assert reachable_order[0] == pickup_order[0]
+    assert reachable_order != pickup_order
+
+
+@pytest.mark.asyncio
+async def test_resolve_heuristic_with_executor():
+    with pytest.raises(ValueError, match="The best-first search can't use an executor"):
+        await resolver.resolve(MagicMock(), MagicMock(), heuristic="pickup-nodes", executor=MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_resolve_unknown_heuristic():
+    with pytest.raises(ValueError, match="Unknown heuristic: foo"):
+        await resolver.resolve(MagicMock(), MagicMock(), heuristic="foo")
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.asyncio
+async def test_resolver_multiworld_with_log_file(test_files_dir):
+    # Setup
+    debug.set_level(0)
+
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "prime1_and_2_multi.rdvgame"))
+    configurations = {player: preset.configuration for player, preset in description.permalink.presets.items()}
+
+    # Run
+    final_states = await resolver.resolve_multiworld(configurations=configurations,
+                                                     all_patches=description.all_patches)
+
+    # Assert
+    assert final_states is not None
+    assert set(final_states.keys()) == {0, 1}
+
+
+@pytest.mark.skip_resolver_tests
+@pytest.mark.parametrize("seed", [1, 3])
+@pytest.mark.asyncio
+async def test_resolver_multiworld_prime1_and_prime3(preset_manager, seed):
+    # Setup
+    debug.set_level(0)
+    presets = {
+        0: preset_manager.included_preset_with(RandovaniaGame.PRIME1, "Starter Preset").get_preset(),
+        1: preset_manager.included_preset_with(RandovaniaGame.PRIME3, "Starter Preset").get_preset(),
+    }
+    rng = Random(seed)
+    filler_results = await generator._create_pools_and_fill(rng, presets, lambda s: None)
+    all_patches = generator._distribute_remaining_items(rng, filler_results.player_results)
+
+    # Seed 3 used to try every order of Prime 3's actions after Prime 1 got stuck
+    stats = ResolverStats(max_expansions=2000)
+
+    # Run
+    final_states = await resolver.resolve_multiworld(
+        configurations={player: preset.configuration for player, preset in presets.items()},
+        all_patches=all_patches, stats=stats)
+
+    # Assert
+    assert final_states is not None
+    assert set(final_states.keys()) == {0, 1}
+
+
+@pytest.mark.asyncio
+async def test_resolve_multiworld_invalid_players():
+    configurations = {0: MagicMock(), 2: MagicMock()}
+
+    with pytest.raises(ValueError, match="Expected configurations and patches for players 0 to 1"):
+        await resolver.resolve_multiworld(configurations, {0: MagicMock(), 2: MagicMock()})
@@ -1,6 +1,13 @@
 from unittest.mock import MagicMock, PropertyMock
 
+import pytest
+
+from randovania.game_description import default_database
+from randovania.game_description.requirements import RequirementSet, RequirementList, ResourceRequirement
 from randovania.game_description.world.node import EventNode
+from randovania.layout.layout_description import LayoutDescription
+from randovania.resolver import bootstrap, event_pickup
+from randovania.resolver.logic import Logic
 from randovania.resolver.resolver_reach import ResolverReach
 
 
@@ -55,3 +62,70 @@ def test_possible_actions_with_event():
     logic.get_additional_requirements.assert_called_once_with(event)
     logic.get_additional_requirements.return_value.satisfied.assert_called_once_with(state.resources, 1,
                                                                                      state.resource_database)
+
+
+@pytest.mark.skip_resolver_tests
+def test_calculate_reach_incremental_same_as_full(test_files_dir):
+    # Setup
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "corruption_seed_a.rdvgame"))
+    configuration = description.permalink.presets[0].configuration
+
+    game = default_database.game_description_for(configuration.game).make_mutable_copy()
+    game.resource_database = bootstrap.patch_resource_database(game.resource_database, configuration)
+    event_pickup.replace_with_event_pickups(game)
+    new_game, state = bootstrap.logic_bootstrap(configuration, game, description.all_patches[0])
+    logic = Logic(new_game, configuration)
+    state.resources["add_self_as_requirement_to_resources"] = 1
+
+    first_reach = ResolverReach.calculate_reach(logic, state)
+
+    for action, energy in list(first_reach.possible_actions(state)):
+        new_state = state.act_on_node(action, path=first_reach.path_to_node[action], new_energy=energy)
+
+        # Run
+        full_reach = ResolverReach.calculate_reach(logic, new_state)
+        incremental_reach = ResolverReach.calculate_reach(logic, new_state, first_reach)
+
+        # Assert
+        assert incremental_reach._nodes == full_reach._nodes
+        assert incremental_reach._energy_at_node == full_reach._energy_at_node
+        assert incremental_reach.path_to_node == full_reach.path_to_node
+        assert incremental_reach.satisfiable_requirements == full_reach.satisfiable_requirements
+
+
+@pytest.mark.skip_resolver_tests
+def test_calculate_reach_incremental_with_additional_requirements(test_files_dir):
+    # Setup
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "corruption_seed_a.rdvgame"))
+    configuration = description.permalink.presets[0].configuration
+
+    game = default_database.game_description_for(configuration.game).make_mutable_copy()
+    game.resource_database = bootstrap.patch_resource_database(game.resource_database, configuration)
+    event_pickup.replace_with_event_pickups(game)
+    new_game, state = bootstrap.logic_bootstrap(configuration, game, description.all_patches[0])
+    logic = Logic(new_game, configuration)
+    state.resources["add_self_as_requirement_to_resources"] = 1
+
+    first_reach = ResolverReach.calculate_reach(logic, state)
+    action, energy = next(first_reach.possible_actions(state))
+    new_state = state.act_on_node(action, path=first_reach.path_to_node[action], new_energy=energy)
+    resource = next(resource for resource, quantity in new_state.resources.items()
+                    if not isinstance(resource, str) and quantity > state.resources.get(resource, 0))
+
+    # Leaving any node needs what the action gives
+    requirement = RequirementSet([RequirementList([ResourceRequirement(resource, new_state.resources[resource],
+                                                                       False)])])
+    for node in first_reach.nodes:
+        logic.additional_requirements[node] = requirement
+    blocked_reach = ResolverReach.calculate_reach(logic, state, first_reach)
+
+    # Run
+    full_reach = ResolverReach.calculate_reach(logic, new_state)
+    incremental_reach = ResolverReach.calculate_reach(logic, new_state, blocked_reach)
+
+    # Assert
+    assert len(blocked_reach._nodes) < len(first_reach._nodes)
+    assert incremental_reach._nodes == full_reach._nodes
+    assert incremental_reach._energy_at_node == full_reach._energy_at_node
+    assert incremental_reach.satisfiable_requirements == full_reach.satisfiable_requirements
+    assert list(incremental_reach.possible_actions(new_state)) == list(full_reach.possible_actions(new_state))
@@ -0,0 +1,57 @@
+import pickle
+
+import pytest
+
+from randovania.resolver.exceptions import ExpansionBudgetExhausted
+from randovania.resolver.resolver_stats import ResolverStats
+
+
+def test_expand_budget():
+    # Setup
+    stats = ResolverStats(max_expansions=2)
+
+    # Run
+    stats.expand(1)
+    stats.expand(4)
+    with pytest.raises(ExpansionBudgetExhausted, match="Expanded the maximum of 2 states"):
+        stats.expand(2)
+
+    # Assert
+    assert stats.states_expanded == 2
+    assert stats.max_depth == 4
+    assert stats.remaining_expansions == 0
+
+
+def test_expand_without_budget():
+    stats = ResolverStats()
+    for depth in range(100):
+        stats.expand(depth)
+
+    assert stats.states_expanded == 100
+    assert stats.remaining_expansions is None
+
+
+def test_merge():
+    # Setup
+    stats = ResolverStats(max_expansions=50, states_expanded=10, reach_calculations=12, backtracks=1, max_depth=8,
+                          cache_hits=2)
+    branch = ResolverStats(states_expanded=5, reach_calculations=6, backtracks=3, max_depth=4, cache_hits=1)
+
+    # Run
+    stats.merge(branch, depth_offset=6)
+
+    # Assert
+    assert stats.as_json == {
+        "states_expanded": 15,
+        "reach_calculations": 18,
+        "backtracks": 4,
+        "max_depth": 10,
+        "cache_hits": 3,
+    }
+    assert stats.remaining_expansions == 35
+
+
+def test_budget_exhausted_pickle():
+    error = pickle.loads(pickle.dumps(ExpansionBudgetExhausted(20)))
+    assert error.max_expansions == 20
+    assert str(error) == "Expanded the maximum of 20 states"
@@ -1,4 +1,5 @@
-from unittest.mock import Mock
+import dataclasses
+from unittest.mock import Mock, MagicMock
 
 import pytest
 
@@ -101,3 +102,57 @@ def test_state_with_pickup(state_game_data, empty_patches):
     # Assert
     assert final.previous_state is starting
     assert final.resources == {resource_a: 1}
+
+
+def test_collect_resource_node_keeps_order(state_game_data, empty_patches):
+    # Setup
+    game_data = dataclasses.replace(state_game_data, world_list=MagicMock())
+    node_a, node_b = MagicMock(), MagicMock()
+    node_b.resource_gain_on_collect.return_value = []
+    starting = state.State({}, (node_a,), 99, None, empty_patches, None, game_data)
+
+    # Run
+    final = starting.collect_resource_node(node_b, 99)
+
+    # Assert
+    assert final.collected_resource_nodes == (node_a, node_b)
+    assert starting.collected_resource_nodes == (node_a,)
+    assert final.previous_state is starting
+
+
+def test_state_without_history(state_game_data, empty_patches):
+    # Setup
+    game_data = dataclasses.replace(state_game_data, keep_history=False)
+    starting = state.State({}, (), 99, None, empty_patches, None, game_data)
+    p = PickupEntry("A", 2, ItemCategory.SUIT, ItemCategory.LIFE_SUPPORT,
+                    progression=(
+                        (ItemResourceInfo(1, "A", "A", 10, None), 1),
+                    ))
+
+    # Run
+    final = state.state_with_pickup(starting, p).take_damage(10)
+
+    # Assert
+    assert final.previous_state is None
+    assert final.energy == 89
+
+
+@pytest.mark.parametrize("keep_history", [False, True])
+def test_state_follows(state_game_data, empty_patches, keep_history):
+    # Setup
+    game_data = dataclasses.replace(state_game_data, world_list=MagicMock(), keep_history=keep_history)
+    node_a, node_b = MagicMock(), MagicMock()
+    node_a.resource_gain_on_collect.return_value = []
+    node_b.resource_gain_on_collect.return_value = []
+    starting = state.State({}, (), 99, None, empty_patches, None, game_data)
+
+    # Run
+    collected_a = starting.collect_resource_node(node_a, 99)
+    collected_b = starting.collect_resource_node(node_b, 99)
+    damaged = collected_a.take_damage(10)
+
+    # Assert
+    assert collected_a.follows(starting)
+    assert damaged.follows(collected_a)
+    assert not damaged.follows(collected_b)
+    assert not starting.follows(collected_a)
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+from randovania.game_description.requirements import RequirementSet
+from randovania.game_description.resources.item_resource_info import ItemResourceInfo
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.resolver import transposition_table
+from randovania.resolver.logic import Logic
+from randovania.resolver.transposition_table import TranspositionTable, DeadEnd
+
+
+def test_pack_resources_canonical():
+    item_a = ItemResourceInfo(1, "A", "A", 50, None)
+    item_b = ItemResourceInfo(2, "B", "B", 50, None)
+
+    first = transposition_table.pack_resources({item_a: 5, PickupIndex(1): 1, item_b: 0})
+    second = transposition_table.pack_resources({PickupIndex(1): 1, item_a: 5})
+    third = transposition_table.pack_resources({PickupIndex(1): 1, item_a: 4})
+
+    assert first == second
+    assert first != third
+
+
+def test_dead_end_lower_energy():
+    # Setup
+    table = TranspositionTable()
+    entry = DeadEnd(50, True, ())
+    table.add_dead_end("key", entry)
+
+    # Run
+    results = [table.get_dead_end("key", energy) for energy in (30, 50, 70)]
+    missing = table.get_dead_end("other", 10)
+
+    # Assert
+    assert results == [entry, entry, None]
+    assert missing is None
+    assert (table.hits, table.misses) == (2, 2)
+
+
+def test_evicts_least_recently_used():
+    # Setup
+    table = TranspositionTable(max_size=2)
+    table.add_dead_end("a", DeadEnd(0, False, ()))
+    table.add_dead_end("b", DeadEnd(0, False, ()))
+    table.get_dead_end("a")
+
+    # Run
+    table.add_dead_end("c", DeadEnd(0, False, ()))
+
+    # Assert
+    assert len(table) == 2
+    assert table.evictions == 1
+    assert table.get_dead_end("b") is None
+    assert table.get_dead_end("a") is not None
+    assert table.get_dead_end("c") is not None
+
+
+def test_restore_additional_requirements():
+    # Setup
+    logics = [Logic(MagicMock(), MagicMock()), Logic(MagicMock(), MagicMock())]
+    nodes = [MagicMock(), MagicMock()]
+    requirements = RequirementSet.impossible()
+    entry = DeadEnd(0, True, ((nodes[0], RequirementSet.trivial()), (nodes[1], requirements)))
+
+    # Run
+    entry.restore_additional_requirements(logics)
+
+    # Assert
+    assert logics[0].additional_requirements == {nodes[0]: RequirementSet.trivial()}
+    assert logics[1].additional_requirements == {nodes[1]: requirements}
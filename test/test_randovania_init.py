@@ -46,3 +46,21 @@ def test_get_invalid_configuration_file(tmpdir):
     # Run
     with pytest.raises(FileNotFoundError):
         randovania.get_configuration()
+
+
+@pytest.mark.parametrize("configured", [False, True])
+def test_get_game_description_cache_path(tmp_path, monkeypatch, configured):
+    # Setup
+    monkeypatch.setattr(randovania, "GAME_DESCRIPTION_CACHE_PATH",
+                        tmp_path.joinpath("configured") if configured else None)
+    monkeypatch.setattr("randovania.interface_common.persistence.local_cache_dir",
+                        lambda: tmp_path.joinpath("user_cache"))
+
+    # Run
+    result = randovania.get_game_description_cache_path()
+
+    # Assert
+    if configured:
+        assert result == tmp_path.joinpath("configured")
+    else:
+        assert result == tmp_path.joinpath("user_cache", "game_description_cache")